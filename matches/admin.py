@@ -7,8 +7,7 @@ from django.contrib import admin, messages
 from django.core.management import call_command
 from django.utils.safestring import mark_safe
 
-from .models import Team, Player, Match, Prediction, Fixture, UserPrediction, Bet, Gameweek, TelegramProfile, League, Country, Competition, ModelConfig, CSVUpload
-from matches.logic.train_and_predict import train_and_predict
+from .models import Team, Player, Match, Prediction, Fixture, UserPrediction, Bet, Gameweek, TelegramProfile, League, Country, Competition, ModelConfig, CSVUpload, MatchFeatures, TeamInjurySummary, HeadToHead
 from matches.management.commands.sync_teams import Command as SyncTeamsCommand
 
 # -------------------------------
@@ -30,6 +29,14 @@ class CsvImportForm(forms.Form):
     )
     season = forms.CharField(required=False, label="Season", initial="unknown")
 
+class MatchCsvImportForm(CsvImportForm):
+    ingest_mode = forms.ChoiceField(
+        choices=CSVUpload.INGEST_MODE_CHOICES,
+        initial='orm',
+        label="Ingest mode",
+        help_text="COPY loads large historical files in a few statements; it needs Postgres.",
+    )
+
 class GameweekImportForm(forms.Form):
     csv_file = forms.FileField(label="Select CSV file")
 
@@ -80,7 +87,8 @@ class ModelConfigAdmin(admin.ModelAdmin):
                 'weight_form_diff', 'weight_strength_diff',
                 'weight_home_win_rate', 'weight_home_draw_rate',
                 'weight_away_win_rate', 'weight_away_draw_rate',
-                'weight_home_advantage'
+                'weight_home_advantage', 'weight_elo_diff',
+                'weight_h2h_balance'
             ),
             'classes': ('collapse',),
         }),
@@ -288,6 +296,7 @@ class TeamAdmin(admin.ModelAdmin):
                 Fixture.objects.filter(home_team__in=merge_teams).update(home_team=keep_team)
                 Fixture.objects.filter(away_team__in=merge_teams).update(away_team=keep_team)
                 Player.objects.filter(team__in=merge_teams).update(team=keep_team)
+                TeamInjurySummary.refresh(team_ids=[keep_team.id])
                 
                 # Delete merged teams
                 merged_names = ', '.join(merge_teams.values_list('name', flat=True))
@@ -322,6 +331,23 @@ class PlayerAdmin(admin.ModelAdmin):
     actions = ["sync_players_action"]
     change_list_template = "admin/player_changelist.html"
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        team_ids = {obj.team_id}
+        if change and 'team' in form.changed_data and form.initial.get('team'):
+            # Player moved teams: the old team's summary changes too
+            team_ids.add(form.initial['team'])
+        TeamInjurySummary.refresh(team_ids=team_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        TeamInjurySummary.refresh(team_ids=[obj.team_id])
+
+    def delete_queryset(self, request, queryset):
+        team_ids = list(queryset.values_list('team_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        TeamInjurySummary.refresh(team_ids=team_ids)
+
     def sync_players_action(self, request, queryset):
         call_command("sync_players")
         self.message_user(request, "✅ Players synced for all teams.")
@@ -421,7 +447,7 @@ class MatchAdmin(admin.ModelAdmin):
         return custom_urls + urls
 
     def import_csv_view(self, request):
-        form = CsvImportForm(request.POST or None, request.FILES or None)
+        form = MatchCsvImportForm(request.POST or None, request.FILES or None)
         if request.method == "POST" and form.is_valid():
             csv_file = form.cleaned_data['csv_file']
             league_instance = form.cleaned_data.get("league")
@@ -432,6 +458,7 @@ class MatchAdmin(admin.ModelAdmin):
             upload = CSVUpload.objects.create(
                 file=csv_file,
                 model_type='match',
+                ingest_mode=form.cleaned_data['ingest_mode'],
                 league=league_instance,
                 competition=competition_instance,
                 season=season,
@@ -618,7 +645,7 @@ class CSVUploadAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ("File Info", {
-            "fields": ("file", "model_type", "uploaded_by")
+            "fields": ("file", "model_type", "ingest_mode", "uploaded_by")
         }),
         ("Import Context", {
             "fields": ("league", "competition", "season")
@@ -676,6 +703,48 @@ class CSVUploadAdmin(admin.ModelAdmin):
         self.message_user(request, f"✅ Retrying {count} failed uploads")
     retry_failed_uploads.short_description = "Retry failed uploads"
 
+# -------------------------------
+# MatchFeatures Admin
+# -------------------------------
+@admin.register(MatchFeatures)
+class MatchFeaturesAdmin(admin.ModelAdmin):
+    list_display = ("object_type", "object_id", "schema_version", "computed_at")
+    list_filter = ("object_type", "schema_version")
+    search_fields = ("object_id",)
+    readonly_fields = ("features", "input_signature", "computed_at")
+    ordering = ("-computed_at",)
+
+# -------------------------------
+# TeamInjurySummary Admin
+# -------------------------------
+@admin.register(TeamInjurySummary)
+class TeamInjurySummaryAdmin(admin.ModelAdmin):
+    list_display = ("team", "season", "total_players", "injured_players", "unknown_players", "updated_at")
+    list_filter = ("season",)
+    search_fields = ("team__name",)
+    readonly_fields = ("total_players", "injured_players", "unknown_players", "updated_at")
+    actions = ["refresh_summaries"]
+
+    def refresh_summaries(self, request, queryset):
+        count = TeamInjurySummary.refresh()
+        self.message_user(request, f"✅ Rebuilt {count} team injury summaries from Player data.")
+    refresh_summaries.short_description = "Rebuild all summaries from Player data"
+
+# -------------------------------
+# HeadToHead Admin
+# -------------------------------
+@admin.register(HeadToHead)
+class HeadToHeadAdmin(admin.ModelAdmin):
+    list_display = ("team_a", "team_b", "team_a_wins", "draws", "team_b_wins", "recent", "last_played")
+    search_fields = ("team_a__name", "team_b__name")
+    readonly_fields = ("team_a_wins", "draws", "team_b_wins", "recent", "last_played", "updated_at")
+    actions = ["refresh_records"]
+
+    def refresh_records(self, request, queryset):
+        count = HeadToHead.refresh()
+        self.message_user(request, f"✅ Rebuilt {count} head-to-head records from Match data.")
+    refresh_records.short_description = "Rebuild all records from Match data"
+
 # -------------------------------
 # TelegramProfile Admin
 # -------------------------------
@@ -0,0 +1,151 @@
+# matches/logic/backtest.py
+"""
+Walk-forward backtesting.
+
+The scope's feature matrix is built once. Every row only uses history
+strictly before its match, so slicing it by date is enough: each step trains
+on the matches before week W, predicts the matches of week W (with the same
+smoothing and draw boost as live predictions) and moves on. Nothing a step
+predicts was visible to its model, unlike a random train/test split.
+Injury features are left out: TeamInjurySummary only describes today's
+squads, so past matches would see injuries they could not have known about.
+
+Per season and overall it reports accuracy, log loss, Brier score and the
+ROI of backing the predicted outcome at the fair odds the model would have
+published (about 0 for calibrated probabilities; negative means the odds
+were too short).
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from matches.logic.estimators import DEFAULT_MODEL_TYPE, build_estimator
+from matches.logic.feature_registry import enabled_features, feature_weight
+from matches.logic.serving import adjust_probabilities, label_map
+from matches.logic.train_and_predict import (
+    build_training_matrix,
+    reverse_map,
+    scope_config,
+    scope_matches,
+)
+
+# Probabilities are clipped this far from 0 and 1 for the log loss
+EPSILON = 1e-15
+
+# Features without as-of-date history, dropped from backtests
+NOT_AS_OF_FEATURES = ('home_injuries', 'away_injuries')
+
+
+def score_predictions(probs, labels, y):
+    """Accuracy, log loss, Brier score and fair-odds ROI of (n, 3) probabilities."""
+    n = len(y)
+    if n == 0:
+        return {"matches": 0, "accuracy": None, "log_loss": None, "brier": None, "roi": None}
+    rows = np.arange(n)
+    outcomes = np.zeros_like(probs)
+    outcomes[rows, y] = 1.0
+    # One unit on the predicted outcome at odds of 1 / its probability
+    returns = np.where(labels == y, np.round(1 / probs[rows, labels], 2), 0.0)
+    return {
+        "matches": n,
+        "accuracy": round(float(np.mean(labels == y)), 4),
+        "log_loss": round(float(-np.mean(np.log(np.clip(probs[rows, y], EPSILON, 1)))), 4),
+        "brier": round(float(np.mean(np.sum((probs - outcomes) ** 2, axis=1))), 4),
+        "roi": round(float(returns.sum() / n - 1), 4),
+    }
+
+
+def walk_forward(X, y, dates, hyperparameters=None, model_type=None, step=timedelta(weeks=1), min_train=100):
+    """
+    Predictions for every row of a date-ordered matrix that has at least
+    `min_train` earlier rows. Returns (mask of predicted rows, adjusted
+    probabilities, labels, number of fits).
+    """
+    n = len(y)
+    probs = np.zeros((n, len(label_map)))
+    labels = np.zeros(n, dtype=int)
+    predicted = np.zeros(n, dtype=bool)
+    if n <= min_train:
+        return predicted, probs, labels, 0
+
+    dates = np.asarray(dates)
+    fits = 0
+    start = dates[min_train]
+    while start <= dates[-1]:
+        end = start + step
+        train = int(np.searchsorted(dates, start, side='left'))
+        test = slice(train, int(np.searchsorted(dates, end, side='left')))
+        if test.stop > test.start and len(np.unique(y[:train])) > 1:
+            model = build_estimator(model_type, hyperparameters, n_samples=train)
+            model.fit(X[:train], y[:train])
+            fits += 1
+            raw = np.zeros((test.stop - test.start, len(label_map)))
+            raw[:, model.classes_] = model.predict_proba(X[test])
+            labels[test] = raw.argmax(axis=1)
+            probs[test] = adjust_probabilities(raw)
+            predicted[test] = True
+        start = end
+    return predicted, probs, labels, fits
+
+
+def backtest_scope(
+    league_id=None,
+    competition_id=None,
+    country_id=None,
+    step_weeks=1,
+    min_train=100,
+    model_type=None,
+    feature_backend='numpy',
+    workers=1,
+):
+    """
+    Walk-forward backtest of a scope's ModelConfig (defaults when it has
+    none), without NOT_AS_OF_FEATURES.
+    """
+    config = scope_config(league_id, competition_id, country_id)
+    hyperparameters = {}
+    if config:
+        hyperparameters = {
+            'n_estimators': config.n_estimators,
+            'max_depth': config.max_depth,
+            'min_samples_split': config.min_samples_split,
+        }
+    model_type = model_type or (config.model_type if config else DEFAULT_MODEL_TYPE)
+    enabled = enabled_features(config)
+    feature_names = [name for name in enabled if name not in NOT_AS_OF_FEATURES]
+
+    started = time.perf_counter()
+    past_matches = scope_matches(league_id, competition_id, country_id)
+    X, y = build_training_matrix(past_matches, feature_backend=feature_backend, workers=workers, features=feature_names)
+    X = X * np.array([feature_weight(config, name) for name in feature_names])
+    # Same rows and order as the matrix
+    dates, seasons = [], []
+    for date, season in (
+        past_matches.filter(result__in=list(reverse_map)).order_by('date', 'id').values_list('date', 'season')
+    ):
+        dates.append(date)
+        seasons.append(season)
+    seasons = np.array(seasons, dtype=object)
+    matrix_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted, probs, labels, fits = walk_forward(
+        X, y, dates, hyperparameters, model_type, step=timedelta(weeks=step_weeks), min_train=min_train
+    )
+    backtest_time = time.perf_counter() - started
+
+    per_season = {}
+    for season in sorted(set(seasons[predicted])):
+        rows = predicted & (seasons == season)
+        per_season[season] = score_predictions(probs[rows], labels[rows], y[rows])
+
+    return {
+        "model_type": model_type,
+        "matches": len(y),
+        "fits": fits,
+        "excluded_features": [name for name in enabled if name in NOT_AS_OF_FEATURES],
+        "overall": score_predictions(probs[predicted], labels[predicted], y[predicted]),
+        "seasons": per_season,
+        "timings": {"matrix": round(matrix_time, 3), "backtest": round(backtest_time, 3)},
+    }
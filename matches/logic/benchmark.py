@@ -0,0 +1,243 @@
+# matches/logic/benchmark.py
+"""
+Synthetic-data benchmark of the prediction pipeline.
+
+Each run generates a reproducible league (teams, players, matches and
+upcoming fixtures) inside a transaction on the chosen database, times every
+pipeline stage on it and rolls everything back, so the database is left as
+it was. Model artifacts go to a temporary registry directory.
+
+Every stage reports wall time, the number of SQL queries and peak RSS. On
+Linux the peak is reset before each stage (/proc/self/clear_refs), so it is
+the stage's own high-water mark; elsewhere it is the process peak so far.
+
+The pipeline reads and writes the default database, so a run refuses to
+start unless that is a development or test database (see
+benchmark_database_allowed): a crash mid-run must not leave synthetic rows
+in production.
+With the store backend, training_matrix builds the matrix from a cold
+feature store and train_and_predict then reads the rows it stored, as a
+scheduled run would.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import override_settings
+
+from matches.models import Fixture, League, Match, Player, Team, TeamInjurySummary
+from matches.logic.feature_context import FeatureContext
+from matches.logic.feature_registry import enabled_features
+from matches.logic.history import TeamHistoryIndex
+from matches.logic.ingest import after_matches_written
+from matches.logic.predict import extract_features
+from matches.logic.serving import load_predictor, predict_fixtures
+from matches.logic.train_and_predict import (
+    _team_ids,
+    build_training_matrix,
+    scope_matches,
+    train_and_predict,
+)
+
+BATCH_SIZE = 5000
+PLAYERS_PER_TEAM = 25
+INJURY_RATE = 0.08
+MATCHES_PER_TEAM = 250
+HISTORY_START = datetime(2015, 8, 1, tzinfo=dt_timezone.utc)
+HISTORY_DAYS = 3650
+
+
+class _Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def benchmark_database_allowed():
+    """True when the default database may hold a benchmark's synthetic rows."""
+    return settings.DEBUG or connection.vendor == 'sqlite' or connection.settings_dict['NAME'].startswith('test')
+
+
+@contextmanager
+def measure(stages, name):
+    """Record wall time, query count and peak RSS of the block under stages[name]."""
+    counter = QueryCounter()
+    _reset_peak_rss()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        yield
+    stages[name] = {
+        'seconds': round(time.perf_counter() - started, 3),
+        'queries': counter.count,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def generate(n_matches, seed=0):
+    """
+    Synthetic league with `n_matches` results spread over ten seasons, one
+    squad per team and a round of upcoming fixtures. Returns the League.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = max(20, n_matches // MATCHES_PER_TEAM)
+    n_fixtures = max(50, n_matches // 100)
+
+    league = League.objects.create(name=f"Benchmark League {seed}", code=f"BENCH{seed}")
+    Team.objects.bulk_create(
+        [Team(name=f"Benchmark Team {i}", country=f"Benchmark {seed}") for i in range(n_teams)],
+        batch_size=BATCH_SIZE,
+    )
+    team_ids = np.array(Team.objects.filter(country=f"Benchmark {seed}").order_by('id').values_list('id', flat=True))
+
+    last_season = f"{(HISTORY_START + timedelta(days=HISTORY_DAYS)).year}"
+    injured = rng.random(n_teams * PLAYERS_PER_TEAM) < INJURY_RATE
+    Player.objects.bulk_create(
+        [
+            Player(name=f"Player {i}", team_id=int(team_ids[i // PLAYERS_PER_TEAM]), season=last_season, injured=bool(injured[i]))
+            for i in range(n_teams * PLAYERS_PER_TEAM)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    TeamInjurySummary.refresh(team_ids=team_ids.tolist())
+
+    for start in range(0, n_matches, BATCH_SIZE):
+        size = min(BATCH_SIZE, n_matches - start)
+        home = rng.integers(0, n_teams, size)
+        away = (home + rng.integers(1, n_teams, size)) % n_teams
+        home_goals = rng.poisson(1.5, size)
+        away_goals = rng.poisson(1.1, size)
+        offsets = (start + np.arange(size)) * (HISTORY_DAYS * 86400 / n_matches)
+        matches = []
+        for i in range(size):
+            date = HISTORY_START + timedelta(seconds=float(offsets[i]))
+            h, a = int(home_goals[i]), int(away_goals[i])
+            matches.append(Match(
+                fixture_id=f"BENCH{seed}-{start + i}",
+                home_team_id=int(team_ids[home[i]]),
+                away_team_id=int(team_ids[away[i]]),
+                league=league,
+                season=str(date.year),
+                date=date,
+                home_score=h,
+                away_score=a,
+                result='win' if h > a else 'draw' if h == a else 'loss',
+            ))
+        Match.objects.bulk_create(matches, batch_size=BATCH_SIZE)
+
+    first_id = (Fixture.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    kickoff = HISTORY_START + timedelta(days=HISTORY_DAYS + 1)
+    home = rng.integers(0, n_teams, n_fixtures)
+    away = (home + rng.integers(1, n_teams, n_fixtures)) % n_teams
+    Fixture.objects.bulk_create(
+        [
+            Fixture(
+                id=first_id + i,
+                date=kickoff + timedelta(hours=i % 72),
+                status="Not Started",
+                league=league,
+                season=last_season,
+                home_team_id=int(team_ids[home[i]]),
+                away_team_id=int(team_ids[away[i]]),
+            )
+            for i in range(n_fixtures)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return league
+
+
+def run_benchmark(n_matches, seed=0, feature_backend='numpy'):
+    """Time every pipeline stage on a synthetic league of `n_matches` results."""
+    stages = {}
+    run = {'matches': n_matches, 'seed': seed, 'feature_backend': feature_backend, 'stages': stages}
+    try:
+        with tempfile.TemporaryDirectory() as directory, override_settings(MODEL_REGISTRY_DIR=directory):
+            with transaction.atomic():
+                with measure(stages, 'generate'):
+                    league = generate(n_matches, seed=seed)
+                matches = scope_matches(league_id=league.id)
+                fixtures = Fixture.objects.filter(league=league).select_related('home_team', 'away_team')
+                run['teams'] = len(_team_ids(matches))
+                run['fixtures'] = fixtures.count()
+
+                with measure(stages, 'ingest'):
+                    after_matches_written(matches)
+
+                features = enabled_features()
+                with measure(stages, 'extract_features'):
+                    context = FeatureContext(index=TeamHistoryIndex.for_teams(_team_ids(fixtures)))
+                    for fixture in fixtures:
+                        extract_features(fixture, date=fixture.date, context=context, features=features)
+
+                with measure(stages, 'training_matrix'):
+                    build_training_matrix(matches, feature_backend=feature_backend, features=features)
+
+                with measure(stages, 'train_and_predict'):
+                    result = train_and_predict(league_id=league.id, feature_backend=feature_backend, retrain=True)
+                run['accuracy'] = result.get('accuracy')
+
+                model = load_predictor(result['model_key']) if result.get('status') == 'success' else None
+                if model is not None:
+                    weights = {name: 1.0 for name in features}
+                    with measure(stages, 'batch_prediction'):
+                        context = FeatureContext(index=TeamHistoryIndex.for_teams(_team_ids(fixtures)))
+                        predict_fixtures(model, fixtures, features, weights, "bench", context=context)
+                raise _Rollback
+    except _Rollback:
+        pass
+    return run
+
+
+def benchmark_environment():
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'database': connection.vendor,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'cpus': os.cpu_count(),
+    }
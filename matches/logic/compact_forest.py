@@ -0,0 +1,137 @@
+# matches/logic/compact_forest.py
+"""
+Array-backed forest inference.
+
+CompactForest.from_forest flattens a fitted RandomForestClassifier into a
+handful of NumPy arrays shared by all trees: children, split feature,
+threshold and the class probabilities of each leaf. predict_proba walks
+every tree for a whole batch of rows at once, one tree level per step, and
+returns exactly what the forest's own predict_proba does with n_jobs=1
+(same float32 inputs, same leaf values, trees summed in order). With more
+jobs scikit-learn sums trees in whatever order its threads finish, so only
+the last bit can differ.
+
+Only NumPy is needed to load and evaluate the arrays, so web and bot
+processes can serve predictions without importing scikit-learn, and the
+arrays take a fraction of the pickled forest's memory: 21 bytes per node
+instead of 64, and class values for leaves only.
+"""
+import numpy as np
+
+LEAF = -1
+
+
+class CompactForest:
+    """
+    Flattened trees. Nodes of every tree live in the same arrays; a leaf has
+    children_left == LEAF and its `feature` slot indexes `leaf_values`.
+    """
+
+    ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'missing_left', 'leaf_values', 'roots', 'classes')
+
+    def __init__(self, children_left, children_right, feature, threshold, missing_left, leaf_values, roots, classes, n_features):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes = classes
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_forest(cls, model):
+        """Export a fitted single-output forest classifier (duck-typed, no scikit-learn import)."""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be exported")
+        n_classes = len(model.classes_)
+        left, right, feature, threshold, missing_left, leaf_values, roots = [], [], [], [], [], [], []
+        offset = n_leaves = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == LEAF
+            leaf_ids = np.cumsum(is_leaf) - 1 + n_leaves
+
+            roots.append(offset)
+            left.append(np.where(is_leaf, LEAF, tree.children_left + offset))
+            right.append(np.where(is_leaf, LEAF, tree.children_right + offset))
+            feature.append(np.where(is_leaf, leaf_ids, tree.feature))
+            threshold.append(tree.threshold)
+            missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8)))
+
+            values = tree.value[is_leaf, 0, :n_classes]
+            # Since scikit-learn 1.4 classifier trees store fractions; older ones stored counts
+            totals = values.sum(axis=1, keepdims=True)
+            if not np.allclose(totals, 1.0):
+                totals[totals == 0] = 1.0
+                values = values / totals
+            leaf_values.append(values)
+
+            offset += tree.node_count
+            n_leaves += int(is_leaf.sum())
+
+        return cls(
+            children_left=np.concatenate(left).astype(np.int32),
+            children_right=np.concatenate(right).astype(np.int32),
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            missing_left=np.concatenate(missing_left).astype(np.uint8),
+            leaf_values=np.concatenate(leaf_values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    @property
+    def classes_(self):
+        # Same name as on the fitted forest, so either can serve predictions
+        return self.classes
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def apply(self, X):
+        """Leaf (index into leaf_values) reached in every tree: shape (n_rows, n_trees)."""
+        # Trees compare float32 inputs against float64 thresholds, like scikit-learn
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        rows = np.arange(len(X))[:, None]
+        active = self.children_left[nodes] != LEAF
+        while active.any():
+            current = nodes[active]
+            values = X[np.broadcast_to(rows, nodes.shape)[active], self.feature[current]]
+            go_left = np.where(np.isnan(values), self.missing_left[current] == 1, values <= self.threshold[current])
+            nodes[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+            active = self.children_left[nodes] != LEAF
+        return self.feature[nodes]
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((len(leaves), len(self.classes)), dtype=np.float64)
+        # Summed tree by tree, in order, as scikit-learn accumulates them
+        for tree in range(self.n_trees):
+            proba += self.leaf_values[leaves[:, tree]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path):
+        """Write the arrays to an uncompressed .npz (loadable with NumPy alone)."""
+        with open(path, 'wb') as f:
+            np.savez(f, n_features=self.n_features, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(n_features=int(data['n_features']), **{name: data[name] for name in cls.ARRAYS})
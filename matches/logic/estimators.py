@@ -0,0 +1,109 @@
+# matches/logic/estimators.py
+"""
+Estimator factory.
+
+ModelConfig.model_type names the engine a scope is trained with; every
+training path builds its model through build_estimator so that choice is
+honoured everywhere. ModelConfig's n_estimators / max_depth /
+min_samples_split are mapped onto each engine's closest parameters.
+
+HistGradientBoosting bins every feature into at most 255 buckets once at the
+start of each fit and grows its trees on the uint8 bins, so fitting stays
+fast on millions of rows. Early stopping holds out a validation slice, which
+only pays off (and only stratifies reliably) once there are enough rows.
+"""
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+
+DEFAULT_MODEL_TYPE = "RandomForest"
+
+# Rows needed before HistGradientBoosting holds out data for early stopping
+EARLY_STOPPING_MIN_ROWS = 1000
+
+
+def _max_depth(hyperparameters):
+    max_depth = hyperparameters.get('max_depth', 10)
+    return int(max_depth) if max_depth is not None else None
+
+
+def random_forest(hyperparameters, n_samples=None):
+    return RandomForestClassifier(
+        n_estimators=int(hyperparameters.get('n_estimators', 100)),
+        max_depth=_max_depth(hyperparameters),
+        min_samples_split=int(hyperparameters.get('min_samples_split', 5)),
+        random_state=42,
+        # Reweights classes from the labels of each fit, like a per-split compute_class_weight
+        class_weight='balanced',
+        # Trees are grown on every core
+        n_jobs=-1,
+    )
+
+
+def hist_gradient_boosting(hyperparameters, n_samples=None):
+    return HistGradientBoostingClassifier(
+        # n_estimators caps the boosting iterations; early stopping usually ends sooner
+        max_iter=int(hyperparameters.get('n_estimators', 100)),
+        max_depth=_max_depth(hyperparameters),
+        # A node of min_samples_split rows can split into two leaves of half that
+        min_samples_leaf=max(1, int(hyperparameters.get('min_samples_split', 5)) // 2),
+        learning_rate=0.1,
+        class_weight='balanced',
+        early_stopping=n_samples is None or n_samples >= EARLY_STOPPING_MIN_ROWS,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        random_state=42,
+    )
+
+
+# model_type -> builder(hyperparameters, n_samples) -> unfitted classifier
+ESTIMATORS = {
+    "RandomForest": random_forest,
+    "HistGradientBoosting": hist_gradient_boosting,
+}
+
+MODEL_TYPES = tuple(ESTIMATORS)
+
+
+def build_estimator(model_type=None, hyperparameters=None, n_samples=None):
+    """Unfitted classifier for `model_type` (default RandomForest)."""
+    model_type = model_type or DEFAULT_MODEL_TYPE
+    if model_type not in ESTIMATORS:
+        raise ValueError(f"Unknown model type '{model_type}', expected one of {MODEL_TYPES}")
+    return ESTIMATORS[model_type](hyperparameters or {}, n_samples=n_samples)
+
+
+class ConfiguredClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Estimator parameterised like a ModelConfig, built with build_estimator on
+    fit. Lets scikit-learn searches tune n_estimators / max_depth /
+    min_samples_split for any model type. `n_jobs`, when set, caps the inner
+    estimator's threads so parallel search workers do not oversubscribe.
+    """
+
+    def __init__(self, model_type=None, n_estimators=100, max_depth=10, min_samples_split=5, n_jobs=None):
+        self.model_type = model_type
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.n_jobs = n_jobs
+
+    def hyperparameters(self):
+        return {
+            'n_estimators': self.n_estimators,
+            'max_depth': self.max_depth,
+            'min_samples_split': self.min_samples_split,
+        }
+
+    def fit(self, X, y):
+        self.estimator_ = build_estimator(self.model_type, self.hyperparameters(), n_samples=len(X))
+        if self.n_jobs is not None and 'n_jobs' in self.estimator_.get_params():
+            self.estimator_.set_params(n_jobs=self.n_jobs)
+        self.estimator_.fit(X, y)
+        self.classes_ = self.estimator_.classes_
+        return self
+
+    def predict(self, X):
+        return self.estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.estimator_.predict_proba(X)
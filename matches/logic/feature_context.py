@@ -0,0 +1,63 @@
+# matches/logic/feature_context.py
+import logging
+
+from matches.logic.feature_training import count_injuries, resolve_season
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureContext:
+    """
+    Memoizes feature-function results for the lifetime of a batch
+    (one training run, one prediction pass, one bot command).
+
+    Results are keyed by (function, team_id, date, extra arguments), so
+    calculate_form(home) computed for "home_form" is reused for "form_diff",
+    and a team's injury rate is computed once per season rather than once
+    per fixture. Hit/miss counters show how much work was saved.
+
+    Call invalidate() after writing Match or Player rows mid-batch.
+    """
+
+    def __init__(self, index=None):
+        self.index = index
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, func, team, date=None, **kwargs):
+        """Return func(team, date=date, **kwargs), computing it at most once."""
+        key = (func.__name__, team.id, date, tuple(sorted(kwargs.items())))
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        value = func(team, date=date, index=self.index, **kwargs)
+        self._cache[key] = value
+        return value
+
+    def injuries(self, team, date=None):
+        """count_injuries, with the season lookup and player counts memoized separately."""
+        season = self.get(resolve_season, team, date=date)
+        return self.get(count_injuries, team, season=season)
+
+    def invalidate(self, team_id=None):
+        """Drop every cached result, or only those for one team."""
+        if team_id is None:
+            self._cache.clear()
+        else:
+            self._cache = {key: value for key, value in self._cache.items() if key[1] != team_id}
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "cached": len(self._cache),
+        }
+
+    def log_stats(self, label="Feature context"):
+        logger.info(f"{label}: {self.stats}")
@@ -0,0 +1,325 @@
+# matches/logic/feature_matrix.py
+"""
+Vectorized feature builder.
+
+Produces the same 15 features as extract_features for a whole batch of
+matches/fixtures at once. Each team's history is laid out as one sorted
+"team perspective" array with prefix sums, so every rolling window
+("last 20 matches before date D") becomes two searchsorted lookups and a
+subtraction instead of a query.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import numpy as np
+from django.db import connection
+from django.db.models import Q
+
+from matches.models import Match, TeamInjurySummary
+from matches.logic.feature_training import default_season, injury_rate
+
+FEATURE_NAMES = [
+    'home_form',
+    'away_form',
+    'home_strength',
+    'away_strength',
+    'home_injuries',
+    'away_injuries',
+    'home_goal_avg',
+    'away_goal_avg',
+    'form_diff',
+    'strength_diff',
+    'home_win_rate',
+    'home_draw_rate',
+    'away_win_rate',
+    'away_draw_rate',
+    'home_advantage',
+]
+
+RESULT_CODES = {'win': 0, 'draw': 1, 'loss': 2}
+
+# Window sizes used by the feature functions in feature_training.py
+FORM_WINDOW = 20
+GOAL_WINDOW = 10
+VENUE_WINDOW = 10
+
+INVERTED_RESULT = {'win': 'loss', 'loss': 'win', 'draw': 'draw'}
+
+
+def _micros(dates):
+    """Datetimes -> int64 microseconds since epoch (exact for ordering)."""
+    return np.array([round(d.timestamp() * 1_000_000) for d in dates], dtype=np.int64)
+
+
+class _TeamWindows:
+    """
+    Rows sorted by (team, time) with prefix sums over the given columns.
+
+    `sums(teams, times, size)` returns, for every query, the column sums over
+    that team's last `size` rows strictly before `time`, plus the row count.
+    """
+
+    def __init__(self, team_codes, time_codes, n_times, columns=None):
+        self.stride = n_times + 1
+        keys = team_codes.astype(np.int64) * self.stride + time_codes
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        if columns is not None:
+            sorted_columns = columns[self.order]
+            self.cumsum = np.vstack([
+                np.zeros((1, sorted_columns.shape[1])),
+                np.cumsum(sorted_columns, axis=0),
+            ])
+
+    def bounds(self, team_codes, time_codes, size=None):
+        base = team_codes.astype(np.int64) * self.stride
+        start = np.searchsorted(self.keys, base, side='left')
+        end = np.searchsorted(self.keys, base + time_codes, side='left')
+        if size is not None:
+            start = np.maximum(start, end - size)
+        return start, end
+
+    def sums(self, team_codes, time_codes, size):
+        start, end = self.bounds(team_codes, time_codes, size)
+        return self.cumsum[end] - self.cumsum[start], (end - start).astype(float)
+
+
+def _safe_div(numerator, denominator, default):
+    out = np.full(np.shape(numerator), default, dtype=float)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _load_history(team_ids):
+    """Every match involving the given teams, as NumPy columns."""
+    rows = list(
+        Match.objects
+        .filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+        .values_list('date', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'result', 'season')
+        .order_by('date', 'id')
+    )
+    if not rows:
+        return None
+    dates, home, away, home_score, away_score, result, season = zip(*rows)
+    return {
+        'time': _micros(dates),
+        'home': np.array(home, dtype=np.int64),
+        'away': np.array(away, dtype=np.int64),
+        'home_score': np.array([np.nan if s is None else s for s in home_score], dtype=float),
+        'away_score': np.array([np.nan if s is None else s for s in away_score], dtype=float),
+        'result': np.array(result, dtype=object),
+        'season': np.array(season, dtype=object),
+    }
+
+
+def load_injury_rates(team_ids):
+    """(team_id, season) -> injury rate, from the precomputed summaries."""
+    summaries = TeamInjurySummary.objects.filter(team_id__in=team_ids).values_list(
+        'team_id', 'season', 'total_players', 'injured_players', 'unknown_players'
+    )
+    return {
+        (team_id, season): injury_rate(total, injured, unknown)
+        for team_id, season, total, injured, unknown in summaries
+    }
+
+
+def compute_feature_matrix(home_ids, away_ids, dates):
+    """
+    Feature matrix (len(dates) x 15, FEATURE_NAMES order) for arbitrary
+    (home team, away team, kick-off) triples, using strict as-of-date history.
+    """
+    home_ids = np.asarray(home_ids, dtype=np.int64)
+    away_ids = np.asarray(away_ids, dtype=np.int64)
+    n = len(home_ids)
+    if n == 0:
+        return np.empty((0, len(FEATURE_NAMES)))
+
+    team_ids = set(home_ids.tolist()) | set(away_ids.tolist())
+    history = _load_history(team_ids)
+    query_time = _micros(dates)
+
+    if history is None:
+        history = {key: np.empty(0, dtype=dtype) for key, dtype in (
+            ('time', np.int64), ('home', np.int64), ('away', np.int64),
+            ('home_score', float), ('away_score', float), ('result', object), ('season', object),
+        )}
+
+    # Dense codes keep the (team, time) composite key small and exact.
+    all_times, time_codes = np.unique(np.concatenate([history['time'], query_time]), return_inverse=True)
+    hist_time_code = time_codes[:len(history['time'])]
+    query_time_code = time_codes[len(history['time']):]
+    all_teams, team_codes = np.unique(
+        np.concatenate([history['home'], history['away'], home_ids, away_ids]), return_inverse=True
+    )
+    m = len(history['time'])
+    hist_home_code, hist_away_code = team_codes[:m], team_codes[m:2 * m]
+    query_home_code, query_away_code = team_codes[2 * m:2 * m + n], team_codes[2 * m + n:]
+    n_times = len(all_times)
+
+    # --- Team-perspective rows for played matches (home view + away view) ---
+    played = np.array([r is not None for r in history['result']], dtype=bool)
+    p_result = history['result'][played]
+    p_time = np.concatenate([hist_time_code[played]] * 2)
+    p_team = np.concatenate([hist_home_code[played], hist_away_code[played]])
+    hs, as_ = history['home_score'][played], history['away_score'][played]
+    goals_for = np.concatenate([hs, as_])
+    goals_against = np.concatenate([as_, hs])
+    is_home = np.concatenate([np.ones(len(hs)), np.zeros(len(hs))])
+    team_result = np.concatenate([p_result, np.array([INVERTED_RESULT.get(r, r) for r in p_result], dtype=object)])
+
+    has_score = ~(np.isnan(goals_for) | np.isnan(goals_against))
+    gf = np.where(has_score, goals_for, 0.0)
+    ga = np.where(has_score, goals_against, 0.0)
+    has = has_score.astype(float)
+    points_score = np.where(gf > ga, 3.0, np.where(gf == ga, 1.0, 0.0)) * has
+    win = (team_result == 'win').astype(float)
+    draw = (team_result == 'draw').astype(float)
+    points_result = 3.0 * win + draw
+    is_away = 1.0 - is_home
+
+    columns = np.column_stack([
+        has,                           # 0  rows with a score
+        points_score,                  # 1  points from scores
+        points_result * (1.0 - has),   # 2  points from result where no score
+        points_result,                 # 3  points from result
+        (gf - ga) * has,               # 4  goal difference where scored
+        is_home * has,                 # 5  home rows with a score
+        is_home * gf,                  # 6  home goals scored
+        is_home,                       # 7  home rows
+        is_home * win,                 # 8  home wins
+        is_away * has,                 # 9  away rows with a score
+        is_away * gf,                  # 10 away goals scored
+        is_away,                       # 11 away rows
+        is_away * win,                 # 12 away wins
+        win,                           # 13 wins
+        draw,                          # 14 draws
+    ])
+    overall = _TeamWindows(p_team, p_time, n_times, columns)
+    home_venue = _TeamWindows(p_team[is_home == 1], p_time[is_home == 1], n_times, columns[is_home == 1][:, [13, 14]])
+    away_venue = _TeamWindows(p_team[is_home == 0], p_time[is_home == 0], n_times, columns[is_home == 0][:, [13, 14]])
+
+    def form_and_strength(team_codes):
+        s, count = overall.sums(team_codes, query_time_code, FORM_WINDOW)
+        any_score = s[:, 0] > 0
+        points = np.where(any_score, s[:, 1] + s[:, 2], s[:, 3])
+        form = _safe_div(points, count * 3, 0.0)
+        strength = np.where(
+            any_score,
+            _safe_div(s[:, 4], count, 0.0),
+            (_safe_div(s[:, 3], count * 3, 0.5) - 0.5) * 2,
+        )
+        return form, np.where(count > 0, strength, 0.0)
+
+    def goal_average(team_codes, has_col, goals_col, rows_col, wins_col):
+        s, count = overall.sums(team_codes, query_time_code, GOAL_WINDOW)
+        any_score = s[:, 0] > 0
+        from_scores = _safe_div(s[:, goals_col], s[:, has_col], 1.5)
+        from_results = 1.0 + _safe_div(s[:, wins_col], s[:, rows_col], 0.5)
+        return np.where(count > 0, np.where(any_score, from_scores, from_results), 1.5)
+
+    def venue_rates(windows, team_codes):
+        s, count = windows.sums(team_codes, query_time_code, VENUE_WINDOW)
+        return _safe_div(s[:, 0], count, 0.0), _safe_div(s[:, 1], count, 0.0)
+
+    # Season of the team's latest match (played or not) before the date
+    seasons = history['season']
+    has_season = np.array([value is not None for value in seasons], dtype=bool)
+    season_windows = _TeamWindows(
+        np.concatenate([hist_home_code[has_season], hist_away_code[has_season]]),
+        np.concatenate([hist_time_code[has_season]] * 2),
+        n_times,
+    )
+    sorted_seasons = np.concatenate([seasons[has_season]] * 2)[season_windows.order]
+    fallback_season = default_season()
+
+    def injuries(team_codes, raw_team_ids):
+        start, end = season_windows.bounds(team_codes, query_time_code)
+        rates = np.empty(len(team_codes))
+        for i, (lo, hi, team_id) in enumerate(zip(start, end, raw_team_ids.tolist())):
+            season = sorted_seasons[hi - 1] if hi > lo else fallback_season
+            rates[i] = injury_rates.get((team_id, season), 0.1)
+        return rates
+
+    injury_rates = load_injury_rates(team_ids)
+
+    home_form, home_strength = form_and_strength(query_home_code)
+    away_form, away_strength = form_and_strength(query_away_code)
+    home_goal_avg = goal_average(query_home_code, 5, 6, 7, 8)
+    away_goal_avg = goal_average(query_away_code, 9, 10, 11, 12)
+    home_win_rate, home_draw_rate = venue_rates(home_venue, query_home_code)
+    away_win_rate, away_draw_rate = venue_rates(away_venue, query_away_code)
+
+    return np.column_stack([
+        home_form,
+        away_form,
+        home_strength,
+        away_strength,
+        injuries(query_home_code, home_ids),
+        injuries(query_away_code, away_ids),
+        home_goal_avg,
+        away_goal_avg,
+        home_form - away_form,
+        home_strength - away_strength,
+        home_win_rate,
+        home_draw_rate,
+        away_win_rate,
+        away_draw_rate,
+        home_win_rate - away_win_rate,
+    ])
+
+
+def _compute_shard(shard):
+    home_ids, away_ids, dates = shard
+    return compute_feature_matrix(home_ids, away_ids, dates)
+
+
+def compute_feature_matrix_parallel(home_ids, away_ids, dates, workers=1):
+    """
+    compute_feature_matrix sharded across `workers` processes.
+
+    Rows are split into contiguous shards, each worker loads the history of
+    its own teams over its own DB connection, and the shards are stacked
+    back in input order. Falls back to the serial path for workers <= 1,
+    batches too small to be worth a pool, and inside a transaction, whose
+    uncommitted rows the workers could not see.
+    """
+    n = len(home_ids)
+    if workers <= 1 or n < 2 * workers or connection.in_atomic_block:
+        return compute_feature_matrix(home_ids, away_ids, dates)
+
+    home_ids, away_ids, dates = list(home_ids), list(away_ids), list(dates)
+    bounds = np.linspace(0, n, workers + 1).astype(int)
+    shards = [
+        (home_ids[start:end], away_ids[start:end], dates[start:end])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    # Spawned rather than forked, so workers never inherit (and close) the
+    # parent's database sockets; each configures Django before unpickling
+    # its shard and opens its own connection.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+        parts = list(pool.map(_compute_shard, shards))
+    return np.vstack(parts)
+
+
+def build_feature_matrix(queryset, workers=1):
+    """
+    Training arrays for a Match queryset in one pass.
+
+    Returns (X, y): X is unweighted, in FEATURE_NAMES order; y holds
+    RESULT_CODES labels. Matches without a known result are skipped.
+    Pass `workers` > 1 to compute the rows across a process pool.
+    """
+    rows = [
+        row for row in queryset.values_list('home_team_id', 'away_team_id', 'date', 'result').order_by('date', 'id')
+        if row[3] in RESULT_CODES
+    ]
+    if not rows:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0, dtype=int)
+
+    home_ids, away_ids, dates, results = zip(*rows)
+    X = compute_feature_matrix_parallel(home_ids, away_ids, dates, workers=workers)
+    y = np.array([RESULT_CODES[r] for r in results], dtype=int)
+    return X, y
@@ -0,0 +1,161 @@
+# matches/logic/feature_registry.py
+"""
+Declarative feature registry.
+
+Every model feature is registered once, with the features it is derived
+from. plan() expands the features a model wants into everything that has
+to be computed, dependencies first, so extraction only evaluates what the
+active ModelConfig actually uses. A feature is enabled unless its
+ModelConfig.weight_<name> is 0; features without a weight field count 1.0.
+
+Plugging in a feature:
+
+    register_feature(
+        'goal_avg_diff',
+        lambda inputs, values: values['home_goal_avg'] - values['away_goal_avg'],
+        depends_on=('home_goal_avg', 'away_goal_avg'),
+    )
+"""
+from collections import namedtuple
+
+from matches.logic.feature_training import (
+    calculate_form,
+    calculate_strength,
+    calculate_goal_average,
+    get_home_away_records,
+)
+from matches.logic.ratings import get_team_rating, ratings_as_of
+from matches.logic.head_to_head import head_to_head_balance, head_to_head_balances
+
+# `batch`, when set, computes the whole column for parallel sequences of
+# home ids, away ids and dates; matrix backends prefer it to per-match calls
+Feature = namedtuple('Feature', ['name', 'compute', 'depends_on', 'batch'], defaults=((), None))
+
+# What a compute function receives besides the values computed so far
+FeatureInputs = namedtuple('FeatureInputs', ['home', 'away', 'date', 'context'])
+
+# name -> Feature, in registration order (which is also dependency order)
+FEATURES = {}
+
+
+def register_feature(name, compute, depends_on=(), batch=None):
+    """
+    Register compute(inputs, values) -> float under `name`.
+
+    Dependencies must already be registered, which keeps the registry acyclic.
+    """
+    if name in FEATURES:
+        raise ValueError(f"Feature '{name}' is already registered")
+    missing = [dep for dep in depends_on if dep not in FEATURES]
+    if missing:
+        raise ValueError(f"Feature '{name}' depends on unregistered features: {missing}")
+    FEATURES[name] = Feature(name, compute, tuple(depends_on), batch)
+    return FEATURES[name]
+
+
+def unregister_feature(name):
+    dependants = [f.name for f in FEATURES.values() if name in f.depends_on]
+    if dependants:
+        raise ValueError(f"Features {dependants} depend on '{name}'")
+    FEATURES.pop(name, None)
+
+
+def plan(names):
+    """Every feature needed to produce `names`, dependencies first."""
+    needed = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name in needed:
+            continue
+        if name not in FEATURES:
+            raise KeyError(f"Unknown feature '{name}'")
+        needed.add(name)
+        stack.extend(FEATURES[name].depends_on)
+    return [name for name in FEATURES if name in needed]
+
+
+def evaluate(names, inputs):
+    """Compute `names` (and only what they need) for one home/away pairing."""
+    values = {}
+    for name in plan(names):
+        values[name] = FEATURES[name].compute(inputs, values)
+    return {name: values[name] for name in names}
+
+
+def feature_weight(config, name):
+    if config is None:
+        return 1.0
+    return float(getattr(config, f'weight_{name}', 1.0))
+
+
+def enabled_features(config=None):
+    """Registered features with a non-zero weight in `config`, in registry order."""
+    return [name for name in FEATURES if feature_weight(config, name) != 0]
+
+
+# ------------------------------
+# Built-in features
+# ------------------------------
+def _team(func, side, **kwargs):
+    def compute(inputs, values):
+        return inputs.context.get(func, getattr(inputs, side), date=inputs.date, **kwargs)
+    return compute
+
+
+def _injuries(side):
+    def compute(inputs, values):
+        return inputs.context.injuries(getattr(inputs, side), date=inputs.date)
+    return compute
+
+
+def _record(side, position):
+    # get_home_away_records is memoized, so win and draw rates share one lookup
+    def compute(inputs, values):
+        record = inputs.context.get(get_home_away_records, getattr(inputs, side), is_home=side == 'home', date=inputs.date)
+        return record[position]
+    return compute
+
+
+register_feature('home_form', _team(calculate_form, 'home'))
+register_feature('away_form', _team(calculate_form, 'away'))
+register_feature('home_strength', _team(calculate_strength, 'home'))
+register_feature('away_strength', _team(calculate_strength, 'away'))
+register_feature('home_injuries', _injuries('home'))
+register_feature('away_injuries', _injuries('away'))
+register_feature('home_goal_avg', _team(calculate_goal_average, 'home', home_only=True))
+register_feature('away_goal_avg', _team(calculate_goal_average, 'away', away_only=True))
+register_feature(
+    'form_diff',
+    lambda inputs, values: values['home_form'] - values['away_form'],
+    depends_on=('home_form', 'away_form'),
+)
+register_feature(
+    'strength_diff',
+    lambda inputs, values: values['home_strength'] - values['away_strength'],
+    depends_on=('home_strength', 'away_strength'),
+)
+register_feature('home_win_rate', _record('home', 0))
+register_feature('home_draw_rate', _record('home', 1))
+register_feature('away_win_rate', _record('away', 0))
+register_feature('away_draw_rate', _record('away', 1))
+register_feature(
+    'home_advantage',
+    lambda inputs, values: values['home_win_rate'] - values['away_win_rate'],
+    depends_on=('home_win_rate', 'away_win_rate'),
+)
+register_feature(
+    'elo_diff',
+    lambda inputs, values: (
+        inputs.context.get(get_team_rating, inputs.home, date=inputs.date)
+        - inputs.context.get(get_team_rating, inputs.away, date=inputs.date)
+    ),
+    batch=lambda home_ids, away_ids, dates: ratings_as_of(home_ids, dates) - ratings_as_of(away_ids, dates),
+)
+register_feature(
+    'h2h_balance',
+    lambda inputs, values: inputs.context.get(
+        head_to_head_balance, inputs.home, date=inputs.date, opponent_id=inputs.away.id
+    ),
+    batch=head_to_head_balances,
+)
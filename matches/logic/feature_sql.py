@@ -0,0 +1,230 @@
+# matches/logic/feature_sql.py
+"""
+SQL feature backend.
+
+Builds the training matrix inside the database: every played match is
+unioned into two "team perspective" rows (home view and away view), and the
+rolling windows used by feature_training.py (last 20 / last 10 matches,
+last 10 home or away matches) are evaluated as window functions with
+ROWS frames that stop one row before the current match. The whole matrix
+comes back in one query; only the final ratios and fallbacks are applied
+in NumPy so they stay identical to feature_matrix.py.
+
+Frames are ordered by (date, id), so "before kick-off" means "earlier in
+that order". This equals the strict `date < D` of the ORM path as long as
+a team never has two matches at the same kick-off time.
+
+The SQL is plain ANSI window syntax and runs on Postgres (production) as
+well as SQLite 3.28+.
+"""
+import numpy as np
+from django.db import connection
+
+from matches.models import Match, TeamInjurySummary
+from matches.logic.feature_matrix import (
+    FEATURE_NAMES,
+    FORM_WINDOW,
+    GOAL_WINDOW,
+    RESULT_CODES,
+    VENUE_WINDOW,
+    _safe_div,
+)
+from matches.logic.feature_training import default_season, injury_rate
+
+TRAINING_MATRIX_SQL = """
+WITH perspective AS (
+    SELECT m.id AS match_id, m.date, m.home_team_id AS team_id, 1 AS is_home,
+           m.home_score AS gf, m.away_score AS ga, m.result AS team_result
+    FROM {match_table} m
+    WHERE m.result IS NOT NULL
+    UNION ALL
+    SELECT m.id, m.date, m.away_team_id, 0,
+           m.away_score, m.home_score,
+           CASE m.result WHEN 'win' THEN 'loss' WHEN 'loss' THEN 'win' ELSE m.result END
+    FROM {match_table} m
+    WHERE m.result IS NOT NULL
+),
+flagged AS (
+    SELECT p.*,
+           CASE WHEN gf IS NOT NULL AND ga IS NOT NULL THEN 1 ELSE 0 END AS has_score,
+           CASE WHEN team_result = 'win' THEN 1 ELSE 0 END AS win,
+           CASE WHEN team_result = 'draw' THEN 1 ELSE 0 END AS draw
+    FROM perspective p
+),
+rolled AS (
+    SELECT
+        match_id, team_id, is_home,
+        ROW_NUMBER() OVER team_history - 1 AS prior_matches,
+        ROW_NUMBER() OVER venue_history - 1 AS prior_venue_matches,
+
+        -- form / strength: last {form_window} played matches
+        COALESCE(SUM(has_score) OVER (team_history ROWS BETWEEN {form_window} PRECEDING AND 1 PRECEDING), 0) AS f_scored,
+        COALESCE(SUM(CASE
+            WHEN has_score = 1 AND gf > ga THEN 3
+            WHEN has_score = 1 AND gf = ga THEN 1
+            WHEN has_score = 1 THEN 0
+            ELSE 3 * win + draw
+        END) OVER (team_history ROWS BETWEEN {form_window} PRECEDING AND 1 PRECEDING), 0) AS f_points_mixed,
+        COALESCE(SUM(3 * win + draw) OVER (team_history ROWS BETWEEN {form_window} PRECEDING AND 1 PRECEDING), 0) AS f_points_result,
+        COALESCE(SUM(CASE WHEN has_score = 1 THEN gf - ga ELSE 0 END)
+            OVER (team_history ROWS BETWEEN {form_window} PRECEDING AND 1 PRECEDING), 0) AS f_goal_diff,
+
+        -- goal average: last {goal_window} played matches, split by venue afterwards
+        COALESCE(SUM(has_score) OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_scored,
+        COALESCE(SUM(CASE WHEN is_home = 1 THEN has_score ELSE 0 END)
+            OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_home_scored,
+        COALESCE(SUM(CASE WHEN is_home = 1 AND has_score = 1 THEN gf ELSE 0 END)
+            OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_home_goals,
+        COALESCE(SUM(is_home) OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_home_rows,
+        COALESCE(SUM(is_home * win) OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_home_wins,
+        COALESCE(SUM(CASE WHEN is_home = 0 THEN has_score ELSE 0 END)
+            OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_away_scored,
+        COALESCE(SUM(CASE WHEN is_home = 0 AND has_score = 1 THEN gf ELSE 0 END)
+            OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_away_goals,
+        COALESCE(SUM(1 - is_home) OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_away_rows,
+        COALESCE(SUM((1 - is_home) * win) OVER (team_history ROWS BETWEEN {goal_window} PRECEDING AND 1 PRECEDING), 0) AS g_away_wins,
+
+        -- home/away record: last {venue_window} matches at this venue
+        COALESCE(SUM(win) OVER (venue_history ROWS BETWEEN {venue_window} PRECEDING AND 1 PRECEDING), 0) AS v_wins,
+        COALESCE(SUM(draw) OVER (venue_history ROWS BETWEEN {venue_window} PRECEDING AND 1 PRECEDING), 0) AS v_draws
+    FROM flagged
+    WINDOW
+        team_history AS (PARTITION BY team_id ORDER BY date, match_id),
+        venue_history AS (PARTITION BY team_id, is_home ORDER BY date, match_id)
+)
+SELECT
+    m.id, m.result, m.home_team_id, m.away_team_id,
+    {side_columns_home},
+    {side_columns_away},
+    hi.total_players, hi.injured_players, hi.unknown_players,
+    ai.total_players, ai.injured_players, ai.unknown_players
+FROM {match_table} m
+JOIN rolled h ON h.match_id = m.id AND h.is_home = 1
+JOIN rolled a ON a.match_id = m.id AND a.is_home = 0
+LEFT JOIN {summary_table} hi
+    ON hi.team_id = m.home_team_id
+   AND hi.season = COALESCE(({latest_season_home}), %s)
+LEFT JOIN {summary_table} ai
+    ON ai.team_id = m.away_team_id
+   AND ai.season = COALESCE(({latest_season_away}), %s)
+WHERE m.result IN ({result_placeholders}) AND m.id IN ({scope_sql})
+ORDER BY m.date, m.id
+"""
+
+# Season of the team's latest match (played or not) before kick-off, as
+# used by resolve_season; evaluated only for the selected rows
+LATEST_SEASON_SQL = """
+SELECT s.season FROM {match_table} s
+WHERE (s.home_team_id = m.{team_column} OR s.away_team_id = m.{team_column})
+  AND s.date < m.date AND s.season IS NOT NULL
+ORDER BY s.date DESC, s.id DESC
+LIMIT 1
+"""
+
+# Per-side columns selected from `rolled`, in the order _side_features reads them
+SIDE_COLUMNS = [
+    'prior_matches', 'prior_venue_matches',
+    'f_scored', 'f_points_mixed', 'f_points_result', 'f_goal_diff',
+    'g_scored', 'g_home_scored', 'g_home_goals', 'g_home_rows', 'g_home_wins',
+    'g_away_scored', 'g_away_goals', 'g_away_rows', 'g_away_wins',
+    'v_wins', 'v_draws',
+]
+
+
+def _side_features(columns, is_home):
+    """(form, strength, goal average, venue win rate, venue draw rate) for one side."""
+    c = dict(zip(SIDE_COLUMNS, columns.T))
+
+    count = np.minimum(c['prior_matches'], FORM_WINDOW)
+    any_score = c['f_scored'] > 0
+    form = _safe_div(np.where(any_score, c['f_points_mixed'], c['f_points_result']), count * 3, 0.0)
+    strength = np.where(
+        any_score,
+        _safe_div(c['f_goal_diff'], count, 0.0),
+        (_safe_div(c['f_points_result'], count * 3, 0.5) - 0.5) * 2,
+    )
+    strength = np.where(count > 0, strength, 0.0)
+
+    venue = 'home' if is_home else 'away'
+    goal_count = np.minimum(c['prior_matches'], GOAL_WINDOW)
+    goal_avg = np.where(
+        goal_count > 0,
+        np.where(
+            c['g_scored'] > 0,
+            _safe_div(c[f'g_{venue}_goals'], c[f'g_{venue}_scored'], 1.5),
+            1.0 + _safe_div(c[f'g_{venue}_wins'], c[f'g_{venue}_rows'], 0.5),
+        ),
+        1.5,
+    )
+
+    venue_count = np.minimum(c['prior_venue_matches'], VENUE_WINDOW)
+    win_rate = _safe_div(c['v_wins'], venue_count, 0.0)
+    draw_rate = _safe_div(c['v_draws'], venue_count, 0.0)
+    return form, strength, goal_avg, win_rate, draw_rate
+
+
+def _injury_rates(counts):
+    return np.array([
+        0.1 if total is None else injury_rate(total, injured, unknown)
+        for total, injured, unknown in counts
+    ])
+
+
+def build_feature_matrix_sql(queryset):
+    """
+    Window-function equivalent of build_feature_matrix: returns (X, y) for
+    a Match queryset, in (date, id) order, with one database round trip.
+    """
+    scope_sql, scope_params = queryset.values('id').query.sql_with_params()
+    match_table = Match._meta.db_table
+    sql = TRAINING_MATRIX_SQL.format(
+        match_table=match_table,
+        summary_table=TeamInjurySummary._meta.db_table,
+        form_window=FORM_WINDOW,
+        goal_window=GOAL_WINDOW,
+        venue_window=VENUE_WINDOW,
+        side_columns_home=', '.join(f'h.{name}' for name in SIDE_COLUMNS),
+        side_columns_away=', '.join(f'a.{name}' for name in SIDE_COLUMNS),
+        result_placeholders=', '.join(['%s'] * len(RESULT_CODES)),
+        scope_sql=scope_sql,
+        latest_season_home=LATEST_SEASON_SQL.format(match_table=match_table, team_column='home_team_id'),
+        latest_season_away=LATEST_SEASON_SQL.format(match_table=match_table, team_column='away_team_id'),
+    )
+    fallback_season = default_season()
+    params = [fallback_season, fallback_season, *RESULT_CODES, *scope_params]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    if not rows:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0, dtype=int)
+
+    n_side = len(SIDE_COLUMNS)
+    y = np.array([RESULT_CODES[row[1]] for row in rows], dtype=int)
+    home = np.array([row[4:4 + n_side] for row in rows], dtype=float)
+    away = np.array([row[4 + n_side:4 + 2 * n_side] for row in rows], dtype=float)
+    home_injuries = _injury_rates(row[4 + 2 * n_side:7 + 2 * n_side] for row in rows)
+    away_injuries = _injury_rates(row[7 + 2 * n_side:10 + 2 * n_side] for row in rows)
+
+    home_form, home_strength, home_goal_avg, home_win_rate, home_draw_rate = _side_features(home, is_home=True)
+    away_form, away_strength, away_goal_avg, away_win_rate, away_draw_rate = _side_features(away, is_home=False)
+
+    X = np.column_stack([
+        home_form,
+        away_form,
+        home_strength,
+        away_strength,
+        home_injuries,
+        away_injuries,
+        home_goal_avg,
+        away_goal_avg,
+        home_form - away_form,
+        home_strength - away_strength,
+        home_win_rate,
+        home_draw_rate,
+        away_win_rate,
+        away_draw_rate,
+        home_win_rate - away_win_rate,
+    ])
+    return X, y
@@ -0,0 +1,195 @@
+# matches/logic/feature_store.py
+"""
+Persistent feature store.
+
+Feature vectors are kept in MatchFeatures, keyed by (object type, object id,
+FEATURE_SCHEMA_VERSION), together with a signature of the inputs they were
+computed from. Inputs are tracked per team, not per row: one grouped query
+gives, for every team and season, its first kick-off and the count and a
+checksum of its matches (ids, scores and results), and one more reads its
+squad injury summaries. A row's signature covers both teams' totals over
+the seasons started before kick-off, so a new or corrected result only
+invalidates that team's rows from its season on, and new Player data the
+team's rows. A warm run costs those two queries and the store SELECT, with
+no history loaded in Python.
+
+Only Match rows are stored, for training. Fixtures are predicted a handful
+at a time through extract_features and are not worth a stored copy.
+"""
+import hashlib
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import accumulate
+
+import numpy as np
+from django.db.models import Case, Count, F, IntegerField, Min, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from matches.models import Match, MatchFeatures, TeamInjurySummary
+from matches.logic.feature_matrix import (
+    FEATURE_NAMES,
+    RESULT_CODES,
+    compute_feature_matrix_parallel,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a feature definition or FEATURE_NAMES changes; rows stored
+# under another version are ignored and rebuilt.
+FEATURE_SCHEMA_VERSION = 1
+
+# Per-match code folded into the monthly checksum: changes with either
+# score or the result
+MATCH_CODE = (
+    (Coalesce('home_score', -1) + 2) * 64 + Coalesce('away_score', -1) + 2
+) * 4 + Case(
+    When(result='win', then=Value(1)),
+    When(result='draw', then=Value(2)),
+    When(result='loss', then=Value(3)),
+    default=Value(0),
+    output_field=IntegerField(),
+)
+
+
+def team_watermarks(team_ids):
+    """
+    team_id -> (starts, totals): the first kick-off of each of the team's
+    seasons, in order, and the running (match count, id sum, checksum)
+    through each of them.
+    """
+    team_ids = list(set(team_ids))
+    per_side = [
+        Match.objects.filter(**{f'{side}__in': team_ids})
+        .values(team=F(side), season_key=F('season'))
+        .annotate(start=Min('date'), matches=Count('id'), ids=Sum('id'), checksum=Sum(F('id') * MATCH_CODE))
+        .values_list('team', 'season_key', 'start', 'matches', 'ids', 'checksum')
+        .order_by()
+        for side in ('home_team_id', 'away_team_id')
+    ]
+    seasons = defaultdict(dict)
+    for team_id, season, start, *totals in per_side[0].union(per_side[1], all=True):
+        if season in seasons[team_id]:
+            previous_start, previous = seasons[team_id][season]
+            start = min(start, previous_start)
+            totals = [a + b for a, b in zip(previous, totals)]
+        seasons[team_id][season] = (start, totals)
+
+    watermarks = {}
+    for team_id, by_season in seasons.items():
+        ordered = sorted(by_season.values(), key=lambda item: item[0])
+        running = accumulate(
+            (tuple(totals) for _, totals in ordered), lambda a, b: tuple(x + y for x, y in zip(a, b))
+        )
+        watermarks[team_id] = ([start for start, _ in ordered], list(running))
+    return watermarks
+
+
+def injury_watermarks(team_ids):
+    """team_id -> its squad injury summaries, as a comparable tuple."""
+    summaries = defaultdict(list)
+    for team_id, *summary in TeamInjurySummary.objects.filter(team_id__in=team_ids).values_list(
+        'team_id', 'season', 'total_players', 'injured_players', 'unknown_players'
+    ).order_by('team_id', 'season'):
+        summaries[team_id].append(tuple(summary))
+    return {team_id: tuple(rows) for team_id, rows in summaries.items()}
+
+
+def _team_state(watermarks, injuries, team_id, date):
+    """Inputs of one side as of kick-off: totals of the seasons started before it, and injuries."""
+    starts, totals = watermarks.get(team_id, ((), ()))
+    position = bisect_left(starts, date)
+    return (totals[position - 1] if position else None, injuries.get(team_id))
+
+
+def input_signature(watermarks, injuries, home_id, away_id, date):
+    """SHA-1 of the inputs of one feature row."""
+    inputs = (
+        FEATURE_SCHEMA_VERSION,
+        home_id,
+        away_id,
+        date.timestamp(),
+        _team_state(watermarks, injuries, home_id, date),
+        _team_state(watermarks, injuries, away_id, date),
+    )
+    return hashlib.sha1(repr(inputs).encode('utf-8')).hexdigest()
+
+
+def _load(queryset, extra_fields=(), workers=1):
+    rows = list(
+        queryset.values_list('id', 'home_team_id', 'away_team_id', 'date', *extra_fields).order_by('date', 'id')
+    )
+    X = np.empty((len(rows), len(FEATURE_NAMES)))
+    if not rows:
+        return rows, X
+
+    team_ids = {row[1] for row in rows} | {row[2] for row in rows}
+    watermarks = team_watermarks(team_ids)
+    injuries = injury_watermarks(team_ids)
+
+    stored = {
+        object_id: (signature, features)
+        for object_id, signature, features in MatchFeatures.objects.filter(
+            object_type='match',
+            schema_version=FEATURE_SCHEMA_VERSION,
+            object_id__in=Subquery(queryset.values('id')),
+        ).values_list('object_id', 'input_signature', 'features')
+    }
+
+    stale, signatures = [], []
+    for i, row in enumerate(rows):
+        signature = input_signature(watermarks, injuries, row[1], row[2], row[3])
+        cached = stored.get(row[0])
+        if cached and cached[0] == signature and len(cached[1]) == len(FEATURE_NAMES):
+            X[i] = cached[1]
+        else:
+            stale.append(i)
+            signatures.append(signature)
+
+    if stale:
+        stale_rows = [rows[i] for i in stale]
+        X[stale] = compute_feature_matrix_parallel(
+            [row[1] for row in stale_rows],
+            [row[2] for row in stale_rows],
+            [row[3] for row in stale_rows],
+            workers=workers,
+        )
+        MatchFeatures.objects.bulk_create(
+            [
+                MatchFeatures(
+                    object_type='match',
+                    object_id=row[0],
+                    schema_version=FEATURE_SCHEMA_VERSION,
+                    features=X[i].tolist(),
+                    input_signature=signature,
+                )
+                for i, row, signature in zip(stale, stale_rows, signatures)
+            ],
+            update_conflicts=True,
+            unique_fields=['object_type', 'object_id', 'schema_version'],
+            update_fields=['features', 'input_signature', 'computed_at'],
+            batch_size=1000,
+        )
+
+    logger.info(
+        f"Feature store: {len(rows) - len(stale)} cached, {len(stale)} recomputed"
+    )
+    return rows, X
+
+
+def load_feature_matrix(queryset, workers=1):
+    """
+    Feature matrix for a Match queryset, served from the store.
+
+    Returns (ids, X) ordered by (date, id); X is unweighted, FEATURE_NAMES order.
+    Stale rows are recomputed across `workers` processes.
+    """
+    rows, X = _load(queryset, workers=workers)
+    return [row[0] for row in rows], X
+
+
+def load_training_matrix(queryset, workers=1):
+    """Store-backed equivalent of build_feature_matrix: returns (X, y)."""
+    rows, X = _load(queryset.filter(result__in=list(RESULT_CODES)), extra_fields=('result',), workers=workers)
+    y = np.array([RESULT_CODES[row[4]] for row in rows], dtype=int)
+    return X, y
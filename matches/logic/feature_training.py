@@ -1,12 +1,16 @@
-from matches.models import Match, Player
+from matches.models import Match, TeamInjurySummary
 from django.db.models import Q
 from datetime import datetime, date, timedelta 
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_recent_matches(team, limit=20, date=None):
+def get_recent_matches(team, limit=20, date=None, index=None):
     try:
+        # Serve from a preloaded TeamHistoryIndex when one is supplied
+        if index is not None:
+            return index.recent(team.id, date=date, limit=limit)
+
         # Build query with Q objects for proper combination
         query = Q(home_team=team) | Q(away_team=team)
         # Filter for matches that have results (not scores, since data doesn't have scores)
@@ -23,13 +27,13 @@ def get_recent_matches(team, limit=20, date=None):
         logger.error(f"Error getting recent matches for {team.name if team else 'None'}: {e}")
         return Match.objects.none()
 
-def calculate_strength(team, limit=20, date=None):
+def calculate_strength(team, limit=20, date=None, index=None):
     """
     Strength = average goal difference if scores available, otherwise win/draw rate.
     Returns a value between -3 and 3 (for goal diff) or -1 to 1 (for win rate).
     """
     try:
-        matches = get_recent_matches(team, limit=limit, date=date)
+        matches = get_recent_matches(team, limit=limit, date=date, index=index)
         if not matches:
             logger.debug(f"No matches found for {team.name}, returning 0 strength")
             return 0.0
@@ -42,7 +46,7 @@ def calculate_strength(team, limit=20, date=None):
             scored = conceded = 0
             for m in matches:
                 if m.home_score is not None and m.away_score is not None:
-                    if m.home_team == team:
+                    if m.home_team_id == team.id:
                         scored += float(m.home_score)
                         conceded += float(m.away_score)
                     else:
@@ -56,7 +60,7 @@ def calculate_strength(team, limit=20, date=None):
             # Fallback to result-based calculation
             wins = draws = losses = 0
             for m in matches:
-                if m.home_team == team:
+                if m.home_team_id == team.id:
                     result = m.result
                 else:
                     # Invert result for away team
@@ -81,12 +85,12 @@ def calculate_strength(team, limit=20, date=None):
         logger.error(f"Error calculating strength for {team.name}: {e}")
         return 0.0
 
-def calculate_form(team, limit=20, decay=0.9, date=None):
+def calculate_form(team, limit=20, decay=0.9, date=None, index=None):
     """
     Form calculation using scores if available, otherwise result field
     """
     try:
-        matches = get_recent_matches(team, limit=limit, date=date)
+        matches = get_recent_matches(team, limit=limit, date=date, index=index)
         if not matches:
             logger.debug(f"No matches found for {team.name}, returning 0 form")
             return 0.0
@@ -98,7 +102,7 @@ def calculate_form(team, limit=20, decay=0.9, date=None):
         for m in matches:
             if has_scores and m.home_score is not None and m.away_score is not None:
                 # Calculate from scores
-                if m.home_team == team:
+                if m.home_team_id == team.id:
                     team_goals = float(m.home_score)
                     opp_goals = float(m.away_score)
                 else:
@@ -111,7 +115,7 @@ def calculate_form(team, limit=20, decay=0.9, date=None):
                     total_points += 1
             else:
                 # Fallback to result field
-                if m.home_team == team:
+                if m.home_team_id == team.id:
                     result = m.result
                 else:
                     # Invert result for away team
@@ -130,13 +134,13 @@ def calculate_form(team, limit=20, decay=0.9, date=None):
         logger.error(f"Error calculating form for {team.name}: {e}")
         return 0.0
 
-def calculate_goal_average(team, home_only=False, away_only=False, limit=10, date=None):
+def calculate_goal_average(team, home_only=False, away_only=False, limit=10, date=None, index=None):
     """
     Calculate average goals scored by team.
     Uses actual scores if available, otherwise estimates from win rate.
     """
     try:
-        matches = get_recent_matches(team, limit=limit, date=date)
+        matches = get_recent_matches(team, limit=limit, date=date, index=index)
         if not matches:
             return 1.5  # League average estimate
         
@@ -152,12 +156,12 @@ def calculate_goal_average(team, home_only=False, away_only=False, limit=10, dat
                 if m.home_score is None or m.away_score is None:
                     continue
                     
-                if home_only and m.home_team != team:
+                if home_only and m.home_team_id != team.id:
                     continue
-                if away_only and m.away_team != team:
+                if away_only and m.away_team_id != team.id:
                     continue
                 
-                if m.home_team == team:
+                if m.home_team_id == team.id:
                     total_goals += float(m.home_score)
                 else:
                     total_goals += float(m.away_score)
@@ -172,12 +176,12 @@ def calculate_goal_average(team, home_only=False, away_only=False, limit=10, dat
             count = 0
             
             for m in matches:
-                if home_only and m.home_team != team:
+                if home_only and m.home_team_id != team.id:
                     continue
-                if away_only and m.away_team != team:
+                if away_only and m.away_team_id != team.id:
                     continue
                 
-                if m.home_team == team:
+                if m.home_team_id == team.id:
                     result = m.result
                 else:
                     result = {'win': 'loss', 'loss': 'win', 'draw': 'draw'}.get(m.result, m.result)
@@ -197,21 +201,24 @@ def calculate_goal_average(team, home_only=False, away_only=False, limit=10, dat
         logger.error(f"Error calculating goal average for {team.name}: {e}")
         return 1.5
 
-def get_home_away_records(team, is_home=True, limit=10, date=None):
+def get_home_away_records(team, is_home=True, limit=10, date=None, index=None):
     """Get win/draw/loss record for home or away matches"""
     try:
-        # Build query with Q objects
-        if is_home:
-            query = Q(home_team=team)
+        if index is not None:
+            matches = index.recent(team.id, date=date, limit=limit, is_home=is_home)
         else:
-            query = Q(away_team=team)
-        
-        query &= Q(result__isnull=False)
-        
-        if date:
-            query &= Q(date__lt=date)
+            # Build query with Q objects
+            if is_home:
+                query = Q(home_team=team)
+            else:
+                query = Q(away_team=team)
 
-        matches = Match.objects.filter(query).order_by('-date')[:limit]
+            query &= Q(result__isnull=False)
+
+            if date:
+                query &= Q(date__lt=date)
+
+            matches = Match.objects.filter(query).order_by('-date')[:limit]
         
         if not matches:
             return 0.0, 0.0, 0.0
@@ -244,55 +251,81 @@ def get_home_away_records(team, is_home=True, limit=10, date=None):
         logger.error(f"Error getting home/away record for {team.name}: {e}")
         return 0.0, 0.0, 0.0
 
-def count_injuries(team, season=None, date=None):
+def count_injuries(team, season=None, date=None, index=None):
     """
     Simple injury counting with smart fallbacks
     """
     try:
         # Use current season from latest match if not specified
         if not season:
+            season = resolve_season(team, date=date, index=index)
+        
+        # Read the precomputed (team, season) player counts
+        summary = TeamInjurySummary.objects.filter(team=team, season=season).values_list(
+            'total_players', 'injured_players', 'unknown_players'
+        ).first()
+
+        if summary is None:
+            # No player data - use league average estimate
+            return 0.1  # 10% average injury rate
+
+        total_players, confirmed_injured, unknown_status = summary
+        return injury_rate(total_players, confirmed_injured, unknown_status)
+        
+    except Exception as e:
+        logger.error(f"Error counting injuries for {team.name}: {e}")
+        return 0.1  # Safe default
+
+def resolve_season(team, date=None, index=None):
+    """Season of the team's latest match before `date`, or the current season."""
+    try:
+        if index is not None:
+            latest_season = index.latest_season(team.id, date=date)
+        else:
+            latest_season = None
             query = Q(home_team=team) | Q(away_team=team)
             if date:
                 query &= Q(date__lt=date)
-                
+
             latest_match = Match.objects.filter(
                 query
             ).exclude(season__isnull=True).order_by('-date').first()
-            
+
             if latest_match:
-                season = latest_match.season
-            else:
-                # Fallback: use current year season format
-                current_year = datetime.now().year
-                season = f"{current_year}-{current_year + 1}"
-        
-        # Get players for this team and season
-        players = Player.objects.filter(team=team, season=season)
-        total_players = players.count()
-        
-        if total_players == 0:
-            # No player data - use league average estimate
-            return 0.1  # 10% average injury rate
-        
-        # Count confirmed injuries
-        confirmed_injured = players.filter(injured=True).count()
-        
-        # Count players with unknown status
-        unknown_status = players.filter(injured__isnull=True).count()
-        
-        if unknown_status == total_players:
-            # All unknown - use estimate
-            return 0.1
-            
-        # Calculate based on known data
-        injury_rate = confirmed_injured / (total_players - unknown_status)
-        
-        # If many unknowns, adjust slightly upward
-        if unknown_status > total_players * 0.3:  # If >30% unknown
-            injury_rate = min(injury_rate + 0.05, 0.3)  # Add 5% buffer
-            
-        return injury_rate
-        
+                latest_season = latest_match.season
+
+        if latest_season is not None:
+            return latest_season
+
     except Exception as e:
-        logger.error(f"Error counting injuries for {team.name}: {e}")
-        return 0.1  # Safe default
\ No newline at end of file
+        logger.error(f"Error resolving season for {team.name}: {e}")
+
+    # Fallback: use current year season format
+    return default_season()
+
+def default_season():
+    """Season label used when a team has no match history to infer it from."""
+    current_year = datetime.now().year
+    return f"{current_year}-{current_year + 1}"
+
+def injury_rate(total_players, confirmed_injured, unknown_status):
+    """
+    Injury rate from a squad's player counts, with the same fallbacks as
+    count_injuries. Shared so batch feature builders agree with it exactly.
+    """
+    if total_players == 0:
+        # No player data - use league average estimate
+        return 0.1  # 10% average injury rate
+
+    if unknown_status == total_players:
+        # All unknown - use estimate
+        return 0.1
+
+    # Calculate based on known data
+    rate = confirmed_injured / (total_players - unknown_status)
+
+    # If many unknowns, adjust slightly upward
+    if unknown_status > total_players * 0.3:  # If >30% unknown
+        rate = min(rate + 0.05, 0.3)  # Add 5% buffer
+
+    return rate
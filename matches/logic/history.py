@@ -0,0 +1,104 @@
+# matches/logic/history.py
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+
+from django.db.models import Q
+
+from matches.models import Match
+
+# Lightweight stand-in for a Match row. Exposes the same attribute names the
+# feature functions read (home_team_id, result, ...) so they can consume
+# either ORM objects or index rows.
+HistoryRow = namedtuple(
+    "HistoryRow",
+    ["id", "date", "home_team_id", "away_team_id", "home_score", "away_score", "result", "season"],
+)
+
+HISTORY_FIELDS = HistoryRow._fields
+
+
+class TeamHistoryIndex:
+    """
+    In-memory, per-team match history loaded with a single query.
+
+    Rows are kept in date order per team, so "last N results for team T
+    before date D" is a binary search plus a slice instead of a
+    Match.objects.filter(...) round trip.
+    """
+
+    def __init__(self, rows=()):
+        self._played = defaultdict(list)        # team_id -> rows with a result
+        self._played_dates = defaultdict(list)
+        self._venue = {True: defaultdict(list), False: defaultdict(list)}
+        self._venue_dates = {True: defaultdict(list), False: defaultdict(list)}
+        self._all = defaultdict(list)           # team_id -> every row (season lookups)
+        self._all_dates = defaultdict(list)
+        self.size = 0
+
+        for row in sorted(rows, key=lambda r: (r.date, r.id)):
+            self.add(row)
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """Build an index from any Match queryset in one query."""
+        return cls(HistoryRow(*values) for values in queryset.values_list(*HISTORY_FIELDS))
+
+    @classmethod
+    def for_teams(cls, team_ids):
+        """
+        Index every match involving the given teams.
+
+        The ORM feature functions look at a team's whole history (not only
+        the league being trained), so the index must cover the same rows.
+        """
+        team_ids = list(set(team_ids))
+        queryset = Match.objects.filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+        return cls.from_queryset(queryset)
+
+    def add(self, row):
+        """Append a row. Rows must arrive in (date, id) order."""
+        for team_id, is_home in ((row.home_team_id, True), (row.away_team_id, False)):
+            self._all[team_id].append(row)
+            self._all_dates[team_id].append(row.date)
+            if row.result is None:
+                continue
+            self._played[team_id].append(row)
+            self._played_dates[team_id].append(row.date)
+            self._venue[is_home][team_id].append(row)
+            self._venue_dates[is_home][team_id].append(row.date)
+        self.size += 1
+
+    @staticmethod
+    def _last_before(rows, dates, date, limit):
+        end = bisect_left(dates, date) if date else len(rows)
+        start = max(0, end - limit) if limit is not None else 0
+        # Most recent first, mirroring order_by('-date')
+        return rows[start:end][::-1]
+
+    def recent(self, team_id, date=None, limit=20, is_home=None):
+        """
+        Last `limit` matches with a result for a team, strictly before `date`.
+
+        is_home=True/False restricts to the team's home/away matches.
+        """
+        if is_home is None:
+            rows, dates = self._played.get(team_id, []), self._played_dates.get(team_id, [])
+        else:
+            rows = self._venue[is_home].get(team_id, [])
+            dates = self._venue_dates[is_home].get(team_id, [])
+        return self._last_before(rows, dates, date, limit)
+
+    def latest_season(self, team_id, date=None):
+        """Season of the team's latest match (with or without a result) before `date`."""
+        rows, dates = self._all.get(team_id, []), self._all_dates.get(team_id, [])
+        end = bisect_left(dates, date) if date else len(rows)
+        for position in range(end - 1, -1, -1):
+            if rows[position].season is not None:
+                return rows[position].season
+        return None
+
+    def __contains__(self, team_id):
+        return team_id in self._all
+
+    def __len__(self):
+        return self.size
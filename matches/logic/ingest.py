@@ -0,0 +1,23 @@
+# matches/logic/ingest.py
+"""Upkeep of the tables derived from Match rows, run by every match write path."""
+import logging
+
+from matches.models import HeadToHead, Match
+from matches.logic.ratings import record_results
+
+logger = logging.getLogger(__name__)
+
+
+def after_matches_written(matches):
+    """
+    Update team ratings and head-to-head records for Match rows that were
+    just created or updated. `matches` is a Match queryset or Match ids.
+
+    Returns (matches rated, pairs refreshed).
+    """
+    if not hasattr(matches, 'filter'):
+        matches = Match.objects.filter(id__in=list(matches))
+    rated = record_results(matches)
+    pairs = HeadToHead.refresh(matches=matches)
+    logger.info(f"Match ingest: {rated} matches rated, {pairs} head-to-head pairs refreshed")
+    return rated, pairs
@@ -0,0 +1,172 @@
+# matches/logic/model_registry.py
+"""
+Versioned model artifacts.
+
+Every fitted model is saved with joblib under a key built from its scope
+(league / competition / country), a hash of everything that shapes the fit
+(model type, hyperparameters, enabled features and weights, feature schema,
+scikit-learn version) and a watermark of the data it was trained on. A run
+whose key already has an artifact loads it instead of refitting; any new or
+corrected result, or new squad data, changes the watermark and forces a
+fresh fit.
+
+Artifacts are written uncompressed so joblib can memory-map their NumPy
+arrays on load. The directory defaults to matches/models and can be moved
+with settings.MODEL_REGISTRY_DIR.
+
+Random forests are also exported next to their artifact as a CompactForest
+(<key>.forest.npz); load_compact_model serves them with NumPy alone, so
+this module does not import scikit-learn unless it hashes a configuration.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import joblib
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from matches.models import Match, TeamInjurySummary
+from matches.logic.feature_store import FEATURE_SCHEMA_VERSION
+from matches.logic.compact_forest import CompactForest
+
+logger = logging.getLogger(__name__)
+
+# Artifacts kept per scope and configuration; older ones are pruned after
+# each save, leaving other configurations of the scope alone
+KEEP_PER_CONFIG = 3
+
+
+def model_dir():
+    return getattr(settings, 'MODEL_REGISTRY_DIR', os.path.join(settings.BASE_DIR, 'matches', 'models'))
+
+
+def scope_key(league_id=None, competition_id=None, country_id=None):
+    if league_id:
+        return f"L{league_id}"
+    if competition_id:
+        return f"C{competition_id}"
+    if country_id:
+        return f"CT{country_id}"
+    return "global"
+
+
+def config_hash(model_type, hyperparameters, feature_weights):
+    import sklearn
+
+    payload = {
+        'model_type': model_type,
+        'hyperparameters': hyperparameters,
+        # Ordered: the model's columns follow this order
+        'features': list(feature_weights.items()),
+        'schema': FEATURE_SCHEMA_VERSION,
+        'sklearn': sklearn.__version__,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _match_fingerprint(queryset):
+    return sorted(queryset.aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        last_date=Max('date'),
+        home_goals=Sum('home_score'),
+        away_goals=Sum('away_score'),
+        wins=Count('id', filter=Q(result='win')),
+        draws=Count('id', filter=Q(result='draw')),
+        losses=Count('id', filter=Q(result='loss')),
+    ).items())
+
+
+def history_watermark(queryset):
+    """Fingerprint of the results in a Match queryset (added, removed or corrected rows change it)."""
+    return hashlib.sha1(repr(_match_fingerprint(queryset)).encode('utf-8')).hexdigest()
+
+
+def data_watermark():
+    """
+    Fingerprint of the data features are computed from. It spans the whole
+    Match table rather than one scope, because a team's cup and league
+    matches both feed its form, ratings and head-to-head records.
+    """
+    injuries = TeamInjurySummary.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    payload = _match_fingerprint(Match.objects.all()) + sorted(injuries.items())
+    return hashlib.sha1(repr(payload).encode('utf-8')).hexdigest()
+
+
+def artifact_key(scope, model_type, hyperparameters, feature_weights):
+    return f"{scope}-{config_hash(model_type, hyperparameters, feature_weights)[:12]}-{data_watermark()[:12]}"
+
+
+def _path(key):
+    return os.path.join(model_dir(), f"{key}.joblib")
+
+
+def _compact_path(key):
+    return os.path.join(model_dir(), f"{key}.forest.npz")
+
+
+def load_model(key):
+    """The artifact dict saved under `key`, or None."""
+    path = _path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path, mmap_mode='r')
+    except Exception as e:
+        logger.error(f"Could not load model artifact {path}: {e}")
+        return None
+
+
+def load_compact_model(key):
+    """The CompactForest exported for `key`, or None (not a forest, or missing)."""
+    path = _compact_path(key)
+    if not os.path.exists(path):
+        return None
+    return CompactForest.load(path)
+
+
+def previous_model(key):
+    """
+    Newest artifact fitted with the same scope and configuration as `key`
+    but on older data, or None.
+    """
+    prefix = key.rsplit('-', 1)[0]
+    candidates = sorted(
+        (path for path in glob.glob(os.path.join(model_dir(), f"{prefix}-*.joblib")) if path != _path(key)),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in candidates:
+        artifact = load_model(os.path.basename(path)[:-len('.joblib')])
+        if artifact is not None:
+            return artifact
+    return None
+
+
+def save_model(key, model, **metadata):
+    """Save a fitted model under `key` and prune the oldest artifacts of its scope and configuration."""
+    os.makedirs(model_dir(), exist_ok=True)
+    artifact = {'key': key, 'model': model, 'saved_at': timezone.now().isoformat(), **metadata}
+    path = _path(key)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+    if getattr(model, 'estimators_', None) is not None and hasattr(model.estimators_[0], 'tree_'):
+        compact_tmp = f"{_compact_path(key)}.tmp"
+        CompactForest.from_forest(model).save(compact_tmp)
+        os.replace(compact_tmp, _compact_path(key))
+
+    # The prefix previous_model searches, so incremental updates keep their base
+    prefix = key.rsplit('-', 1)[0]
+    artifacts = sorted(glob.glob(os.path.join(model_dir(), f"{prefix}-*.joblib")), key=os.path.getmtime, reverse=True)
+    for old in artifacts[KEEP_PER_CONFIG:]:
+        os.remove(old)
+        compact = f"{old[:-len('.joblib')]}.forest.npz"
+        if os.path.exists(compact):
+            os.remove(compact)
+    return path
@@ -0,0 +1,205 @@
+# matches/logic/ratings.py
+"""
+Incremental Elo ratings.
+
+Every rated match stores one TeamRating snapshot per side holding the
+team's rating right after it, so "rating as of date D" is the latest
+snapshot before D: one indexed lookup, whatever the length of the history.
+
+Results written in date order are applied in O(1) each, on top of the
+teams' current ratings. Re-imported results that did not change are left
+alone. A result that lands before existing snapshots of its teams (a
+back-filled season, a corrected score) invalidates everything after it, so
+the ratings are replayed from that date instead.
+"""
+import math
+import logging
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from matches.models import Match, Team, TeamRating
+from matches.logic.feature_matrix import _micros
+
+logger = logging.getLogger(__name__)
+
+BASE_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0
+
+RESULT_SCORES = {'win': 1.0, 'draw': 0.5, 'loss': 0.0}
+
+RATING_FIELDS = ('id', 'date', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'result')
+
+
+def expected_score(home_rating, away_rating):
+    """Expected score of the home side (1 win, 0.5 draw, 0 loss)."""
+    return 1.0 / (1.0 + 10 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400.0))
+
+
+def goal_multiplier(home_score, away_score):
+    """World Football Elo margin factor; 1 when the score is unknown."""
+    if home_score is None or away_score is None:
+        return 1.0
+    margin = abs(home_score - away_score)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11.0 + margin) / 8.0
+
+
+def rate_match(home_rating, away_rating, result, home_score=None, away_score=None):
+    """(home, away) ratings after a match with the given result."""
+    delta = K_FACTOR * goal_multiplier(home_score, away_score) * (
+        RESULT_SCORES[result] - expected_score(home_rating, away_rating)
+    )
+    return home_rating + delta, away_rating - delta
+
+
+def current_ratings(team_ids):
+    """team_id -> latest rating, for teams that have one."""
+    latest = TeamRating.objects.filter(team=OuterRef('pk')).order_by('-date', '-match_id').values('rating')[:1]
+    return {
+        team_id: rating
+        for team_id, rating in Team.objects.filter(id__in=team_ids)
+        .annotate(rating=Subquery(latest))
+        .values_list('id', 'rating')
+        if rating is not None
+    }
+
+
+def _apply(rows, ratings):
+    """Rate `rows` in order on top of `ratings` and store the snapshots."""
+    snapshots = []
+    for match_id, date, home_id, away_id, home_score, away_score, result in rows:
+        home, away = rate_match(
+            ratings.get(home_id, BASE_RATING), ratings.get(away_id, BASE_RATING), result, home_score, away_score
+        )
+        ratings[home_id], ratings[away_id] = home, away
+        snapshots.append(TeamRating(team_id=home_id, match_id=match_id, date=date, rating=home))
+        snapshots.append(TeamRating(team_id=away_id, match_id=match_id, date=date, rating=away))
+    TeamRating.objects.bulk_create(snapshots, batch_size=1000)
+    return len(rows)
+
+
+def _rated_rows(queryset):
+    return list(
+        queryset.filter(result__in=list(RESULT_SCORES))
+        .exclude(home_team_id=F('away_team_id'))
+        .order_by('date', 'id')
+        .values_list(*RATING_FIELDS)
+    )
+
+
+def _unchanged(rows):
+    """
+    Ids of re-imported rows whose stored snapshots still follow from their
+    teams' previous ratings and the result, so rating them again is a no-op.
+    """
+    stored = {
+        (match_id, team_id): (date, rating)
+        for match_id, team_id, date, rating in TeamRating.objects.filter(
+            match_id__in=[row[0] for row in rows]
+        ).values_list('match_id', 'team_id', 'date', 'rating')
+    }
+    known = [
+        row for row in rows
+        if stored.get((row[0], row[2]), (None,))[0] == row[1] and stored.get((row[0], row[3]), (None,))[0] == row[1]
+    ]
+    if not known:
+        return set()
+
+    before = ratings_as_of(
+        [row[2] for row in known] + [row[3] for row in known],
+        [row[1] for row in known] * 2,
+    )
+    unchanged = set()
+    for (match_id, _, home_id, away_id, home_score, away_score, result), home, away in zip(
+        known, before[:len(known)], before[len(known):]
+    ):
+        expected = rate_match(home, away, result, home_score, away_score)
+        if math.isclose(expected[0], stored[(match_id, home_id)][1]) and math.isclose(
+            expected[1], stored[(match_id, away_id)][1]
+        ):
+            unchanged.add(match_id)
+    return unchanged
+
+
+def record_results(matches):
+    """
+    Update ratings for Match rows that were just written.
+
+    `matches` is a Match queryset or an iterable of Match ids. Returns the
+    number of matches rated.
+    """
+    if not hasattr(matches, 'filter'):
+        matches = Match.objects.filter(id__in=list(matches))
+    rows = _rated_rows(matches)
+    if rows:
+        unchanged = _unchanged(rows)
+        rows = [row for row in rows if row[0] not in unchanged]
+    if not rows:
+        return 0
+
+    earliest = rows[0][1]
+    ids = [row[0] for row in rows]
+    team_ids = {row[2] for row in rows} | {row[3] for row in rows}
+    if TeamRating.objects.filter(Q(date__gt=earliest) | Q(match_id__in=ids), team_id__in=team_ids).exists():
+        logger.info(f"Out-of-order results from {earliest:%Y-%m-%d}; replaying ratings")
+        return rebuild_ratings(since=earliest)
+
+    with transaction.atomic():
+        return _apply(rows, current_ratings(team_ids))
+
+
+def rebuild_ratings(since=None):
+    """Replay every result from `since` (the whole history when None)."""
+    with transaction.atomic():
+        snapshots = TeamRating.objects.all()
+        matches = Match.objects.all()
+        if since is not None:
+            snapshots = snapshots.filter(date__gte=since)
+            matches = matches.filter(date__gte=since)
+        snapshots.delete()
+
+        rows = _rated_rows(matches)
+        team_ids = {row[2] for row in rows} | {row[3] for row in rows}
+        ratings = current_ratings(team_ids) if since is not None else {}
+        return _apply(rows, ratings)
+
+
+def get_team_rating(team, date=None, index=None):
+    """Rating of `team` as of `date` (strictly before it), or the base rating."""
+    snapshots = TeamRating.objects.filter(team=team)
+    if date:
+        snapshots = snapshots.filter(date__lt=date)
+    rating = snapshots.order_by('-date', '-match_id').values_list('rating', flat=True).first()
+    return BASE_RATING if rating is None else rating
+
+
+def ratings_as_of(team_ids, dates):
+    """Vectorized get_team_rating for parallel sequences of team ids and dates."""
+    team_ids = np.asarray(team_ids, dtype=np.int64)
+    out = np.full(len(team_ids), BASE_RATING)
+    if len(team_ids) == 0:
+        return out
+
+    times = _micros(dates)
+    snapshots = {}
+    for team_id, date, rating in (
+        TeamRating.objects.filter(team_id__in=set(team_ids.tolist()))
+        .order_by('team_id', 'date', 'match_id')
+        .values_list('team_id', 'date', 'rating')
+    ):
+        snapshots.setdefault(team_id, ([], []))
+        snapshots[team_id][0].append(date)
+        snapshots[team_id][1].append(rating)
+
+    for team_id, (team_dates, team_ratings) in snapshots.items():
+        rows = np.flatnonzero(team_ids == team_id)
+        positions = np.searchsorted(_micros(team_dates), times[rows], side='left')
+        known = positions > 0
+        out[rows[known]] = np.asarray(team_ratings)[positions[known] - 1]
+    return out
@@ -0,0 +1,106 @@
+# matches/logic/serving.py
+"""
+Fixture predictions from a saved model.
+
+Everything here works with any object exposing predict_proba and
+classes_: a fitted scikit-learn estimator, or the CompactForest exported
+next to it, which load_predictor prefers. Neither this module nor the
+registry imports scikit-learn, so web and bot processes can serve
+predictions with NumPy alone.
+"""
+import numpy as np
+
+from matches.models import Prediction
+from matches.logic.feature_context import FeatureContext
+from matches.logic.model_registry import load_compact_model, load_model
+from matches.logic.predict import extract_features
+
+label_map = {0: 'win', 1: 'draw', 2: 'loss'}
+
+
+def load_predictor(key):
+    """
+    What serves predictions for the artifact `key`: its CompactForest when
+    one was exported, else the fitted model itself; None when neither exists.
+    """
+    compact = load_compact_model(key)
+    if compact is not None:
+        return compact
+    artifact = load_model(key)
+    return artifact['model'] if artifact is not None else None
+
+
+# Probability post-processing applied to every fixture prediction
+SMOOTHING = 0.01
+DRAW_BOOST = 0.03
+MAX_DRAW_PROBABILITY = 0.95
+
+PREDICTION_FIELDS = [
+    'result_pred', 'confidence', 'goal_diff', 'fair_odds_home', 'fair_odds_draw', 'fair_odds_away', 'model_version',
+]
+
+
+def adjust_probabilities(probs):
+    """Smooth each (win, draw, loss) row, then give draws a slight boost."""
+    probs = probs + SMOOTHING
+    probs = probs / probs.sum(axis=1, keepdims=True)
+    probs[:, 1] = np.minimum(probs[:, 1] + DRAW_BOOST, MAX_DRAW_PROBABILITY)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def predict_fixtures(model, fixtures, feature_names, feature_weights, model_version, context=None):
+    """
+    Predict every fixture in one pass and upsert their Prediction rows.
+
+    The weighted feature matrix is built once, predict_proba runs a single
+    time over it and all rows are written with one bulk upsert. Fixtures
+    whose features cannot be computed are skipped. Returns the number of
+    fixtures predicted.
+    """
+    if context is None:
+        context = FeatureContext()
+    # Strengths are always needed for Prediction.goal_diff
+    fixture_features = list(dict.fromkeys([*feature_names, 'home_strength', 'away_strength']))
+
+    predicted, rows, goal_diffs = [], [], []
+    for fixture in fixtures:
+        try:
+            features = extract_features(fixture, date=fixture.date, context=context, features=fixture_features)
+        except Exception:
+            continue
+        predicted.append(fixture)
+        rows.append([features[name] for name in feature_names])
+        goal_diffs.append(features['home_strength'] - features['away_strength'])
+    if not predicted:
+        return 0
+
+    X_fixtures = np.array(rows, dtype=float) * np.array([feature_weights[name] for name in feature_names])
+    # Columns follow model.classes_, which may lack an outcome the training data never had
+    probs = np.zeros((len(predicted), len(label_map)))
+    probs[:, model.classes_] = model.predict_proba(X_fixtures)
+    # Same label as model.predict, which is the argmax of the raw probabilities
+    labels = probs.argmax(axis=1)
+    probs = adjust_probabilities(probs)
+    confidences = probs.max(axis=1)
+    fair_odds = np.round(1 / probs, 2)
+
+    Prediction.objects.bulk_create(
+        [
+            Prediction(
+                fixture=fixture,
+                result_pred=label_map[int(label)],
+                confidence=float(confidence),
+                goal_diff=goal_diff,
+                fair_odds_home=float(odds[0]),
+                fair_odds_draw=float(odds[1]),
+                fair_odds_away=float(odds[2]),
+                model_version=model_version,
+            )
+            for fixture, label, confidence, goal_diff, odds in zip(predicted, labels, confidences, goal_diffs, fair_odds)
+        ],
+        update_conflicts=True,
+        unique_fields=['fixture'],
+        update_fields=PREDICTION_FIELDS,
+        batch_size=1000,
+    )
+    return len(predicted)
@@ -1,26 +1,93 @@
-from matches.models import Match, Prediction, Fixture, ModelConfig
+from matches.models import Match, Fixture, ModelConfig
 from matches.logic.predict import extract_features
+from matches.logic.history import TeamHistoryIndex
+from matches.logic.feature_context import FeatureContext
+from matches.logic.feature_matrix import FEATURE_NAMES, build_feature_matrix
+from matches.logic.feature_store import load_training_matrix
+from matches.logic.feature_sql import build_feature_matrix_sql
+from matches.logic.feature_registry import FEATURES, enabled_features, feature_weight
+from matches.logic.estimators import DEFAULT_MODEL_TYPE, MODEL_TYPES, build_estimator
+from matches.logic.serving import load_predictor, predict_fixtures
+from matches.logic.model_registry import (
+    artifact_key,
+    history_watermark,
+    load_model,
+    previous_model,
+    save_model,
+    scope_key,
+)
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.metrics import accuracy_score
-from sklearn.utils import class_weight
+from sklearn.utils.class_weight import compute_class_weight
 import numpy as np
-import pandas as pd
 from django.db.models import Q
-from datetime import datetime, date, timedelta
+from datetime import timedelta
+import time
 
-label_map = {0: 'win', 1: 'draw', 2: 'loss'}
 reverse_map = {'win': 0, 'draw': 1, 'loss': 2}
 
-def train_and_predict(league_id=None, competition_id=None, country_id=None):
-    context_str = "Global"
-    if league_id: context_str = f"League {league_id}"
-    elif competition_id: context_str = f"Competition {competition_id}"
-    elif country_id: context_str = f"Country {country_id}"
+def _team_ids(queryset):
+    """Distinct ids of every team playing in a Match/Fixture queryset."""
+    pairs = queryset.values_list('home_team_id', 'away_team_id')
+    return {team_id for pair in pairs for team_id in pair}
 
-    print(f"Starting training and prediction ({context_str})...")
+FEATURE_BACKENDS = ('numpy', 'store', 'sql', 'orm')
 
-    # 1. Fetch Model Configuration
+def _extract_training_matrix(queryset, features):
+    """Reference backend: extract_features per match, computing only `features`."""
+    matches = queryset.filter(result__in=list(reverse_map)).select_related('home_team', 'away_team').order_by('date', 'id')
+    context = FeatureContext(index=TeamHistoryIndex.for_teams(_team_ids(queryset)))
+    X = [list(extract_features(m, date=m.date, context=context, features=features).values()) for m in matches]
+    y = [reverse_map[m.result] for m in matches]
+    return np.array(X, dtype=float).reshape(len(X), len(features)), np.array(y, dtype=int)
+
+def build_training_matrix(queryset, feature_backend='numpy', workers=1, features=None):
+    """
+    Unweighted (X, y) for a Match queryset using the selected backend:
+      numpy - vectorized builder, no persistence (default)
+      store - feature store, recomputing only stale rows
+      sql   - database window functions, one query
+      orm   - per-match extract_features
+
+    Columns follow `features` (default: every registered feature). The
+    matrix backends produce the built-in FEATURE_NAMES columns in bulk;
+    other registered features use their batch loader when they have one
+    and are filled in per match otherwise.
+    """
+    features = list(FEATURES) if features is None else list(features)
+    if feature_backend == 'orm':
+        return _extract_training_matrix(queryset, features)
+
+    if feature_backend == 'store':
+        X, y = load_training_matrix(queryset, workers=workers)
+    elif feature_backend == 'numpy':
+        X, y = build_feature_matrix(queryset, workers=workers)
+    elif feature_backend == 'sql':
+        X, y = build_feature_matrix_sql(queryset)
+    else:
+        raise ValueError(f"Unknown feature backend '{feature_backend}', expected one of {FEATURE_BACKENDS}")
+
+    columns = {name: X[:, i] for i, name in enumerate(FEATURE_NAMES)}
+    batched = [name for name in features if name not in columns and FEATURES[name].batch]
+    if batched:
+        rows = queryset.filter(result__in=list(reverse_map)).order_by('date', 'id').values_list(
+            'home_team_id', 'away_team_id', 'date'
+        )
+        home_ids, away_ids, dates = zip(*rows) if rows else ((), (), ())
+        for name in batched:
+            columns[name] = np.asarray(FEATURES[name].batch(home_ids, away_ids, dates), dtype=float)
+    extra = [name for name in features if name not in columns]
+    if extra:
+        X_extra, _ = _extract_training_matrix(queryset, extra)
+        columns.update({name: X_extra[:, i] for i, name in enumerate(extra)})
+    if not features:
+        return np.empty((len(y), 0)), y
+    return np.column_stack([columns[name] for name in features]), y
+
+def scope_config(league_id=None, competition_id=None, country_id=None):
+    """Active ModelConfig of a scope, or None (defaults apply)."""
     config = None
     if league_id:
         config = ModelConfig.objects.filter(league_id=league_id, active=True).first()
@@ -28,12 +95,170 @@ def train_and_predict(league_id=None, competition_id=None, country_id=None):
         config = ModelConfig.objects.filter(competition_id=competition_id, active=True).first()
     elif country_id:
         config = ModelConfig.objects.filter(country_id=country_id, active=True).first()
+    return config
+
+def scope_matches(league_id=None, competition_id=None, country_id=None):
+    """Past matches a scope trains on."""
+    past_matches = Match.objects.exclude(result__isnull=True)
+    
+    if league_id:
+        past_matches = past_matches.filter(league_id=league_id)
+    elif competition_id:
+        past_matches = past_matches.filter(competition_id=competition_id)
+    elif country_id:
+        # Matches where at least one team is from the country
+        past_matches = past_matches.filter(
+            Q(home_team__country_link_id=country_id) | Q(away_team__country_link_id=country_id)
+        )
+    return past_matches
+
+EVALUATION_MODES = ('cv', 'holdout', 'temporal', 'none')
+CV_FOLDS = 5
+
+def _score_split(model, X, y, train, test):
+    fitted = clone(model).fit(X[train], y[train])
+    return accuracy_score(y[test], fitted.predict(X[test]))
+
+def fit_and_evaluate(X, y, hyperparameters, evaluation='cv', model_type=None):
+    """
+    Evaluate a `model_type` estimator (see matches.logic.estimators), then
+    fit the production model once on all of X.
+
+    Returns (model, accuracy, cv_score, timings). Evaluation modes:
+      cv      - one set of stratified folds; the first fold doubles as the
+                20% holdout, so no separate holdout fit (default)
+      holdout - a single stratified 80/20 split, no cv_score
+      temporal - train on the oldest 80% of rows (X is in date order) and
+                score the newest 20%, so no future result leaks into the fit;
+                see matches.logic.backtest for a full walk-forward picture
+      none    - no evaluation; accuracy and cv_score are None
+    """
+    if evaluation not in EVALUATION_MODES:
+        raise ValueError(f"Unknown evaluation '{evaluation}', expected one of {EVALUATION_MODES}")
+    model = build_estimator(model_type, hyperparameters, n_samples=len(X))
+    accuracy, cv_score, timings = None, None, {}
+
+    if evaluation == 'cv':
+        folds = StratifiedKFold(n_splits=min(CV_FOLDS, len(X)), shuffle=True, random_state=42)
+        started = time.perf_counter()
+        scores = []
+        for train, test in folds.split(X, y):
+            scores.append(_score_split(model, X, y, train, test))
+            if len(scores) == 1:
+                timings['holdout'] = round(time.perf_counter() - started, 3)
+        timings['cv'] = round(time.perf_counter() - started, 3)
+        accuracy = scores[0]
+        cv_score = float(round(np.mean(scores), 3))
+        print(f"Mean CV accuracy: {cv_score:.3f}")
+    elif evaluation == 'holdout':
+        train, test = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42, stratify=y)
+        started = time.perf_counter()
+        accuracy = _score_split(model, X, y, train, test)
+        timings['holdout'] = round(time.perf_counter() - started, 3)
+    elif evaluation == 'temporal':
+        cutoff = int(len(X) * 0.8)
+        started = time.perf_counter()
+        accuracy = _score_split(model, X, y, np.arange(cutoff), np.arange(cutoff, len(X)))
+        timings['holdout'] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    model.fit(X, y)
+    timings['fit'] = round(time.perf_counter() - started, 3)
+    return model, accuracy, cv_score, timings
+
+# Incremental updates: new results may span at most INCREMENTAL_MAX_WEEKS
+# past the previous fit; each update replaces INCREMENTAL_TREE_FRACTION of
+# the trees with ones grown on the last INCREMENTAL_WINDOW_WEEKS of results,
+# and after INCREMENTAL_MAX_UPDATES updates the forest is refit from scratch.
+# The cap keeps part of the forest grown on the full history: one update
+# fewer than it takes to replace every tree
+INCREMENTAL_MAX_WEEKS = 4
+INCREMENTAL_WINDOW_WEEKS = 12
+INCREMENTAL_TREE_FRACTION = 0.2
+INCREMENTAL_MAX_UPDATES = int(round(1 / INCREMENTAL_TREE_FRACTION)) - 1
+
+def _training_rows(queryset):
+    return queryset.filter(result__in=list(reverse_map))
+
+def incremental_update(previous, past_matches, feature_names, feature_weights, feature_backend='numpy', workers=1):
+    """
+    Update the forest of a `previous` artifact with the results played since it was fit.
+
+    The oldest trees are retired and as many warm-started trees are grown on
+    the recent window, so the forest keeps its size while tracking recent
+    form. Returns (model, accuracy, metadata), where accuracy is the previous
+    model's on the new results, or None when a full fit is needed: no usable
+    previous model, older results changed since, too long a gap, or a window
+    missing an outcome the forest predicts.
+    """
+    if previous is None or 'trained_through' not in previous:
+        return None
+    model = previous['model']
+    updates = previous.get('updates', 0)
+    trained_through = previous['trained_through']
+    if not isinstance(model, RandomForestClassifier) or updates >= INCREMENTAL_MAX_UPDATES:
+        return None
+
+    rows = _training_rows(past_matches)
+    if history_watermark(rows.filter(date__lte=trained_through)) != previous['history']:
+        print("↺  Results up to the previous fit changed; refitting from scratch")
+        return None
+    latest = rows.order_by('-date').values_list('date', flat=True).first()
+    if latest <= trained_through:
+        return None
+    if latest - trained_through > timedelta(weeks=INCREMENTAL_MAX_WEEKS):
+        print(f"↺  New results span more than {INCREMENTAL_MAX_WEEKS} weeks; refitting from scratch")
+        return None
+
+    window = rows.filter(date__gt=latest - timedelta(weeks=INCREMENTAL_WINDOW_WEEKS))
+    X_window, y_window = build_training_matrix(window, feature_backend=feature_backend, workers=workers, features=feature_names)
+    if set(np.unique(y_window)) != set(model.classes_):
+        return None
+    X_window = X_window * np.array([feature_weights[name] for name in feature_names])
+    dates = np.array(window.order_by('date', 'id').values_list('date', flat=True))
+    new = dates > trained_through
+    accuracy = accuracy_score(y_window[new], model.predict(X_window[new]))
+
+    n_trees = len(model.estimators_)
+    n_new = max(1, int(round(n_trees * INCREMENTAL_TREE_FRACTION)))
+    # A fresh seed per update, or the new trees would repeat the last update's
+    # bootstrap draws; the window's class weights are passed explicitly, as
+    # the 'balanced' preset is not meant for warm starts
+    preset = class_weight = model.class_weight
+    if class_weight == 'balanced':
+        weights = compute_class_weight('balanced', classes=model.classes_, y=y_window)
+        class_weight = dict(zip(model.classes_, weights))
+    model.set_params(
+        warm_start=True, n_estimators=n_trees + n_new, random_state=42 + updates + 1, class_weight=class_weight
+    )
+    model.fit(X_window, y_window)
+    # Retire the oldest trees so the forest keeps its size
+    model.estimators_ = model.estimators_[n_new:]
+    model.set_params(warm_start=False, n_estimators=n_trees, class_weight=preset)
+    print(f"🌱 Replaced {n_new}/{n_trees} trees using {len(y_window)} recent results ({int(new.sum())} new)")
+
+    metadata = {
+        'trained_through': latest,
+        'history': history_watermark(rows),
+        'updates': updates + 1,
+    }
+    return model, accuracy, metadata
+
+def train_and_predict(league_id=None, competition_id=None, country_id=None, feature_backend='numpy', workers=1, retrain=False, evaluation='cv', incremental=False, model_type=None):
+    context_str = "Global"
+    if league_id: context_str = f"League {league_id}"
+    elif competition_id: context_str = f"Competition {competition_id}"
+    elif country_id: context_str = f"Country {country_id}"
+
+    print(f"Starting training and prediction ({context_str})...")
+
+    # 1. Fetch Model Configuration
+    config = scope_config(league_id, competition_id, country_id)
     
     # Fallback to global config if no specific config found (optional, or just use defaults)
     # For now, we'll use defaults if no config found.
     
     hyperparameters = {}
-    feature_weights = {}
     
     if config:
         print(f"⚙️  Loaded ModelConfig: {config}")
@@ -44,40 +269,25 @@ def train_and_predict(league_id=None, competition_id=None, country_id=None):
             'max_depth': config.max_depth,
             'min_samples_split': config.min_samples_split,
         }
-        
-        feature_weights = {
-            'home_form': config.weight_home_form,
-            'away_form': config.weight_away_form,
-            'home_strength': config.weight_home_strength,
-            'away_strength': config.weight_away_strength,
-            'home_injuries': config.weight_home_injuries,
-            'away_injuries': config.weight_away_injuries,
-            'home_goal_avg': config.weight_home_goal_avg,
-            'away_goal_avg': config.weight_away_goal_avg,
-            'form_diff': config.weight_form_diff,
-            'strength_diff': config.weight_strength_diff,
-            'home_win_rate': config.weight_home_win_rate,
-            'home_draw_rate': config.weight_home_draw_rate,
-            'away_win_rate': config.weight_away_win_rate,
-            'away_draw_rate': config.weight_away_draw_rate,
-            'home_advantage': config.weight_home_advantage,
-        }
 
         print(f"   Hyperparameters: {hyperparameters}")
-        print(f"   Feature Weights: {feature_weights}")
+
+    # An explicit model_type overrides the config's
+    model_type = model_type or (config.model_type if config else DEFAULT_MODEL_TYPE)
+    if model_type not in MODEL_TYPES:
+        print(f"❌ Unknown model type '{model_type}'")
+        return {"status": "fail", "reason": f"Unknown model type '{model_type}'"}
+
+    # Only features with a non-zero weight are computed and fed to the model
+    feature_names = enabled_features(config)
+    feature_weights = {name: feature_weight(config, name) for name in feature_names}
+    print(f"   Feature Weights: {feature_weights}")
+    if not feature_names:
+        print("❌ Every feature has a zero weight")
+        return {"status": "fail", "reason": "No features enabled"}
 
     # 2. Filter Past Matches
-    past_matches = Match.objects.exclude(result__isnull=True)
-    
-    if league_id:
-        past_matches = past_matches.filter(league_id=league_id)
-    elif competition_id:
-        past_matches = past_matches.filter(competition_id=competition_id)
-    elif country_id:
-        # Matches where at least one team is from the country
-        past_matches = past_matches.filter(
-            Q(home_team__country_link_id=country_id) | Q(away_team__country_link_id=country_id)
-        )
+    past_matches = scope_matches(league_id, competition_id, country_id)
 
     print(f"📊 Total past matches available for {context_str}: {past_matches.count()}")
     
@@ -85,81 +295,71 @@ def train_and_predict(league_id=None, competition_id=None, country_id=None):
         print(f"⚠️  Insufficient data ({past_matches.count()} samples). Need at least 20 matches.")
         return {"status": "fail", "reason": "Insufficient training data"}
 
-    X, y = [], []
-
-    for match in past_matches:
-        try:
-            features = extract_features(match, date=match.date)
-            
-            # Apply feature weights
-            row = [
-                features['home_form'] * feature_weights.get('home_form', 1.0),
-                features['away_form'] * feature_weights.get('away_form', 1.0),
-                features['home_strength'] * feature_weights.get('home_strength', 1.0),
-                features['away_strength'] * feature_weights.get('away_strength', 1.0),
-                features['home_injuries'] * feature_weights.get('home_injuries', 1.0),
-                features['away_injuries'] * feature_weights.get('away_injuries', 1.0),
-                features['home_goal_avg'] * feature_weights.get('home_goal_avg', 1.0),
-                features['away_goal_avg'] * feature_weights.get('away_goal_avg', 1.0),
-                features['form_diff'] * feature_weights.get('form_diff', 1.0),
-                features['strength_diff'] * feature_weights.get('strength_diff', 1.0),
-                features['home_win_rate'] * feature_weights.get('home_win_rate', 1.0),
-                features['home_draw_rate'] * feature_weights.get('home_draw_rate', 1.0),
-                features['away_win_rate'] * feature_weights.get('away_win_rate', 1.0),
-                features['away_draw_rate'] * feature_weights.get('away_draw_rate', 1.0),
-                features['home_advantage'] * feature_weights.get('home_advantage', 1.0)
-            ]
-            
-            X.append(row)
-            y.append(reverse_map[match.result])
-        except Exception as e:
-            # print(f"⚠️  Error processing match {match.id}: {e}")
-            continue
-
-    if not X:
-        print("❌ No training data available after processing")
-        return {"status": "fail", "reason": "No valid training data"}
-
-    # Convert to numpy arrays
-    X_arr = np.array(X)
-    y_arr = np.array(y)
-
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_arr, y_arr, test_size=0.2, random_state=42, stratify=y_arr
+    # Reuse the fitted model when neither the configuration nor the data
+    # changed since it was saved; retrain=True always refits
+    model_key = artifact_key(
+        scope_key(league_id, competition_id, country_id),
+        model_type,
+        hyperparameters,
+        feature_weights,
     )
+    artifact = None if retrain else load_model(model_key)
 
-    # Calculate class weights for imbalance
-    class_weights = class_weight.compute_class_weight(
-        'balanced', classes=np.unique(y_train), y=y_train
-    )
-    class_weight_dict = dict(zip(np.unique(y_train), class_weights))
-
-    # Initialize model with hyperparameters
-    n_estimators = int(hyperparameters.get('n_estimators', 100))
-    max_depth = hyperparameters.get('max_depth', 10)
-    if max_depth is not None: max_depth = int(max_depth)
-    min_samples_split = int(hyperparameters.get('min_samples_split', 5))
-
-    model = RandomForestClassifier(
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        min_samples_split=min_samples_split,
-        random_state=42,
-        class_weight=class_weight_dict
-    )
+    timings = {}
+    update = None
+    if artifact is None and incremental and not retrain:
+        # Only a few new results: update the previous forest instead of refitting
+        started = time.perf_counter()
+        update = incremental_update(
+            previous_model(model_key), past_matches, feature_names, feature_weights,
+            feature_backend=feature_backend, workers=workers,
+        )
+        timings = {'incremental': round(time.perf_counter() - started, 3)}
 
-    # Cross-validation check
-    cv_scores = cross_val_score(model, X_arr, y_arr, cv=min(5, len(X_arr)))
-    print(f"Mean CV accuracy: {cv_scores.mean():.3f}")
+    if artifact is not None:
+        model = artifact['model']
+        accuracy = artifact['accuracy']
+        cv_score = artifact['cv_score']
+        print(f"♻️  Loaded cached model {model_key}")
+    elif update is not None:
+        model, accuracy, training = update
+        cv_score = None
+        print(f"✅ Incremental update complete. Accuracy on new results: {accuracy:.4f}")
 
-    # Train the model
-    model.fit(X_train, y_train)
-    
-    # Test accuracy
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f"✅ Training complete. Test accuracy: {accuracy:.4f}")
+        save_model(model_key, model, feature_names=feature_names, accuracy=accuracy, cv_score=cv_score, evaluation='incremental', **training)
+        print(f"💾 Saved model {model_key}")
+    else:
+        # Build the whole training matrix in one pass; the default feature
+        # store only recomputes rows whose inputs changed since the last run;
+        # with workers > 1 those rows are sharded across a process pool
+        print(f"🧮 Building training matrix (backend: {feature_backend})")
+        X_arr, y_arr = build_training_matrix(past_matches, feature_backend=feature_backend, workers=workers, features=feature_names)
+
+        if len(X_arr) == 0:
+            print("❌ No training data available after processing")
+            return {"status": "fail", "reason": "No valid training data"}
+
+        # Apply feature weights
+        weights = np.array([feature_weights[name] for name in feature_names])
+        X_arr = X_arr * weights
+
+        model, accuracy, cv_score, timings = fit_and_evaluate(
+            X_arr, y_arr, hyperparameters, evaluation=evaluation, model_type=model_type
+        )
+        if accuracy is None:
+            print("✅ Training complete (not evaluated)")
+        else:
+            print(f"✅ Training complete. Test accuracy: {accuracy:.4f}")
+        print(f"   Timings: {timings}")
+
+        training_rows = _training_rows(past_matches)
+        training = {
+            'trained_through': training_rows.order_by('-date').values_list('date', flat=True).first(),
+            'history': history_watermark(training_rows),
+            'updates': 0,
+        }
+        save_model(model_key, model, feature_names=feature_names, accuracy=accuracy, cv_score=cv_score, evaluation=evaluation, **training)
+        print(f"💾 Saved model {model_key}")
 
     # PREDICT FOR UPCOMING FIXTURES
     upcoming_fixtures = Fixture.objects.filter(status__icontains="Not Started")
@@ -173,76 +373,37 @@ def train_and_predict(league_id=None, competition_id=None, country_id=None):
             Q(home_team__country_link_id=country_id) | Q(away_team__country_link_id=country_id)
         )
 
-    matches_predicted = 0
     print(f"🎯 Predicting for {upcoming_fixtures.count()} upcoming fixtures ({context_str})...")
 
-    for fixture in upcoming_fixtures:
-        try:
-            features = extract_features(fixture, date=fixture.date)
-            X_fixture = [[
-                features['home_form'] * feature_weights.get('home_form', 1.0),
-                features['away_form'] * feature_weights.get('away_form', 1.0),
-                features['home_strength'] * feature_weights.get('home_strength', 1.0),
-                features['away_strength'] * feature_weights.get('away_strength', 1.0),
-                features['home_injuries'] * feature_weights.get('home_injuries', 1.0),
-                features['away_injuries'] * feature_weights.get('away_injuries', 1.0),
-                features['home_goal_avg'] * feature_weights.get('home_goal_avg', 1.0),
-                features['away_goal_avg'] * feature_weights.get('away_goal_avg', 1.0),
-                features['form_diff'] * feature_weights.get('form_diff', 1.0),
-                features['strength_diff'] * feature_weights.get('strength_diff', 1.0),
-                features['home_win_rate'] * feature_weights.get('home_win_rate', 1.0),
-                features['home_draw_rate'] * feature_weights.get('home_draw_rate', 1.0),
-                features['away_win_rate'] * feature_weights.get('away_win_rate', 1.0),
-                features['away_draw_rate'] * feature_weights.get('away_draw_rate', 1.0),
-                features['home_advantage'] * feature_weights.get('home_advantage', 1.0)
-            ]]
-
-            pred = model.predict(X_fixture)[0]
-            probs = model.predict_proba(X_fixture)[0]
-
-            # Apply smoothing
-            smoothing = 0.01
-            probs = probs + smoothing
-            probs = probs / probs.sum()
-
-            # Slight draw boost
-            draw_boost = 0.03
-            probs[1] = min(probs[1] + draw_boost, 0.95)
-            probs = probs / probs.sum()
-
-            # Get confidence and predicted result
-            confidence = float(max(probs))
-            predicted_result = label_map[pred]
-            
-            model_version = "v1"
-            if league_id: model_version = f"v1-L{league_id}"
-            elif competition_id: model_version = f"v1-C{competition_id}"
-            elif country_id: model_version = f"v1-CT{country_id}"
-
-            # Save prediction
-            Prediction.objects.update_or_create(
-                fixture=fixture,
-                defaults={
-                    'result_pred': predicted_result,
-                    'confidence': confidence,
-                    'goal_diff': features['home_strength'] - features['away_strength'],
-                    'fair_odds_home': round(1 / probs[0], 2),
-                    'fair_odds_draw': round(1 / probs[1], 2),
-                    'fair_odds_away': round(1 / probs[2], 2),
-                    'model_version': model_version
-                }
-            )
-            matches_predicted += 1
-
-        except Exception as e:
-            # print(f"⚠️  Error predicting fixture {fixture.id}: {e}")
-            continue
+    # One context for the whole pass: teams with several fixtures reuse
+    # their memoized form/strength/injury results
+    feature_context = FeatureContext(index=TeamHistoryIndex.for_teams(_team_ids(upcoming_fixtures)))
+
+    model_version = "v1"
+    if league_id: model_version = f"v1-L{league_id}"
+    elif competition_id: model_version = f"v1-C{competition_id}"
+    elif country_id: model_version = f"v1-CT{country_id}"
+
+    # Serve from the exported arrays when the model is a forest
+    matches_predicted = predict_fixtures(
+        load_predictor(model_key) or model,
+        upcoming_fixtures.select_related('home_team', 'away_team'),
+        feature_names,
+        feature_weights,
+        model_version,
+        context=feature_context,
+    )
 
     print(f"🏁 Prediction completed. Matches predicted: {matches_predicted}")
+    print(f"   Feature cache: {feature_context.stats}")
 
     return {
         "status": "success",
-        "accuracy": round(accuracy, 4),
+        "accuracy": round(accuracy, 4) if accuracy is not None else None,
         "matches_predicted": matches_predicted,
-        "cv_score": round(cv_scores.mean(), 3)
+        "cv_score": cv_score,
+        "model_key": model_key,
+        "model_cached": artifact is not None,
+        "incremental": update is not None,
+        "timings": timings,
     }
\ No newline at end of file
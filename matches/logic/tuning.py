@@ -0,0 +1,113 @@
+# matches/logic/tuning.py
+"""
+Hyperparameter search for a scope.
+
+The weighted training matrix is built once (with the chosen feature
+backend) and dumped to a temporary file that every search worker
+memory-maps, so trials neither re-extract features nor copy the matrix per
+process. A successive-halving search then spends most of its budget on the
+promising candidates, and the winner is written back to the scope's
+ModelConfig.
+"""
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold
+
+from matches.models import ModelConfig
+from matches.logic.estimators import DEFAULT_MODEL_TYPE, ConfiguredClassifier
+from matches.logic.feature_registry import enabled_features, feature_weight
+from matches.logic.train_and_predict import CV_FOLDS, build_training_matrix, scope_config, scope_matches
+
+# ModelConfig hyperparameters and the values the search samples from
+SEARCH_SPACE = {
+    'n_estimators': [50, 100, 200, 300, 500],
+    'max_depth': [None, 4, 6, 8, 10, 12, 16],
+    'min_samples_split': [2, 5, 10, 20, 40],
+}
+
+
+def tune_scope(
+    league_id=None,
+    competition_id=None,
+    country_id=None,
+    n_candidates=30,
+    factor=3,
+    n_jobs=-1,
+    feature_backend='numpy',
+    workers=1,
+    search_space=None,
+    save=True,
+):
+    """
+    Search SEARCH_SPACE for the scope and, with save=True, store the best
+    hyperparameters in its active ModelConfig (created when it has none).
+    """
+    if not (league_id or competition_id or country_id):
+        raise ValueError("Tuning needs a league, competition or country scope")
+
+    config = scope_config(league_id, competition_id, country_id)
+    model_type = config.model_type if config else DEFAULT_MODEL_TYPE
+    feature_names = enabled_features(config)
+    weights = np.array([feature_weight(config, name) for name in feature_names])
+
+    started = time.perf_counter()
+    X, y = build_training_matrix(
+        scope_matches(league_id, competition_id, country_id),
+        feature_backend=feature_backend,
+        workers=workers,
+        features=feature_names,
+    )
+    if len(X) < 20:
+        raise ValueError(f"Insufficient data ({len(X)} samples). Need at least 20 matches.")
+    X = X * weights
+    matrix_time = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'training.joblib')
+        joblib.dump((X, y), path)
+        X, y = joblib.load(path, mmap_mode='r')
+
+        search = HalvingRandomSearchCV(
+            # Parallel candidates, single-threaded estimators
+            ConfiguredClassifier(model_type=model_type, n_jobs=1 if n_jobs != 1 else None),
+            search_space or SEARCH_SPACE,
+            n_candidates=n_candidates,
+            factor=factor,
+            cv=StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=42),
+            scoring='accuracy',
+            refit=False,
+            random_state=42,
+            n_jobs=n_jobs,
+        )
+        started = time.perf_counter()
+        search.fit(X, y)
+        search_time = time.perf_counter() - started
+
+    best = {name: search.best_params_[name] for name in SEARCH_SPACE if name in search.best_params_}
+    if save:
+        if config is None:
+            if league_id:
+                config = ModelConfig(league_id=league_id)
+            elif competition_id:
+                config = ModelConfig(competition_id=competition_id)
+            else:
+                config = ModelConfig(country_id=country_id)
+        for name, value in best.items():
+            setattr(config, name, value)
+        config.save()
+
+    return {
+        "model_type": model_type,
+        "best_params": best,
+        "best_score": round(float(search.best_score_), 4),
+        "candidates": len(search.cv_results_['params']),
+        "iterations": int(search.n_iterations_),
+        "samples": len(y),
+        "config_id": config.id if save else None,
+        "timings": {"matrix": round(matrix_time, 3), "search": round(search_time, 3)},
+    }
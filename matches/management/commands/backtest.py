@@ -0,0 +1,64 @@
+import json
+from django.core.management.base import BaseCommand
+from matches.logic.backtest import backtest_scope
+from matches.logic.estimators import MODEL_TYPES
+from matches.logic.train_and_predict import FEATURE_BACKENDS
+
+class Command(BaseCommand):
+    help = "Walk-forward backtest of a scope's model: train on the past, predict the next week, roll forward."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, help='League ID to backtest')
+        parser.add_argument('--competition', type=int, help='Competition ID to backtest')
+        parser.add_argument('--country', type=int, help='Country ID to backtest')
+        parser.add_argument('--step-weeks', type=int, default=1, help='Weeks predicted per step (default: 1)')
+        parser.add_argument('--min-train', type=int, default=100, help='Matches required before the first step')
+        parser.add_argument(
+            '--model-type',
+            choices=MODEL_TYPES,
+            help="Estimator to backtest, overriding the scope's ModelConfig.model_type"
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to build the feature matrix')
+        parser.add_argument(
+            '--feature-backend',
+            choices=FEATURE_BACKENDS,
+            default='numpy',
+            help='How the feature matrix is computed (default: numpy)'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        result = backtest_scope(
+            league_id=options.get('league'),
+            competition_id=options.get('competition'),
+            country_id=options.get('country'),
+            step_weeks=options.get('step_weeks') or 1,
+            min_train=options.get('min_train'),
+            model_type=options.get('model_type'),
+            feature_backend=options.get('feature_backend') or 'numpy',
+            workers=options.get('workers') or 1,
+        )
+
+        if options.get('json'):
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        if not result['overall']['matches']:
+            self.stdout.write(self.style.ERROR(
+                f"❌ Not enough history: {result['matches']} matches, need more than {options.get('min_train')}"
+            ))
+            return
+
+        self.stdout.write(f"{'Season':<12}{'Matches':>8}{'Accuracy':>10}{'Log loss':>10}{'Brier':>8}{'ROI':>8}")
+        for season, scores in [*result['seasons'].items(), ("Overall", result['overall'])]:
+            self.stdout.write(
+                f"{season:<12}{scores['matches']:>8}{scores['accuracy']:>10.4f}"
+                f"{scores['log_loss']:>10.4f}{scores['brier']:>8.4f}{scores['roi']:>8.4f}"
+            )
+        if result['excluded_features']:
+            self.stdout.write(self.style.NOTICE(
+                f"ℹ️  Left out (no as-of-date history): {', '.join(result['excluded_features'])}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['fits']} walk-forward fits ({result['model_type']}), timings: {result['timings']}"
+        ))
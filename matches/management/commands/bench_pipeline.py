@@ -0,0 +1,51 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from matches.logic.benchmark import benchmark_database_allowed, benchmark_environment, run_benchmark
+from matches.logic.train_and_predict import FEATURE_BACKENDS
+
+class Command(BaseCommand):
+    help = "Benchmark the prediction pipeline on synthetic data (rolled back afterwards) and print JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--matches',
+            default='10000',
+            help='Comma-separated dataset sizes, e.g. 10000,100000,1000000'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data')
+        parser.add_argument(
+            '--feature-backend',
+            choices=FEATURE_BACKENDS,
+            default='numpy',
+            help='How the training matrix is computed (default: numpy)'
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['matches'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--matches takes comma-separated integers")
+        if not sizes or min(sizes) < 1:
+            raise CommandError("--matches needs at least one positive size")
+
+        if not benchmark_database_allowed():
+            raise CommandError(
+                "Refusing to benchmark against a production database: run with DJANGO_DEBUG=true "
+                "or point the default database at a local or test_ database"
+            )
+
+        report = {'environment': benchmark_environment(), 'runs': []}
+        for size in sizes:
+            self.stderr.write(f"⏱️  Benchmarking {size} matches...")
+            report['runs'].append(
+                run_benchmark(size, seed=options['seed'], feature_backend=options['feature_backend'])
+            )
+
+        output = json.dumps(report, indent=2)
+        if options.get('output'):
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"✅ Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
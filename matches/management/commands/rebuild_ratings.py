@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from matches.logic.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Replay Elo team ratings from match results (all history, or from --since)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=str, help='Only replay matches on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options.get('since'):
+            since = parse_date(options['since'])
+            if since is None:
+                self.stderr.write(self.style.ERROR(f"❌ Invalid date: {options['since']}"))
+                return
+
+        self.stdout.write(self.style.NOTICE("📈 Rebuilding team ratings..."))
+        rated = rebuild_ratings(since=since)
+        self.stdout.write(self.style.SUCCESS(f"✅ Rated {rated} matches"))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from matches.models import Match, Team
+from matches.logic.ingest import after_matches_written
 from matches.api_client import get_past_fixtures
 from django.utils.dateparse import parse_datetime
 from datetime import datetime
@@ -14,6 +15,7 @@ class Command(BaseCommand):
         season = 2025
         league_name = "Premier League"
         past_fixtures = get_past_fixtures(league_id=league_id, season=season, count=50)
+        synced_match_ids = []
 
         for item in past_fixtures['response']:
             try:
@@ -90,6 +92,8 @@ class Command(BaseCommand):
                     }
                 )
 
+                synced_match_ids.append(match.id)
+
                 if created:
                     self.stdout.write(f"✅ Added match {home_team} vs {away_team} ({home_goals}-{away_goals})")
                 else:
@@ -100,4 +104,7 @@ class Command(BaseCommand):
                 continue
             except Exception as e:
                 self.stderr.write(f"❌ Unexpected error for fixture {fixture_id}: {e}")
-                continue
\ No newline at end of file
+                continue
+
+        rated, pairs = after_matches_written(synced_match_ids)
+        self.stdout.write(f"📈 Updated ratings for {rated} matches and {pairs} head-to-head records")
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from matches.models import Player, Team
+from matches.models import Player, Team, TeamInjurySummary
 from matches.api_client import get_players_by_team
 
 
@@ -7,6 +7,7 @@ class Command(BaseCommand):
     help = "Sync players for all teams"
 
     def handle(self, *args, **kwargs):
+        synced_team_ids = []
         for team in Team.objects.all():
             self.stdout.write(f"\n🔄 Syncing players for team: {team.name} (ID: {team.api_id})")
             try:
@@ -28,7 +29,12 @@ class Command(BaseCommand):
                         }
                     )
 
+                synced_team_ids.append(team.id)
                 self.stdout.write(f"✅ {len(players)} players synced for {team.name}")
 
             except Exception as e:
-                self.stderr.write(f"❌ Error syncing team {team.name}: {e}")
\ No newline at end of file
+                self.stderr.write(f"❌ Error syncing team {team.name}: {e}")
+
+        if synced_team_ids:
+            summaries = TeamInjurySummary.refresh(team_ids=synced_team_ids)
+            self.stdout.write(f"🩹 Refreshed {summaries} team injury summaries")
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
-from matches.logic.train_and_predict import train_and_predict
+from matches.logic.estimators import MODEL_TYPES
+from matches.logic.train_and_predict import EVALUATION_MODES, FEATURE_BACKENDS, train_and_predict
+from matches.tasks import train_all_scopes
 
 class Command(BaseCommand):
     help = "Train the match prediction model and generate predictions for upcoming matches."
@@ -8,18 +10,71 @@ class Command(BaseCommand):
         parser.add_argument('--league', type=int, help='League ID to train for')
         parser.add_argument('--competition', type=int, help='Competition ID to train for')
         parser.add_argument('--country', type=int, help='Country ID to train for')
+        parser.add_argument(
+            '--all-scopes',
+            action='store_true',
+            help='Queue a Celery retrain of every scope with an active ModelConfig'
+        )
+        parser.add_argument('--concurrency', type=int, default=4, help='Scopes trained in parallel with --all-scopes')
+        parser.add_argument('--retrain', action='store_true', help='Refit even if a cached model matches')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to build the feature matrix')
+        parser.add_argument(
+            '--feature-backend',
+            choices=FEATURE_BACKENDS,
+            help='How the training matrix is computed (default: numpy, or store with --all-scopes)'
+        )
+        parser.add_argument(
+            '--evaluation',
+            choices=EVALUATION_MODES,
+            default='cv',
+            help='How the model is scored before the final fit on all data (default: cv)'
+        )
+        parser.add_argument(
+            '--model-type',
+            choices=MODEL_TYPES,
+            help="Estimator to train, overriding the scope's ModelConfig.model_type (single scope only)"
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Update the previous forest with recent results instead of refitting when possible'
+        )
 
     def handle(self, *args, **options):
         league_id = options.get('league')
         competition_id = options.get('competition')
         country_id = options.get('country')
+        workers = options.get('workers') or 1
+        feature_backend = options.get('feature_backend')
+        retrain = options.get('retrain', False)
+        evaluation = options.get('evaluation') or 'cv'
+        incremental = options.get('incremental', False)
+        model_type = options.get('model_type')
+
+        if options.get('all_scopes'):
+            task = train_all_scopes.delay(
+                concurrency=options.get('concurrency') or 4,
+                feature_backend=feature_backend or 'store',
+                retrain=retrain,
+                workers=workers,
+                evaluation=evaluation,
+                incremental=incremental
+            )
+            self.stdout.write(self.style.SUCCESS(f"✅ Queued training of every active scope (task {task.id})"))
+            return
 
         self.stdout.write(self.style.NOTICE("Starting training and prediction..."))
 
         result = train_and_predict(
             league_id=league_id,
             competition_id=competition_id,
-            country_id=country_id
+            country_id=country_id,
+            workers=workers,
+            feature_backend=feature_backend or 'numpy',
+            retrain=retrain,
+            evaluation=evaluation,
+            incremental=incremental,
+            model_type=model_type
         )
 
         if result.get("status") == "success":
@@ -28,6 +83,7 @@ class Command(BaseCommand):
                     f"✅ Training complete.\n"
                     f"Accuracy: {result['accuracy']}\n"
                     f"CV Score: {result.get('cv_score', 'N/A')}\n"
+                    f"Timings: {result.get('timings')}\n"
                     f"Matches predicted: {result['matches_predicted']}"
                 )
             )
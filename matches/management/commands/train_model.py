@@ -1,15 +1,6 @@
-import os
-import joblib
-import numpy as np
 from django.core.management.base import BaseCommand
-from matches.models import Match, Prediction, Fixture, ModelConfig
-from matches.logic.predict import extract_features
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score
-from sklearn.utils import class_weight
-
-MODEL_PATH = os.path.join('matches', 'models', 'ml_model.pkl')
+from matches.logic.estimators import MODEL_TYPES
+from matches.logic.train_and_predict import EVALUATION_MODES, FEATURE_BACKENDS
 
 class Command(BaseCommand):
     help = 'Train or load model and predict upcoming matches'
@@ -29,6 +20,29 @@ class Command(BaseCommand):
         parser.add_argument('--league', type=int, help='League ID to train for')
         parser.add_argument('--competition', type=int, help='Competition ID to train for')
         parser.add_argument('--country', type=int, help='Country ID to train for')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to build the feature matrix')
+        parser.add_argument(
+            '--feature-backend',
+            choices=FEATURE_BACKENDS,
+            default='numpy',
+            help='How the training matrix is computed (default: numpy)'
+        )
+        parser.add_argument(
+            '--evaluation',
+            choices=EVALUATION_MODES,
+            default='cv',
+            help='How the model is scored before the final fit on all data (default: cv)'
+        )
+        parser.add_argument(
+            '--model-type',
+            choices=MODEL_TYPES,
+            help="Estimator to train, overriding the scope's ModelConfig.model_type"
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Update the previous forest with recent results instead of refitting when possible'
+        )
 
     def handle(self, *args, **kwargs):
         from matches.logic.train_and_predict import train_and_predict
@@ -36,6 +50,12 @@ class Command(BaseCommand):
         league_id = kwargs.get('league')
         competition_id = kwargs.get('competition')
         country_id = kwargs.get('country')
+        workers = kwargs.get('workers') or 1
+        feature_backend = kwargs.get('feature_backend') or 'numpy'
+        retrain = kwargs.get('retrain', False)
+        evaluation = kwargs.get('evaluation') or 'cv'
+        incremental = kwargs.get('incremental', False)
+        model_type = kwargs.get('model_type')
         
         self.stdout.write(self.style.NOTICE(f"🚀 Starting training process..."))
         if league_id: self.stdout.write(f"   Scope: League {league_id}")
@@ -46,7 +66,13 @@ class Command(BaseCommand):
             result = train_and_predict(
                 league_id=league_id, 
                 competition_id=competition_id, 
-                country_id=country_id
+                country_id=country_id,
+                workers=workers,
+                feature_backend=feature_backend,
+                retrain=retrain,
+                evaluation=evaluation,
+                incremental=incremental,
+                model_type=model_type
             )
             
             if result.get("status") == "success":
@@ -54,7 +80,9 @@ class Command(BaseCommand):
                     f"✅ Success!\n"
                     f"   Matches Predicted: {result['matches_predicted']}\n"
                     f"   Accuracy: {result['accuracy']}\n"
-                    f"   CV Score: {result.get('cv_score', 'N/A')}"
+                    f"   CV Score: {result.get('cv_score', 'N/A')}\n"
+                    f"   Model: {result.get('model_key')} "
+                    f"({'loaded from registry' if result.get('model_cached') else 'freshly trained'})"
                 ))
             else:
                 self.stdout.write(self.style.ERROR(f"❌ Failed: {result.get('reason')}"))
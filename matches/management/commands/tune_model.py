@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from matches.logic.train_and_predict import FEATURE_BACKENDS
+from matches.logic.tuning import tune_scope
+
+class Command(BaseCommand):
+    help = "Search hyperparameters for a scope and save the best ones to its ModelConfig."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, help='League ID to tune')
+        parser.add_argument('--competition', type=int, help='Competition ID to tune')
+        parser.add_argument('--country', type=int, help='Country ID to tune')
+        parser.add_argument('--candidates', type=int, default=30, help='Configurations sampled in the first round')
+        parser.add_argument('--factor', type=int, default=3, help='Successive-halving elimination factor')
+        parser.add_argument('--jobs', type=int, default=-1, help='Parallel search workers (-1: every core)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to build the feature matrix')
+        parser.add_argument(
+            '--feature-backend',
+            choices=FEATURE_BACKENDS,
+            default='numpy',
+            help='How the training matrix is computed (default: numpy)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report the best configuration without saving it')
+
+    def handle(self, *args, **options):
+        league_id = options.get('league')
+        competition_id = options.get('competition')
+        country_id = options.get('country')
+        if not (league_id or competition_id or country_id):
+            raise CommandError("Pass --league, --competition or --country")
+
+        self.stdout.write(self.style.NOTICE("🔎 Tuning hyperparameters..."))
+        try:
+            result = tune_scope(
+                league_id=league_id,
+                competition_id=competition_id,
+                country_id=country_id,
+                n_candidates=options.get('candidates'),
+                factor=options.get('factor'),
+                n_jobs=options.get('jobs'),
+                feature_backend=options.get('feature_backend') or 'numpy',
+                workers=options.get('workers') or 1,
+                save=not options.get('dry_run'),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Best CV accuracy: {result['best_score']} ({result['model_type']})\n"
+            f"   Params: {result['best_params']}\n"
+            f"   Candidates: {result['candidates']} over {result['iterations']} rounds, {result['samples']} samples\n"
+            f"   Timings: {result['timings']}\n"
+            + (f"   Saved to ModelConfig {result['config_id']}" if result['config_id'] else "   Not saved (dry run)")
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0007_remove_prediction_match_prediction_fixture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('match', 'Match'), ('fixture', 'Fixture')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('schema_version', models.IntegerField()),
+                ('features', models.JSONField(default=list)),
+                ('input_signature', models.CharField(max_length=40)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Match Features',
+                'verbose_name_plural': 'Match Features',
+                'unique_together': {('object_type', 'object_id', 'schema_version')},
+            },
+        ),
+    ]
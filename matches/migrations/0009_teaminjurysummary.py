@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def build_summaries(apps, schema_editor):
+    Player = apps.get_model('matches', 'Player')
+    TeamInjurySummary = apps.get_model('matches', 'TeamInjurySummary')
+    counts = Player.objects.values('team_id', 'season').annotate(
+        total=Count('id'),
+        injured_count=Count('id', filter=Q(injured=True)),
+        unknown_count=Count('id', filter=Q(injured__isnull=True)),
+    )
+    TeamInjurySummary.objects.bulk_create(
+        [
+            TeamInjurySummary(
+                team_id=c['team_id'],
+                season=c['season'],
+                total_players=c['total'],
+                injured_players=c['injured_count'],
+                unknown_players=c['unknown_count'],
+            )
+            for c in counts
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0008_matchfeatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamInjurySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(max_length=50)),
+                ('total_players', models.IntegerField(default=0)),
+                ('injured_players', models.IntegerField(default=0)),
+                ('unknown_players', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='injury_summaries', to='matches.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Team injury summaries',
+                'unique_together': {('team', 'season')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
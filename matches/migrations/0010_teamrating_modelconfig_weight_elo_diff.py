@@ -0,0 +1,81 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+# Frozen copy of the Elo update in matches/logic/ratings.py as of this
+# migration, so later changes there do not change what it writes
+BASE_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0
+
+RESULT_SCORES = {'win': 1.0, 'draw': 0.5, 'loss': 0.0}
+
+
+def rate_match(home_rating, away_rating, result, home_score, away_score):
+    """(home, away) ratings after a match with the given result."""
+    expected = 1.0 / (1.0 + 10 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400.0))
+    multiplier = 1.0
+    if home_score is not None and away_score is not None:
+        margin = abs(home_score - away_score)
+        if margin == 2:
+            multiplier = 1.5
+        elif margin > 2:
+            multiplier = (11.0 + margin) / 8.0
+    delta = K_FACTOR * multiplier * (RESULT_SCORES[result] - expected)
+    return home_rating + delta, away_rating - delta
+
+
+def backfill_ratings(apps, schema_editor):
+    """Replay every existing result, as rebuild_ratings does."""
+    Match = apps.get_model('matches', 'Match')
+    TeamRating = apps.get_model('matches', 'TeamRating')
+    rows = (
+        Match.objects.filter(result__in=list(RESULT_SCORES))
+        .exclude(home_team_id=F('away_team_id'))
+        .order_by('date', 'id')
+        .values_list('id', 'date', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'result')
+    )
+    ratings, snapshots = {}, []
+    for match_id, date, home_id, away_id, home_score, away_score, result in rows.iterator():
+        home, away = rate_match(
+            ratings.get(home_id, BASE_RATING), ratings.get(away_id, BASE_RATING), result, home_score, away_score
+        )
+        ratings[home_id], ratings[away_id] = home, away
+        snapshots.append(TeamRating(team_id=home_id, match_id=match_id, date=date, rating=home))
+        snapshots.append(TeamRating(team_id=away_id, match_id=match_id, date=date, rating=away))
+        if len(snapshots) >= 1000:
+            TeamRating.objects.bulk_create(snapshots)
+            snapshots = []
+    TeamRating.objects.bulk_create(snapshots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0009_teaminjurysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelconfig',
+            name='weight_elo_diff',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.CreateModel(
+            name='TeamRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField()),
+                ('rating', models.FloatField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='matches.match')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='matches.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', 'date'], name='matches_tea_team_id_83e125_idx')],
+                'unique_together': {('team', 'match')},
+            },
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+RECENT_LIMIT = 10
+
+
+def build_head_to_head(apps, schema_editor):
+    """Fill HeadToHead from existing results, as HeadToHead.refresh() does."""
+    Match = apps.get_model('matches', 'Match')
+    HeadToHead = apps.get_model('matches', 'HeadToHead')
+    played = Match.objects.filter(result__in=['win', 'draw', 'loss']).exclude(home_team_id=F('away_team_id'))
+
+    records = {}
+    inverted = {'win': 'loss', 'loss': 'win', 'draw': 'draw'}
+    symbols = {'win': 'W', 'draw': 'D', 'loss': 'L'}
+    for home_id, away_id, result, date in played.order_by('-date', '-id').values_list(
+        'home_team_id', 'away_team_id', 'result', 'date'
+    ).iterator():
+        pair = (home_id, away_id) if home_id < away_id else (away_id, home_id)
+        result = result if home_id == pair[0] else inverted[result]
+        record = records.setdefault(pair, HeadToHead(team_a_id=pair[0], team_b_id=pair[1], recent='', last_played=date))
+        if result == 'win':
+            record.team_a_wins += 1
+        elif result == 'draw':
+            record.draws += 1
+        else:
+            record.team_b_wins += 1
+        if len(record.recent) < RECENT_LIMIT:
+            record.recent += symbols[result]
+    HeadToHead.objects.bulk_create(records.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0010_teamrating_modelconfig_weight_elo_diff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelconfig',
+            name='weight_h2h_balance',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_a_wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('team_b_wins', models.IntegerField(default=0)),
+                ('recent', models.CharField(blank=True, help_text='W/D/L for team_a, most recent first', max_length=10)),
+                ('last_played', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_as_a', to='matches.team')),
+                ('team_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_as_b', to='matches.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Head to head records',
+                'unique_together': {('team_a', 'team_b')},
+            },
+        ),
+        migrations.RunPython(build_head_to_head, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 14:00
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def drop_duplicate_predictions(apps, schema_editor):
+    """Keep only the newest prediction of each fixture."""
+    Prediction = apps.get_model('matches', 'Prediction')
+    latest = (
+        Prediction.objects.values('fixture')
+        .annotate(latest_id=Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    Prediction.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0011_headtohead_modelconfig_weight_h2h_balance'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_predictions, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='prediction',
+            unique_together={('fixture',)},
+        ),
+    ]
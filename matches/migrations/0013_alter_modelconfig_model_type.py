@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0012_alter_prediction_unique_together'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modelconfig',
+            name='model_type',
+            field=models.CharField(choices=[('RandomForest', 'Random forest'), ('HistGradientBoosting', 'Histogram gradient boosting')], default='RandomForest', max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0013_alter_modelconfig_model_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvupload',
+            name='ingest_mode',
+            field=models.CharField(choices=[('orm', 'Batched ORM'), ('copy', 'Postgres COPY (matches only)')], default='orm', max_length=10),
+        ),
+    ]
@@ -310,6 +310,69 @@ class Player(models.Model):
         return import_players_from_csv(csv_file_path, season)
 
 
+class TeamInjurySummary(models.Model):
+    """Per-(team, season) squad injury counts, refreshed whenever Player rows are written"""
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="injury_summaries")
+    season = models.CharField(max_length=50)
+    total_players = models.IntegerField(default=0)
+    injured_players = models.IntegerField(default=0)
+    unknown_players = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["team", "season"]
+        verbose_name_plural = "Team injury summaries"
+
+    def __str__(self):
+        return f"{self.team} {self.season}: {self.injured_players}/{self.total_players} injured"
+
+    @classmethod
+    def refresh(cls, team_ids=None):
+        """
+        Recompute summaries from Player rows (all teams, or only `team_ids`)
+        with one grouped query and one upsert.
+        """
+        from django.db.models import Count, Q
+
+        players = Player.objects.all()
+        summaries = cls.objects.all()
+        if team_ids is not None:
+            team_ids = list(set(team_ids))
+            players = players.filter(team_id__in=team_ids)
+            summaries = summaries.filter(team_id__in=team_ids)
+
+        counts = players.values("team_id", "season").annotate(
+            total=Count("id"),
+            injured_count=Count("id", filter=Q(injured=True)),
+            unknown_count=Count("id", filter=Q(injured__isnull=True)),
+        )
+        rows = [
+            cls(
+                team_id=c["team_id"],
+                season=c["season"],
+                total_players=c["total"],
+                injured_players=c["injured_count"],
+                unknown_players=c["unknown_count"],
+            )
+            for c in counts
+        ]
+
+        # Drop summaries whose players were all removed or moved
+        kept = {(row.team_id, row.season) for row in rows}
+        stale = [pk for pk, team_id, season in summaries.values_list("id", "team_id", "season") if (team_id, season) not in kept]
+        if stale:
+            cls.objects.filter(id__in=stale).delete()
+
+        cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["team", "season"],
+            update_fields=["total_players", "injured_players", "unknown_players", "updated_at"],
+            batch_size=500,
+        )
+        return len(rows)
+
+
 # ------------------------------
 # Matches
 # ------------------------------
@@ -341,16 +404,21 @@ class Match(models.Model):
             league = League.get_or_create_league(league)
         elif league is None:
             league = League.get_or_create_league("Premier League")
-            
+
+        from matches.utils.entity_resolver import EntityResolver
+
+        # Competitions, leagues, countries and teams are looked up once per import
+        resolver = EntityResolver()
         with open(file_path, newline="", encoding="utf-8") as csvfile:
             reader = csv.DictReader(csvfile)
             imported = 0
+            imported_ids = []
             for row in reader:
                 try:
                     # --- Competition Logic ---
                     comp_name = row.get("Competition") or row.get("competition")
                     if comp_name:
-                        comp_obj, _ = Competition.objects.get_or_create(name=comp_name)
+                        comp_obj = resolver.competition(comp_name)
                     else:
                         comp_obj = competition
 
@@ -360,7 +428,7 @@ class Match(models.Model):
                     # --- League Logic ---
                     league_name = row.get("League") or row.get("league")
                     if league_name:
-                        league_obj = League.get_or_create_league(league_name)
+                        league_obj = resolver.league(league_name)
                     else:
                         league_obj = league
 
@@ -370,7 +438,7 @@ class Match(models.Model):
                     
                     if country_name:
                         # Try to find Country object
-                        country_obj = Country.objects.filter(name__iexact=country_name).first()
+                        country_obj = resolver.country(country_name)
                         if not country_obj:
                             # Create if not exists? Or just use name? Let's use name for Team.country string
                             pass
@@ -394,13 +462,13 @@ class Match(models.Model):
                     if not country_name:
                         country_name = "England" # Last resort default
 
-                    home_team = Team.get_or_create_canonical(
+                    home_team = resolver.team(
                         name=row.get("HomeTeam") or row.get("Home Team"),
                         api_id=row.get("home_team_api_id"),
                         country=country_name,
                         country_link=country_obj
                     )
-                    away_team = Team.get_or_create_canonical(
+                    away_team = resolver.team(
                         name=row.get("AwayTeam") or row.get("Away Team"),
                         api_id=row.get("away_team_api_id"),
                         country=country_name,
@@ -409,7 +477,7 @@ class Match(models.Model):
 
                     fixture_id = cls.canonical_fixture_id(home_team, away_team, league_obj, season_val, date)
 
-                    cls.objects.update_or_create(
+                    match, _ = cls.objects.update_or_create(
                         fixture_id=fixture_id,
                         defaults={
                             "home_team": home_team,
@@ -423,12 +491,129 @@ class Match(models.Model):
                             "result": result,
                         },
                     )
+                    imported_ids.append(match.id)
                     imported += 1
                 except Exception as e:
                     print(f"Skipping row due to error: {e} | Row: {row}")
                     continue
             print(f"✅ Imported {imported} matches from {file_path}")
 
+        from matches.logic.ingest import after_matches_written
+
+        after_matches_written(imported_ids)
+
+class TeamRating(models.Model):
+    """Elo rating snapshot of a team right after a match; the latest one before D is its rating as of D"""
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="ratings")
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="ratings")
+    date = models.DateTimeField()
+    rating = models.FloatField()
+
+    class Meta:
+        unique_together = ["team", "match"]
+        indexes = [models.Index(fields=["team", "date"])]
+
+    def __str__(self):
+        return f"{self.team} {self.rating:.0f} ({self.date:%Y-%m-%d})"
+
+
+class HeadToHead(models.Model):
+    """
+    All-time meetings between two teams, stored once per unordered pair
+    (team_a has the lower id) and from team_a's point of view
+    """
+    RECENT_LIMIT = 10
+
+    team_a = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="head_to_head_as_a")
+    team_b = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="head_to_head_as_b")
+    team_a_wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    team_b_wins = models.IntegerField(default=0)
+    recent = models.CharField(max_length=RECENT_LIMIT, blank=True, help_text="W/D/L for team_a, most recent first")
+    last_played = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["team_a", "team_b"]
+        verbose_name_plural = "Head to head records"
+
+    def __str__(self):
+        return f"{self.team_a} vs {self.team_b}: {self.team_a_wins}-{self.draws}-{self.team_b_wins}"
+
+    @staticmethod
+    def pair(team_id, other_id):
+        return (team_id, other_id) if team_id < other_id else (other_id, team_id)
+
+    @classmethod
+    def lookup(cls, team_id, other_id):
+        """Stats from team_id's point of view, or None if they never met."""
+        team_a_id, team_b_id = cls.pair(team_id, other_id)
+        h2h = cls.objects.filter(team_a_id=team_a_id, team_b_id=team_b_id).first()
+        if h2h is None:
+            return None
+        if team_id == team_a_id:
+            return {"wins": h2h.team_a_wins, "draws": h2h.draws, "losses": h2h.team_b_wins,
+                    "recent": h2h.recent, "last_played": h2h.last_played}
+        return {"wins": h2h.team_b_wins, "draws": h2h.draws, "losses": h2h.team_a_wins,
+                "recent": h2h.recent.translate(str.maketrans("WL", "LW")), "last_played": h2h.last_played}
+
+    @classmethod
+    def refresh(cls, matches=None):
+        """
+        Recompute the pairs that appear in `matches` (a Match queryset; all
+        pairs when None) from their full Match history, with one query to
+        read and one upsert.
+        """
+        from django.db.models import F
+
+        played = Match.objects.filter(result__in=["win", "draw", "loss"]).exclude(home_team_id=F("away_team_id"))
+        pairs = None
+        if matches is not None:
+            pairs = {cls.pair(h, a) for h, a in matches.values_list("home_team_id", "away_team_id") if h != a}
+            if not pairs:
+                return 0
+            team_ids = {team_id for pair in pairs for team_id in pair}
+            played = played.filter(home_team_id__in=team_ids, away_team_id__in=team_ids)
+
+        records = {}
+        inverted = {"win": "loss", "loss": "win", "draw": "draw"}
+        symbols = {"win": "W", "draw": "D", "loss": "L"}
+        for home_id, away_id, result, date in played.order_by("-date", "-id").values_list(
+            "home_team_id", "away_team_id", "result", "date"
+        ):
+            pair = cls.pair(home_id, away_id)
+            if pairs is not None and pair not in pairs:
+                continue
+            result = result if home_id == pair[0] else inverted[result]
+            record = records.setdefault(pair, cls(team_a_id=pair[0], team_b_id=pair[1], recent="", last_played=date))
+            if result == "win":
+                record.team_a_wins += 1
+            elif result == "draw":
+                record.draws += 1
+            else:
+                record.team_b_wins += 1
+            if len(record.recent) < cls.RECENT_LIMIT:
+                record.recent += symbols[result]
+
+        # Pairs whose only meetings were removed
+        stale = cls.objects.all()
+        if pairs is not None:
+            stale = stale.filter(team_a_id__in=team_ids, team_b_id__in=team_ids)
+        stale_ids = [pk for pk, a, b in stale.values_list("id", "team_a_id", "team_b_id")
+                     if (a, b) not in records and (pairs is None or (a, b) in pairs)]
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).delete()
+
+        cls.objects.bulk_create(
+            records.values(),
+            update_conflicts=True,
+            unique_fields=["team_a", "team_b"],
+            update_fields=["team_a_wins", "draws", "team_b_wins", "recent", "last_played", "updated_at"],
+            batch_size=500,
+        )
+        return len(records)
+
+
 # ------------------------------
 # Predictions & User Bets
 # ------------------------------
@@ -442,6 +627,10 @@ class Prediction(models.Model):
     fair_odds_away = models.FloatField()
     model_version = models.CharField(max_length=20, default="v1")
 
+    class Meta:
+        # One prediction per fixture, upserted by every training run
+        unique_together = ["fixture"]
+
     def __str__(self):
         return f"Prediction for {self.fixture}"
 
@@ -588,6 +777,11 @@ class CSVUpload(models.Model):
         ('failed', 'Failed'),
     ]
     
+    INGEST_MODE_CHOICES = [
+        ('orm', 'Batched ORM'),
+        ('copy', 'Postgres COPY (matches only)'),
+    ]
+    
     # File storage
     from matches.storage import CSVUploadStorage
     file = models.FileField(upload_to='csv-uploads/', storage=CSVUploadStorage())
@@ -597,6 +791,7 @@ class CSVUpload(models.Model):
     league = models.ForeignKey(League, on_delete=models.SET_NULL, null=True, blank=True)
     competition = models.ForeignKey(Competition, on_delete=models.SET_NULL, null=True, blank=True)
     season = models.CharField(max_length=20, blank=True, null=True)
+    ingest_mode = models.CharField(max_length=10, choices=INGEST_MODE_CHOICES, default='orm')
     
     # Processing status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -623,6 +818,12 @@ class CSVUpload(models.Model):
     def __str__(self):
         return f"{self.get_model_type_display()} - {self.status} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
     
+    def matches_written(self, matches):
+        """Ratings and head-to-head upkeep for a batch of Match rows this upload wrote."""
+        from matches.logic.ingest import after_matches_written
+
+        after_matches_written(matches)
+    
     @property
     def progress_percentage(self):
         """Calculate progress percentage"""
@@ -638,7 +839,11 @@ class ModelConfig(models.Model):
     competition = models.ForeignKey(Competition, on_delete=models.CASCADE, null=True, blank=True)
     country = models.ForeignKey(Country, on_delete=models.CASCADE, null=True, blank=True)
     
-    model_type = models.CharField(max_length=50, default="RandomForest")
+    MODEL_TYPE_CHOICES = [
+        ("RandomForest", "Random forest"),
+        ("HistGradientBoosting", "Histogram gradient boosting"),
+    ]
+    model_type = models.CharField(max_length=50, choices=MODEL_TYPE_CHOICES, default="RandomForest")
     
     # Hyperparameters
     n_estimators = models.IntegerField(default=100)
@@ -661,6 +866,8 @@ class ModelConfig(models.Model):
     weight_away_win_rate = models.FloatField(default=1.0)
     weight_away_draw_rate = models.FloatField(default=1.0)
     weight_home_advantage = models.FloatField(default=1.0)
+    weight_elo_diff = models.FloatField(default=1.0)
+    weight_h2h_balance = models.FloatField(default=1.0)
     
     # Deprecated fields (kept temporarily if needed, but removing as per request "instead of json")
     # hyperparameters = models.JSONField(default=dict, blank=True)
@@ -678,4 +885,33 @@ class ModelConfig(models.Model):
         if self.league: context.append(f"League: {self.league.name}")
         if self.competition: context.append(f"Comp: {self.competition.name}")
         if self.country: context.append(f"Country: {self.country.name}")
-        return f"Config ({', '.join(context) or 'Global'})"
\ No newline at end of file
+        return f"Config ({', '.join(context) or 'Global'})"
+
+# ------------------------------
+# Feature Store
+# ------------------------------
+class MatchFeatures(models.Model):
+    """Computed feature vector for a Match or Fixture, per feature-schema version"""
+
+    OBJECT_CHOICES = [
+        ('match', 'Match'),
+        ('fixture', 'Fixture'),
+    ]
+
+    object_type = models.CharField(max_length=10, choices=OBJECT_CHOICES)
+    object_id = models.BigIntegerField()
+    schema_version = models.IntegerField()
+
+    # Feature values in FEATURE_NAMES order
+    features = models.JSONField(default=list)
+    # Digest of the history rows and injury data the features were built from
+    input_signature = models.CharField(max_length=40)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("object_type", "object_id", "schema_version")
+        verbose_name = "Match Features"
+        verbose_name_plural = "Match Features"
+
+    def __str__(self):
+        return f"{self.get_object_type_display()} {self.object_id} (schema v{self.schema_version})"
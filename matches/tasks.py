@@ -1,20 +1,70 @@
 # matches/tasks.py
 import csv
+import operator
 import traceback
 from datetime import datetime
-from io import StringIO
-from celery import shared_task
+from functools import reduce
+from celery import chord, shared_task
 from django.utils import timezone
 from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import F, Min
 
-from .models import CSVUpload, Match, Team, Fixture, Player, Gameweek, League, Competition, Country
+from .models import CSVUpload, Match, Fixture, Player, Gameweek, League, ModelConfig
+from .logic.ingest import after_matches_written
+from .logic.feature_store import load_feature_matrix
+from .logic.model_registry import scope_key
+from .logic.train_and_predict import scope_matches, train_and_predict
+from .utils.copy_import import copy_match_csv
+from .utils.csv_stream import CSVRows, chunked, count_rows, plan_chunks
+from .utils.entity_resolver import EntityResolver
 from django.utils.dateparse import parse_datetime
 
 
+# Uploads with more rows than this are split into chunks processed in parallel
+CSV_CHUNK_ROWS = 20000
+PARALLEL_MODEL_TYPES = ('match', 'fixture', 'team', 'gameweek')
+
+
+def _process_rows(upload, rows):
+    """Hand the rows to the processor of the upload's model type."""
+    if upload.model_type == 'match' and upload.ingest_mode == 'copy' and connection.vendor == 'postgresql':
+        copy_match_csv(upload, rows)
+    elif upload.model_type == 'match':
+        # Also copy-mode uploads on databases without COPY
+        process_match_csv(upload, rows)
+    elif upload.model_type == 'fixture':
+        process_fixture_csv(upload, rows)
+    elif upload.model_type == 'team':
+        process_team_csv(upload, rows)
+    elif upload.model_type == 'player':
+        process_player_csv(upload, rows)
+    elif upload.model_type == 'gameweek':
+        process_gameweek_csv(upload, rows)
+    else:
+        raise ValueError(f"Unknown model type: {upload.model_type}")
+
+
+def _fail_upload(upload_id, error_message):
+    try:
+        upload = CSVUpload.objects.get(id=upload_id)
+        upload.status = 'failed'
+        upload.error_message = error_message
+        upload.completed_at = timezone.now()
+        upload.save()
+    except:
+        pass
+
+
 @shared_task(bind=True)
 def process_csv_upload(self, upload_id):
     """
-    Background task to process CSV uploads efficiently using bulk_create
+    Background task to process CSV uploads efficiently using bulk_create.
+
+    Uploads of more than CSV_CHUNK_ROWS rows (except player files and COPY
+    loads) are cut into byte ranges of that many rows and processed by a
+    chord of process_csv_chunk tasks, so every worker takes a share;
+    finish_csv_upload then completes the upload.
     """
     try:
         upload = CSVUpload.objects.get(id=upload_id)
@@ -22,29 +72,30 @@ def process_csv_upload(self, upload_id):
         upload.celery_task_id = self.request.id
         upload.save()
         
-        # Read file from S3 or local storage
-        file_content = upload.file.read().decode('utf-8')
-        csvfile = StringIO(file_content)
-        reader = csv.DictReader(csvfile)
+        if upload.model_type in PARALLEL_MODEL_TYPES and upload.ingest_mode != 'copy':
+            fieldnames, ranges, upload.total_rows = plan_chunks(upload.file, CSV_CHUNK_ROWS)
+            upload.save()
+            if len(ranges) > 1:
+                result = chord(
+                    process_csv_chunk.s(upload.id, fieldnames, start, end) for start, end in ranges
+                )(finish_csv_upload.s(upload.id))
+                return {
+                    'status': 'dispatched',
+                    'chunks': len(ranges),
+                    'total_rows': upload.total_rows,
+                    'finish_task_id': result.id,
+                }
+        else:
+            # Stream the file from S3 or local storage; the pre-scan gives
+            # the progress bar a total without reading the rows
+            upload.total_rows = count_rows(upload.file)
+            upload.save()
         
-        # Count total rows first
-        rows = list(reader)
-        upload.total_rows = len(rows)
-        upload.save()
+        rows = CSVRows(upload.file)
+        _process_rows(upload, rows)
         
-        # Process based on model type
-        if upload.model_type == 'match':
-            process_match_csv(upload, rows)
-        elif upload.model_type == 'fixture':
-            process_fixture_csv(upload, rows)
-        elif upload.model_type == 'team':
-            process_team_csv(upload, rows)
-        elif upload.model_type == 'player':
-            process_player_csv(upload, rows)
-        elif upload.model_type == 'gameweek':
-            process_gameweek_csv(upload, rows)
-        else:
-            raise ValueError(f"Unknown model type: {upload.model_type}")
+        # The pre-scan is an estimate when quoted fields span lines
+        upload.total_rows = rows.count
         
         # Mark as completed
         upload.status = 'completed'
@@ -61,17 +112,154 @@ def process_csv_upload(self, upload_id):
     except Exception as e:
         # Handle errors
         if upload_id:
-            try:
-                upload = CSVUpload.objects.get(id=upload_id)
-                upload.status = 'failed'
-                upload.error_message = f"{str(e)}\n\n{traceback.format_exc()}"
-                upload.completed_at = timezone.now()
-                upload.save()
-            except:
-                pass
+            _fail_upload(upload_id, f"{str(e)}\n\n{traceback.format_exc()}")
         raise
 
 
+class ChunkProgress:
+    """
+    The upload as the row processors see it inside process_csv_chunk: the
+    upload's import settings with counters of the chunk's own.
+
+    save() adds what the chunk processed since its last save to the upload's
+    counters in one UPDATE, so concurrent chunks never overwrite each other.
+    Ratings and head-to-head upkeep is not run per chunk, where concurrent
+    rating replays would race; the span of written matches is recorded for
+    finish_csv_upload instead.
+    """
+
+    def __init__(self, upload):
+        self.upload = upload
+        self.processed_rows = 0
+        self.successful_rows = 0
+        self.failed_rows = 0
+        self._saved = (0, 0, 0)
+        self.earliest = None
+        self.league_ids = set()
+
+    def __getattr__(self, name):
+        return getattr(self.upload, name)
+
+    def save(self):
+        counts = (self.processed_rows, self.successful_rows, self.failed_rows)
+        processed, successful, failed = (count - saved for count, saved in zip(counts, self._saved))
+        if processed or successful or failed:
+            CSVUpload.objects.filter(id=self.upload.id).update(
+                processed_rows=F('processed_rows') + processed,
+                successful_rows=F('successful_rows') + successful,
+                failed_rows=F('failed_rows') + failed,
+                updated_at=timezone.now(),
+            )
+        self._saved = counts
+
+    def matches_written(self, matches):
+        earliest = matches.aggregate(earliest=Min('date'))['earliest']
+        if earliest is not None:
+            self.earliest = min(self.earliest, earliest) if self.earliest else earliest
+            self.league_ids.update(matches.values_list('league_id', flat=True).distinct())
+
+
+@shared_task
+def process_csv_chunk(upload_id, fieldnames, start, end):
+    """One byte range of a split upload. Errors are reported, not raised, so the chord always finishes."""
+    upload = CSVUpload.objects.get(id=upload_id)
+    progress = ChunkProgress(upload)
+    error = None
+    try:
+        _process_rows(progress, CSVRows(upload.file, fieldnames=fieldnames, byte_range=(start, end)))
+    except Exception as e:
+        error = f"Rows in bytes {start}-{end}: {e}\n\n{traceback.format_exc()}"
+    progress.save()
+    return {
+        'processed_rows': progress.processed_rows,
+        'successful_rows': progress.successful_rows,
+        'failed_rows': progress.failed_rows,
+        'earliest': progress.earliest.isoformat() if progress.earliest else None,
+        'league_ids': sorted(league_id for league_id in progress.league_ids if league_id is not None),
+        'error': error,
+    }
+
+
+@shared_task
+def finish_csv_upload(chunk_results, upload_id):
+    """Chord callback of a split upload: match upkeep, final counts and status."""
+    try:
+        dates = [parse_datetime(result['earliest']) for result in chunk_results if result['earliest']]
+        if dates:
+            # Every match from the earliest one written on, in the leagues
+            # written to, covers all the ratings and pairs the chunks touched
+            league_ids = {league_id for result in chunk_results for league_id in result['league_ids']}
+            after_matches_written(Match.objects.filter(date__gte=min(dates), league_id__in=league_ids))
+    except Exception as e:
+        chunk_results = [*chunk_results, {'error': f"Match upkeep: {e}\n\n{traceback.format_exc()}"}]
+
+    upload = CSVUpload.objects.get(id=upload_id)
+    upload.processed_rows = sum(result.get('processed_rows', 0) for result in chunk_results)
+    upload.successful_rows = sum(result.get('successful_rows', 0) for result in chunk_results)
+    upload.failed_rows = sum(result.get('failed_rows', 0) for result in chunk_results)
+    errors = [result['error'] for result in chunk_results if result.get('error')]
+    upload.status = 'failed' if errors else 'completed'
+    upload.error_message = "\n\n".join(errors) or None
+    upload.completed_at = timezone.now()
+    upload.save()
+    return {
+        'status': upload.status,
+        'chunks': len(chunk_results),
+        'total_rows': upload.total_rows,
+        'successful_rows': upload.successful_rows,
+        'failed_rows': upload.failed_rows,
+    }
+
+
+def _match_row_scope(row, resolver, league, competition):
+    """Competition, league, country name and Country of a match CSV row."""
+    comp_name = row.get("Competition") or row.get("competition")
+    comp_obj = resolver.competition(comp_name) if comp_name else competition
+    
+    league_name = row.get("League") or row.get("league")
+    league_obj = resolver.league(league_name) if league_name else league
+    
+    # Country logic
+    country_name = row.get("Country") or row.get("country")
+    country_obj = None
+    
+    if country_name:
+        country_obj = resolver.country(country_name)
+    else:
+        # Infer from league or competition
+        if league_obj and league_obj.country_link:
+            country_obj = league_obj.country_link
+            country_name = country_obj.name
+        elif league_obj and league_obj.country:
+            country_name = league_obj.country
+        elif comp_obj and comp_obj.country:
+            country_obj = comp_obj.country
+            country_name = country_obj.name
+    
+    if not country_name:
+        country_name = "England"
+    
+    return comp_obj, league_obj, country_name, country_obj
+
+
+def _match_row_teams(row, country_name, country_obj):
+    """EntityResolver.team arguments of the home and away team of a match CSV row."""
+    return [
+        {
+            "name": row.get("HomeTeam") or row.get("Home Team"),
+            "api_id": row.get("home_team_api_id"),
+            "country": country_name,
+            "country_link": country_obj,
+        },
+        {
+            "name": row.get("AwayTeam") or row.get("Away Team"),
+            "api_id": row.get("away_team_api_id"),
+            "country": country_name,
+            "country_link": country_obj,
+        },
+    ]
+
+
 def process_match_csv(upload, rows):
     """Process Match CSV with bulk operations"""
     BATCH_SIZE = 500
@@ -83,110 +271,77 @@ def process_match_csv(upload, rows):
     if not league:
         league = League.get_or_create_league("Premier League")
     
-    matches_to_create = []
-    matches_to_update = {}
+    resolver = EntityResolver()
     processed = 0
     successful = 0
     failed = 0
+    # Span of the written matches, for one round of rating and head-to-head
+    # upkeep at the end rather than a replay per chunk
+    earliest = None
+    league_ids = set()
     
-    for row in rows:
-        try:
-            # Parse fields
-            comp_name = row.get("Competition") or row.get("competition")
-            if comp_name:
-                comp_obj, _ = Competition.objects.get_or_create(name=comp_name)
-            else:
-                comp_obj = competition
-            
-            season_val = row.get("Season") or row.get("season") or season
-            
-            league_name = row.get("League") or row.get("league")
-            if league_name:
-                league_obj = League.get_or_create_league(league_name)
-            else:
-                league_obj = league
-            
-            # Country logic
-            country_name = row.get("Country") or row.get("country")
-            country_obj = None
-            
-            if country_name:
-                country_obj = Country.objects.filter(name__iexact=country_name).first()
-            else:
-                # Infer from league or competition
-                if league_obj and league_obj.country_link:
-                    country_obj = league_obj.country_link
-                    country_name = country_obj.name
-                elif league_obj and league_obj.country:
-                    country_name = league_obj.country
-                elif comp_obj and comp_obj.country:
-                    country_obj = comp_obj.country
-                    country_name = country_obj.name
-            
-            if not country_name:
-                country_name = "England"
-            
-            # Teams
-            home_team = Team.get_or_create_canonical(
-                name=row.get("HomeTeam") or row.get("Home Team"),
-                api_id=row.get("home_team_api_id"),
-                country=country_name,
-                country_link=country_obj
-            )
-            away_team = Team.get_or_create_canonical(
-                name=row.get("AwayTeam") or row.get("Away Team"),
-                api_id=row.get("away_team_api_id"),
-                country=country_name,
-                country_link=country_obj
-            )
-            
-            # Date parsing
-            date_str = row.get("Date") or row.get("date")
-            date = parse_datetime(date_str)
-            if not date:
-                for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y"):
-                    try:
-                        date = datetime.strptime(date_str, fmt)
-                        break
-                    except:
-                        continue
-            
-            if not date:
-                failed += 1
+    # Rows are written and reported one chunk at a time, so memory does not
+    # grow with the size of the file
+    for chunk in chunked(rows, BATCH_SIZE):
+        matches = {}
+        
+        # Create the chunk's unknown competitions and leagues, then its
+        # unknown teams (whose country can come from the league), in bulk
+        resolver.create_missing(
+            competitions=[row.get("Competition") or row.get("competition") for row in chunk],
+            leagues=[row.get("League") or row.get("league") for row in chunk],
+        )
+        teams = []
+        for row in chunk:
+            try:
+                teams.extend(_match_row_teams(row, *_match_row_scope(row, resolver, league, competition)[2:]))
+            except Exception:
+                # Reported when the row itself is processed
                 continue
-            
-            # Scores and result
-            home_score_str = row.get("FTHG") or row.get("home_score") or row.get("HomeScore")
-            away_score_str = row.get("FTAG") or row.get("away_score") or row.get("AwayScore")
-            home_score = int(home_score_str) if home_score_str else None
-            away_score = int(away_score_str) if away_score_str else None
-            
-            result_str = row.get("FTR") or row.get("result") or row.get("Result")
-            result = None
-            if result_str:
-                from .models import RESULT_MAP
-                result = RESULT_MAP.get(result_str)
-            
-            # Create fixture_id
-            fixture_id = Match.canonical_fixture_id(home_team, away_team, league_obj, season_val, date)
-            
-            # Check if exists
-            existing = Match.objects.filter(fixture_id=fixture_id).first()
-            if existing:
-                # Update existing
-                existing.home_team = home_team
-                existing.away_team = away_team
-                existing.league = league_obj
-                existing.competition = comp_obj
-                existing.season = season_val
-                existing.date = date
-                existing.home_score = home_score
-                existing.away_score = away_score
-                existing.result = result
-                matches_to_update[existing.id] = existing
-            else:
-                # Prepare for bulk create
-                matches_to_create.append(Match(
+        resolver.create_missing(teams=teams)
+        
+        for row in chunk:
+            try:
+                comp_obj, league_obj, country_name, country_obj = _match_row_scope(row, resolver, league, competition)
+                season_val = row.get("Season") or row.get("season") or season
+                
+                # Teams
+                home_team, away_team = (resolver.team(**team) for team in _match_row_teams(row, country_name, country_obj))
+                
+                # Date parsing
+                date_str = row.get("Date") or row.get("date")
+                date = parse_datetime(date_str)
+                if not date:
+                    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y"):
+                        try:
+                            date = datetime.strptime(date_str, fmt)
+                            break
+                        except:
+                            continue
+                
+                if not date:
+                    failed += 1
+                    processed += 1
+                    continue
+                
+                # Scores and result
+                home_score_str = row.get("FTHG") or row.get("home_score") or row.get("HomeScore")
+                away_score_str = row.get("FTAG") or row.get("away_score") or row.get("AwayScore")
+                home_score = int(home_score_str) if home_score_str else None
+                away_score = int(away_score_str) if away_score_str else None
+                
+                result_str = row.get("FTR") or row.get("result") or row.get("Result")
+                result = None
+                if result_str:
+                    from .models import RESULT_MAP
+                    result = RESULT_MAP.get(result_str)
+                
+                # Create fixture_id
+                fixture_id = Match.canonical_fixture_id(home_team, away_team, league_obj, season_val, date)
+                
+                # Later rows for the same fixture win, as one statement
+                # cannot insert and then update the same row
+                matches[fixture_id] = Match(
                     fixture_id=fixture_id,
                     home_team=home_team,
                     away_team=away_team,
@@ -197,46 +352,48 @@ def process_match_csv(upload, rows):
                     home_score=home_score,
                     away_score=away_score,
                     result=result
-                ))
-            
-            successful += 1
-            processed += 1
-            
-            # Batch create
-            if len(matches_to_create) >= BATCH_SIZE:
-                Match.objects.bulk_create(matches_to_create, ignore_conflicts=True)
-                matches_to_create = []
+                )
                 
-                # Update progress
-                upload.processed_rows = processed
-                upload.successful_rows = successful
-                upload.failed_rows = failed
-                upload.save()
+                successful += 1
+                processed += 1
+            
+            except Exception as e:
+                failed += 1
+                processed += 1
+                print(f"Error processing row: {e}")
+                continue
         
-        except Exception as e:
-            failed += 1
-            processed += 1
-            print(f"Error processing row: {e}")
-            continue
-    
-    # Final batch create
-    if matches_to_create:
-        Match.objects.bulk_create(matches_to_create, ignore_conflicts=True)
-    
-    # Bulk update existing
-    if matches_to_update:
-        Match.objects.bulk_update(
-            matches_to_update.values(),
-            ['home_team', 'away_team', 'league', 'competition', 'season', 'date', 
-             'home_score', 'away_score', 'result'],
-            batch_size=BATCH_SIZE
-        )
+        # New and existing matches in one upsert on fixture_id
+        if matches:
+            Match.objects.bulk_create(
+                matches.values(),
+                update_conflicts=True,
+                unique_fields=['fixture_id'],
+                update_fields=['home_team', 'away_team', 'league', 'competition', 'season', 'date',
+                               'home_score', 'away_score', 'result'],
+            )
+            written = Match.objects.filter(fixture_id__in=list(matches)).aggregate(earliest=Min('date'))['earliest']
+            earliest = min(earliest, written) if earliest else written
+            league_ids.update(match.league_id for match in matches.values())
+        
+        # Update progress
+        upload.processed_rows = processed
+        upload.successful_rows = successful
+        upload.failed_rows = failed
+        upload.save()
     
-    # Final update
-    upload.processed_rows = processed
-    upload.successful_rows = successful
-    upload.failed_rows = failed
-    upload.save()
+    # Update team ratings and head-to-head records for the new results: every
+    # match from the earliest one written on, in the leagues written to
+    if earliest is not None:
+        upload.matches_written(Match.objects.filter(date__gte=earliest, league_id__in=league_ids))
+
+
+def _fixture_row_teams(row):
+    """EntityResolver.team arguments of the home and away team of a fixture CSV row."""
+    return [
+        {"name": row.get("home_team_name") or row.get("HomeTeam"), "api_id": row.get("home_team_api_id")},
+        {"name": row.get("away_team_name") or row.get("AwayTeam"), "api_id": row.get("away_team_api_id")},
+    ]
 
 
 def process_fixture_csv(upload, rows):
@@ -248,43 +405,39 @@ def process_fixture_csv(upload, rows):
     if not league:
         league = League.get_or_create_league("Premier League")
     
-    fixtures_to_create = []
+    resolver = EntityResolver()
     processed = 0
     successful = 0
     failed = 0
     
-    for row in rows:
-        try:
-            home_team = Team.get_or_create_canonical(
-                name=row.get("home_team_name") or row.get("HomeTeam"),
-                api_id=row.get("home_team_api_id"),
-            )
-            away_team = Team.get_or_create_canonical(
-                name=row.get("away_team_name") or row.get("AwayTeam"),
-                api_id=row.get("away_team_api_id"),
-            )
-            
-            date_str = row.get("date") or row.get("Date")
-            date = parse_datetime(date_str)
-            if not date:
-                for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y"):
-                    try:
-                        date = datetime.strptime(date_str, fmt)
-                        break
-                    except:
-                        continue
-            
-            if not date:
-                failed += 1
-                continue
-            
-            fixture_id_val = row.get("id") or Fixture.canonical_fixture_id(
-                home_team, away_team, league, season, date
-            ).replace("-", "")[:10]
-            
-            # Check if exists
-            if not Fixture.objects.filter(id=int(fixture_id_val)).exists():
-                fixtures_to_create.append(Fixture(
+    for chunk in chunked(rows, BATCH_SIZE):
+        fixtures = {}
+        resolver.create_missing(teams=[team for row in chunk for team in _fixture_row_teams(row)])
+        
+        for row in chunk:
+            try:
+                home_team, away_team = (resolver.team(**team) for team in _fixture_row_teams(row))
+                
+                date_str = row.get("date") or row.get("Date")
+                date = parse_datetime(date_str)
+                if not date:
+                    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y"):
+                        try:
+                            date = datetime.strptime(date_str, fmt)
+                            break
+                        except:
+                            continue
+                
+                if not date:
+                    failed += 1
+                    processed += 1
+                    continue
+                
+                fixture_id_val = row.get("id") or Fixture.canonical_fixture_id(
+                    home_team, away_team, league, season, date
+                ).replace("-", "")[:10]
+                
+                fixtures[int(fixture_id_val)] = Fixture(
                     id=int(fixture_id_val),
                     date=date,
                     status=row.get("status", "scheduled"),
@@ -292,27 +445,31 @@ def process_fixture_csv(upload, rows):
                     season=season,
                     home_team=home_team,
                     away_team=away_team,
-                ))
-            
-            successful += 1
-            processed += 1
-            
-            if len(fixtures_to_create) >= BATCH_SIZE:
-                Fixture.objects.bulk_create(fixtures_to_create, ignore_conflicts=True)
-                fixtures_to_create = []
+                )
                 
-                upload.processed_rows = processed
-                upload.successful_rows = successful
-                upload.failed_rows = failed
-                upload.save()
+                successful += 1
+                processed += 1
+            
+            except Exception as e:
+                failed += 1
+                processed += 1
+                continue
         
-        except Exception as e:
-            failed += 1
-            processed += 1
-            continue
-    
-    if fixtures_to_create:
-        Fixture.objects.bulk_create(fixtures_to_create, ignore_conflicts=True)
+        # New and existing fixtures in one upsert on id. Files without a
+        # status column leave the status of existing fixtures alone
+        if fixtures:
+            Fixture.objects.bulk_create(
+                fixtures.values(),
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=['date', 'league', 'season', 'home_team', 'away_team']
+                + (['status'] if 'status' in chunk[0] else []),
+            )
+        
+        upload.processed_rows = processed
+        upload.successful_rows = successful
+        upload.failed_rows = failed
+        upload.save()
     
     upload.processed_rows = processed
     upload.successful_rows = successful
@@ -322,23 +479,26 @@ def process_fixture_csv(upload, rows):
 
 def process_team_csv(upload, rows):
     """Process Team CSV with bulk operations"""
+    resolver = EntityResolver()
     processed = 0
     successful = 0
     failed = 0
     
-    for row in rows:
-        try:
-            Team.get_or_create_canonical(row["name"], api_id=row.get("api_id"))
-            successful += 1
-        except Exception as e:
-            failed += 1
-        processed += 1
+    for chunk in chunked(rows, 100):
+        resolver.create_missing(teams=[{"name": row.get("name"), "api_id": row.get("api_id")} for row in chunk])
         
-        if processed % 100 == 0:
-            upload.processed_rows = processed
-            upload.successful_rows = successful
-            upload.failed_rows = failed
-            upload.save()
+        for row in chunk:
+            try:
+                resolver.team(row["name"], api_id=row.get("api_id"))
+                successful += 1
+            except Exception as e:
+                failed += 1
+            processed += 1
+        
+        upload.processed_rows = processed
+        upload.successful_rows = successful
+        upload.failed_rows = failed
+        upload.save()
     
     upload.processed_rows = processed
     upload.successful_rows = successful
@@ -355,18 +515,26 @@ def process_player_csv(upload, rows):
     import tempfile
     import os
     
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', encoding='utf-8') as tmp:
-        fieldnames = rows[0].keys() if rows else []
-        writer = csv.DictWriter(tmp, fieldnames=fieldnames)
+    # Rows are copied to disk as they are read; the header comes from the first one
+    rows = iter(rows)
+    first = next(rows, None)
+    written = 0
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', encoding='utf-8', newline='') as tmp:
+        writer = csv.DictWriter(tmp, fieldnames=first.keys() if first else [])
         writer.writeheader()
-        writer.writerows(rows)
+        if first is not None:
+            writer.writerow(first)
+            written = 1
+            for chunk in chunked(rows, 1000):
+                writer.writerows(chunk)
+                written += len(chunk)
         tmp_path = tmp.name
     
     try:
         imported, updated = import_players_from_csv(tmp_path, upload.season or "2023-2024")
-        upload.processed_rows = len(rows)
+        upload.processed_rows = written
         upload.successful_rows = imported + updated
-        upload.failed_rows = len(rows) - (imported + updated)
+        upload.failed_rows = written - (imported + updated)
         upload.save()
     finally:
         os.unlink(tmp_path)
@@ -435,3 +603,121 @@ def process_gameweek_csv(upload, rows):
     upload.successful_rows = successful
     upload.failed_rows = failed
     upload.save()
+
+
+# ------------------------------
+# Multi-scope training
+# ------------------------------
+def _config_scope(config):
+    return config.league_id, config.competition_id, config.country_id
+
+
+def plan_training_lanes(configs, concurrency):
+    """
+    Split the scopes of `configs` into at most `concurrency` lanes.
+
+    Configs sharing a scope are trained once. Scopes are dealt largest first
+    to the lane with the fewest matches so far, so lanes finish together.
+    """
+    scopes = {}
+    for config in configs:
+        scopes.setdefault(scope_key(*_config_scope(config)), config)
+    sized = sorted(
+        ((scope_matches(*_config_scope(config)).count(), config.id) for config in scopes.values()),
+        reverse=True,
+    )
+
+    lanes = [[] for _ in range(max(1, min(concurrency, len(sized))))]
+    loads = [0] * len(lanes)
+    for size, config_id in sized:
+        lane = loads.index(min(loads))
+        lanes[lane].append(config_id)
+        loads[lane] += size
+    return [lane for lane in lanes if lane]
+
+
+@shared_task
+def train_scopes(config_ids, feature_backend='numpy', retrain=False, workers=1, evaluation='cv', incremental=False):
+    """Train the scope of each ModelConfig in turn: one lane of train_all_scopes."""
+    results = []
+    for config in ModelConfig.objects.filter(id__in=config_ids, active=True).order_by('id'):
+        league_id, competition_id, country_id = _config_scope(config)
+        try:
+            result = train_and_predict(
+                league_id=league_id,
+                competition_id=competition_id,
+                country_id=country_id,
+                feature_backend=feature_backend,
+                workers=workers,
+                retrain=retrain,
+                evaluation=evaluation,
+                incremental=incremental,
+            )
+        except Exception as e:
+            result = {"status": "fail", "reason": str(e), "traceback": traceback.format_exc()}
+        results.append({"config_id": config.id, "scope": scope_key(league_id, competition_id, country_id), **result})
+    return results
+
+
+@shared_task
+def summarize_training(lane_results):
+    """Chord callback: merge the lanes' results into one report."""
+    results = sorted((result for lane in lane_results for result in lane), key=lambda r: r["scope"])
+    succeeded = [r for r in results if r.get("status") == "success"]
+
+    def mean(key):
+        values = [r[key] for r in succeeded if r.get(key) is not None]
+        return round(sum(values) / len(values), 4) if values else None
+
+    report = {
+        "status": "completed",
+        "scopes": len(results),
+        "succeeded": len(succeeded),
+        "failed": [{"scope": r["scope"], "reason": r.get("reason")} for r in results if r.get("status") != "success"],
+        "mean_accuracy": mean("accuracy"),
+        "mean_cv_score": mean("cv_score"),
+        "matches_predicted": sum(r.get("matches_predicted", 0) for r in succeeded),
+        "results": results,
+    }
+    print(
+        f"Trained {report['succeeded']}/{report['scopes']} scopes, "
+        f"mean accuracy {report['mean_accuracy']}, mean CV {report['mean_cv_score']}"
+    )
+    return report
+
+
+@shared_task(bind=True)
+def train_all_scopes(self, concurrency=4, feature_backend='store', retrain=False, workers=1, evaluation='cv', incremental=False):
+    """
+    Retrain every scope with an active ModelConfig as a Celery chord.
+
+    Scopes run in at most `concurrency` parallel lanes and summarize_training
+    aggregates their accuracy and CV scores into one report. The feature rows
+    of every scope are first brought up to date in the store in one pass, so
+    overlapping scopes (a league and its country) read the same rows instead
+    of each recomputing them. Hence the store backend by default: the other
+    backends keep nothing between lanes, and each lane builds its own matrix.
+    """
+    configs = list(ModelConfig.objects.filter(active=True))
+    if not configs:
+        return {"status": "completed", "scopes": 0}
+
+    if feature_backend == 'store':
+        shared = reduce(operator.or_, (scope_matches(*_config_scope(config)) for config in configs))
+        load_feature_matrix(shared, workers=workers)
+    else:
+        print(f"⚠️  Backend '{feature_backend}' shares no features between lanes; each scope builds its own matrix")
+
+    lanes = plan_training_lanes(configs, concurrency)
+    result = chord(
+        train_scopes.s(
+            lane,
+            feature_backend=feature_backend,
+            retrain=retrain,
+            workers=workers,
+            evaluation=evaluation,
+            incremental=incremental,
+        )
+        for lane in lanes
+    )(summarize_training.s())
+    return {"status": "dispatched", "lanes": len(lanes), "scopes": sum(map(len, lanes)), "report_task_id": result.id}
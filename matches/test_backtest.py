@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+import numpy as np
+from matches.models import Team, League, Match
+from matches.logic import backtest
+from matches.logic.backtest import backtest_scope, score_predictions, walk_forward
+from matches.testing import create_history
+
+
+class ScorePredictionsTest(SimpleTestCase):
+    def test_metrics(self):
+        probs = np.array([[0.5, 0.25, 0.25], [0.2, 0.4, 0.4]])
+        scores = score_predictions(probs, np.array([0, 1]), np.array([0, 2]))
+        self.assertEqual(scores["accuracy"], 0.5)
+        self.assertAlmostEqual(scores["log_loss"], round(-(np.log(0.5) + np.log(0.4)) / 2, 4))
+        self.assertAlmostEqual(scores["brier"], round(((0.25 + 0.0625 * 2) + (0.04 + 0.16 + 0.36)) / 2, 4))
+        # One winning unit at 2.0, one losing unit
+        self.assertEqual(scores["roi"], 0.0)
+
+
+class WalkForwardTest(SimpleTestCase):
+    def test_only_past_rows_train_each_step(self):
+        rng = np.random.default_rng(0)
+        n = 60
+        dates = [datetime(2024, 1, 1) + timedelta(days=2 * i) for i in range(n)]
+        X, y = rng.normal(size=(n, 3)), np.arange(n) % 3
+        fitted = []
+
+        def build(*args, **kwargs):
+            model = original(*args, **kwargs)
+            fit = model.fit
+            model.fit = lambda X_train, y_train: fitted.append(len(X_train)) or fit(X_train, y_train)
+            return model
+
+        original = backtest.build_estimator
+        with mock.patch.object(backtest, "build_estimator", side_effect=build):
+            predicted, probs, labels, fits = walk_forward(
+                X, y, dates, {'n_estimators': 5}, step=timedelta(weeks=2), min_train=30
+            )
+
+        self.assertFalse(predicted[:30].any())
+        self.assertTrue(predicted[30:].all())
+        # Each step trains on every row before it: 30, then 7 more per two weeks
+        self.assertEqual(fitted, [30, 37, 44, 51, 58])
+        self.assertEqual(fits, 5)
+        np.testing.assert_allclose(probs[predicted].sum(axis=1), 1.0)
+
+
+class BacktestScopeTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(6)]
+        create_history(self.league, self.teams, rounds=4, start=timezone.now() - timedelta(days=400))
+        Match.objects.filter(date__gte=timezone.now() - timedelta(days=250)).update(season="2025")
+
+    def test_reports_per_season(self):
+        result = backtest_scope(league_id=self.league.id, step_weeks=4, min_train=20)
+        self.assertEqual(result["matches"], 60)
+        self.assertEqual(result["overall"]["matches"], 40)
+        self.assertEqual(sorted(result["seasons"]), ["2024", "2025"])
+        self.assertEqual(sum(s["matches"] for s in result["seasons"].values()), 40)
+        self.assertGreater(result["fits"], 1)
+
+    def test_injury_features_are_left_out(self):
+        with mock.patch.object(backtest, "build_training_matrix", wraps=backtest.build_training_matrix) as build:
+            result = backtest_scope(league_id=self.league.id, step_weeks=4, min_train=20)
+        features = build.call_args.kwargs["features"]
+        self.assertNotIn("home_injuries", features)
+        self.assertNotIn("away_injuries", features)
+        self.assertIn("home_form", features)
+        self.assertEqual(result["excluded_features"], ["home_injuries", "away_injuries"])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("backtest", league=self.league.id, step_weeks=4, min_train=20, stdout=out)
+        self.assertIn("Overall", out.getvalue())
+        out = StringIO()
+        call_command("backtest", league=self.league.id, min_train=500, stdout=out)
+        self.assertIn("Not enough history", out.getvalue())
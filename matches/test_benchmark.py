@@ -0,0 +1,37 @@
+import json
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from matches.models import Fixture, League, Match, Player, Team
+from matches.logic import benchmark
+from matches.logic.benchmark import run_benchmark
+
+STAGES = {'generate', 'ingest', 'extract_features', 'training_matrix', 'train_and_predict', 'batch_prediction'}
+
+
+class BenchmarkTest(TestCase):
+    def test_run_measures_every_stage_and_rolls_back(self):
+        run = run_benchmark(300, seed=1)
+        self.assertEqual(set(run['stages']), STAGES)
+        self.assertEqual((run['teams'], run['fixtures']), (20, 50))
+        for stats in run['stages'].values():
+            self.assertEqual(set(stats), {'seconds', 'queries', 'peak_rss_mb'})
+            self.assertGreater(stats['queries'], 0)
+        for model in (League, Team, Player, Match, Fixture):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_command_reports_json_per_size(self):
+        out = StringIO()
+        call_command("bench_pipeline", matches="200,300", stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual([run['matches'] for run in report['runs']], [200, 300])
+        self.assertIn('commit', report['environment'])
+
+    def test_command_refuses_production_database(self):
+        with mock.patch.object(benchmark.connection, "vendor", "postgresql"), \
+                mock.patch.dict(benchmark.connection.settings_dict, NAME="matchdb"), \
+                self.settings(DEBUG=False):
+            with self.assertRaises(CommandError):
+                call_command("bench_pipeline", matches="200", stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Match.objects.exists())
@@ -0,0 +1,78 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from matches.logic.compact_forest import CompactForest
+from matches.logic.model_registry import load_compact_model, save_model
+from matches.logic.serving import load_predictor
+
+
+def make_data(rows, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 6))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, rng.integers(0, 3, rows)
+
+
+class CompactForestTest(SimpleTestCase):
+    def setUp(self):
+        X, y = make_data(400, 0)
+        self.model = RandomForestClassifier(
+            n_estimators=30, max_depth=8, random_state=42, class_weight='balanced', n_jobs=1
+        ).fit(X, y)
+        self.X_test, _ = make_data(200, 1)
+        self.compact = CompactForest.from_forest(self.model)
+
+    def test_identical_probabilities(self):
+        np.testing.assert_array_equal(self.compact.predict_proba(self.X_test), self.model.predict_proba(self.X_test))
+        np.testing.assert_array_equal(self.compact.predict(self.X_test), self.model.predict(self.X_test))
+
+    def test_smaller_than_pickled_forest(self):
+        self.assertLess(self.compact.nbytes, len(pickle.dumps(self.model)) / 2)
+
+    def test_round_trip_without_scikit_learn(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "forest.npz")
+            self.compact.save(path)
+            np.save(os.path.join(directory, "X.npy"), self.X_test)
+            np.save(os.path.join(directory, "expected.npy"), self.model.predict_proba(self.X_test))
+            script = (
+                "import sys; sys.modules['sklearn'] = None\n"
+                "import numpy as np\n"
+                "from matches.logic.compact_forest import CompactForest\n"
+                f"forest = CompactForest.load({path!r})\n"
+                f"proba = forest.predict_proba(np.load({os.path.join(directory, 'X.npy')!r}))\n"
+                f"assert np.array_equal(proba, np.load({os.path.join(directory, 'expected.npy')!r}))\n"
+            )
+            subprocess.run([sys.executable, "-c", script], cwd=settings.BASE_DIR, check=True)
+
+    def test_rejects_wrong_width(self):
+        with self.assertRaises(ValueError):
+            self.compact.predict_proba(np.zeros((2, 5)))
+
+
+class CompactExportTest(SimpleTestCase):
+    def test_registry_exports_forests_only(self):
+        X, y = make_data(200, 2)
+        with tempfile.TemporaryDirectory() as directory, override_settings(MODEL_REGISTRY_DIR=directory):
+            forest = RandomForestClassifier(n_estimators=5, random_state=0, n_jobs=1).fit(X, y)
+            save_model("L1-forest-data", forest)
+            np.testing.assert_array_equal(load_compact_model("L1-forest-data").predict_proba(X), forest.predict_proba(X))
+
+            save_model("L1-boosting-data", HistGradientBoostingClassifier(max_iter=5).fit(X, y))
+            self.assertIsNone(load_compact_model("L1-boosting-data"))
+
+    def test_predictor_prefers_compact_forest(self):
+        X, y = make_data(200, 3)
+        with tempfile.TemporaryDirectory() as directory, override_settings(MODEL_REGISTRY_DIR=directory):
+            save_model("L1-forest-data", RandomForestClassifier(n_estimators=5, random_state=0, n_jobs=1).fit(X, y))
+            self.assertIsInstance(load_predictor("L1-forest-data"), CompactForest)
+
+            save_model("L1-boosting-data", HistGradientBoostingClassifier(max_iter=5).fit(X, y))
+            self.assertIsInstance(load_predictor("L1-boosting-data"), HistGradientBoostingClassifier)
+            self.assertIsNone(load_predictor("L1-missing"))
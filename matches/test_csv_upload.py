@@ -0,0 +1,277 @@
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from match.celery import app
+from matches.models import Competition, Country, CSVUpload, Fixture, HeadToHead, League, Match, Team, TeamRating
+from matches.tasks import ChunkProgress, process_csv_upload
+from matches.utils.copy_import import parse_match_row
+from matches.utils.csv_stream import CSVRows, chunked, count_rows, plan_chunks
+from matches.utils.entity_resolver import EntityResolver
+
+MATCH_CSV = (
+    "\ufeffDate,HomeTeam,AwayTeam,FTHG,FTAG,FTR\r\n"
+    "01/08/2024,Arsenal,Chelsea,2,1,H\r\n"
+    "08/08/2024,Chelsea,Arsenal,0,0,D\r\n"
+    "not a date,Arsenal,Chelsea,1,1,D\r\n"
+    "15/08/2024,\"Arsenal\",\"Chelsea\",0,3,A"
+)
+
+
+class LocalStorageMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        storage = mock.patch.object(CSVUpload._meta.get_field('file'), 'storage', FileSystemStorage(location=directory))
+        storage.start()
+        self.addCleanup(storage.stop)
+
+    def upload(self, content, model_type='match', **kwargs):
+        upload = CSVUpload(model_type=model_type, **kwargs)
+        upload.file.save('matches.csv', ContentFile(content.encode('utf-8')), save=False)
+        upload.save()
+        return upload
+
+
+class CSVStreamTest(LocalStorageMixin, TestCase):
+    def test_pre_scan_counts_rows_with_or_without_final_newline(self):
+        self.assertEqual(count_rows(self.upload(MATCH_CSV).file), 4)
+        self.assertEqual(count_rows(self.upload(MATCH_CSV + "\r\n").file), 4)
+        self.assertEqual(count_rows(self.upload("Date,HomeTeam\n").file), 0)
+
+    def test_rows_are_decoded_lazily_and_counted(self):
+        rows = CSVRows(self.upload(MATCH_CSV).file)
+        first = next(iter(rows))
+        self.assertEqual(first["Date"], "01/08/2024")
+        self.assertEqual(rows.count, 1)
+        self.assertEqual(len(list(rows)), 4)
+        self.assertEqual(rows.count, 5)
+
+
+class ChunkedTest(SimpleTestCase):
+    def test_chunks_keep_order_and_size(self):
+        self.assertEqual(list(chunked(iter(range(7)), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(chunked([], 3)), [])
+
+
+class ProcessMatchUploadTest(LocalStorageMixin, TestCase):
+    def test_match_upload_streams_rows_into_matches(self):
+        league = League.objects.create(name="Premier League", code="PL")
+        upload = self.upload(MATCH_CSV, league=league, season="2024")
+
+        result = process_csv_upload(upload.id)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(result['total_rows'], 4)
+        self.assertEqual((upload.processed_rows, upload.successful_rows, upload.failed_rows), (4, 3, 1))
+        self.assertEqual(Match.objects.filter(league=league).count(), 3)
+        self.assertEqual(
+            sorted(Match.objects.values_list('result', flat=True)), ['draw', 'loss', 'win']
+        )
+        self.assertEqual(Team.objects.filter(name__in=["Arsenal", "Chelsea"]).count(), 2)
+
+    def test_team_queries_do_not_grow_with_rows(self):
+        def team_queries(n_rows, prefix):
+            lines = [f"{day:02d}/08/2024,{prefix} {day % 4},{prefix} {(day + 1) % 4},1,0,H" for day in range(1, n_rows + 1)]
+            upload = self.upload("Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR\n" + "\n".join(lines), season="2024")
+            with CaptureQueriesContext(connection) as context:
+                process_csv_upload(upload.id)
+            return sum('"matches_team"' in query['sql'] for query in context.captured_queries)
+
+        self.assertEqual(team_queries(4, "North"), team_queries(24, "South"))
+
+
+    def test_ratings_are_brought_up_to_date_once_per_upload(self):
+        from matches.logic import ingest
+
+        lines = [
+            f"{day % 28 + 1:02d}/{day // 28 % 12 + 1:02d}/{2020 + day // 336},Club {day % 5},Club {(day + 1) % 5},1,0,H"
+            for day in range(600)
+        ]
+        upload = self.upload("Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR\n" + "\n".join(lines), season="2024")
+        with mock.patch.object(ingest, "after_matches_written", wraps=ingest.after_matches_written) as upkeep:
+            process_csv_upload(upload.id)
+
+        upkeep.assert_called_once()
+        self.assertEqual(Match.objects.count(), 600)
+        self.assertEqual(TeamRating.objects.count(), 1200)
+
+    def test_reupload_updates_matches_in_one_upsert_per_chunk(self):
+        league = League.objects.create(name="Premier League", code="PL")
+        process_csv_upload(self.upload(MATCH_CSV, league=league, season="2024").id)
+        corrected = MATCH_CSV.replace("01/08/2024,Arsenal,Chelsea,2,1,H", "01/08/2024,Arsenal,Chelsea,1,2,A")
+
+        upload = self.upload(corrected + "\r\n01/08/2024,Arsenal,Chelsea,3,2,H", league=league, season="2024")
+        with CaptureQueriesContext(connection) as context:
+            process_csv_upload(upload.id)
+
+        self.assertEqual(Match.objects.count(), 3)
+        first = Match.objects.get(date__day=1)
+        # The file's last row for a fixture wins
+        self.assertEqual((first.home_score, first.away_score, first.result), (3, 2, "win"))
+        match_selects = [q for q in context.captured_queries if q['sql'].startswith('SELECT') and 'FROM "matches_match"' in q['sql']]
+        self.assertLess(len(match_selects), 5)
+
+
+class ProcessFixtureUploadTest(LocalStorageMixin, TestCase):
+    def test_fixtures_are_upserted_and_keep_status_without_column(self):
+        league = League.objects.create(name="Premier League", code="PL")
+        content = "id,date,HomeTeam,AwayTeam,status\n1001,2025-08-16,Arsenal,Chelsea,scheduled\n1002,2025-08-17,Chelsea,Arsenal,scheduled\n"
+        process_csv_upload(self.upload(content, model_type='fixture', league=league, season="2025").id)
+        Fixture.objects.filter(id=1001).update(status="Match Finished")
+
+        moved = "id,date,HomeTeam,AwayTeam\n1001,2025-08-18T15:00:00+00:00,Arsenal,Chelsea\n1003,2025-08-19,Arsenal,Chelsea\n"
+        upload = self.upload(moved, model_type='fixture', league=league, season="2025")
+        process_csv_upload(upload.id)
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.successful_rows, upload.failed_rows), (2, 0))
+        self.assertEqual(Fixture.objects.count(), 3)
+        fixture = Fixture.objects.get(id=1001)
+        self.assertEqual((fixture.date.day, fixture.status), (18, "Match Finished"))
+        self.assertEqual(Fixture.objects.get(id=1003).status, "scheduled")
+
+
+class EntityResolverTest(TestCase):
+    def setUp(self):
+        self.spain = Country.objects.create(name="Spain")
+        self.arsenal = Team.objects.create(name="Arsenal", country="England")
+        self.madrid = Team.objects.create(name="Real Madrid", country="Spain", api_id="541")
+        League.objects.create(name="La Liga", code="LALIGA")
+
+    def test_existing_rows_resolve_without_queries(self):
+        resolver = EntityResolver()
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.team("Arsenal"), self.arsenal)
+            self.assertEqual(resolver.team("Madrid", api_id="541"), self.madrid)
+            self.assertEqual(resolver.league("La Liga").code, "LALIGA")
+            self.assertEqual(resolver.country("SPAIN"), self.spain)
+            self.assertIsNone(resolver.country("Atlantis"))
+
+    def test_unknown_entities_are_created_in_bulk(self):
+        resolver = EntityResolver()
+        teams = [{"name": f"Team {i}", "country": "Spain", "country_link": self.spain} for i in range(20)]
+        teams.append({"name": "Arsenal"})
+        with CaptureQueriesContext(connection) as context:
+            resolver.create_missing(competitions=["Copa", "Copa", None], leagues=["Segunda"], teams=teams)
+        # One INSERT per model, whatever the number of rows
+        self.assertEqual(sum(q['sql'].startswith('INSERT') for q in context.captured_queries), 3)
+        with self.assertNumQueries(0):
+            created = [resolver.team(**team) for team in teams]
+            resolver.competition("Copa")
+            resolver.league("Segunda")
+        self.assertEqual(len({team.id for team in created}), 21)
+        self.assertEqual(created[0].country_link, self.spain)
+        self.assertEqual(Competition.objects.filter(name="Copa").count(), 1)
+        self.assertEqual(League.objects.get(name="Segunda").code, "SEGUND")
+
+    def test_lookup_miss_falls_back_to_get_or_create(self):
+        resolver = EntityResolver()
+        team = resolver.team("Girona", country="Spain", country_link=self.spain)
+        self.assertEqual(Team.objects.get(name="Girona").country_link, self.spain)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.team("Girona", country="Spain"), team)
+
+    def test_names_match_exactly_like_the_model_helpers(self):
+        resolver = EntityResolver()
+        resolver.create_missing(competitions=["copa"], leagues=["la liga"], teams=[{"name": "arsenal"}])
+        self.assertNotEqual(resolver.team("arsenal"), self.arsenal)
+        self.assertEqual(resolver.team("arsenal"), Team.get_or_create_canonical("arsenal"))
+        self.assertEqual(resolver.league("la liga"), League.get_or_create_league("la liga"))
+        self.assertEqual(Team.objects.filter(name__iexact="arsenal").count(), 2)
+        self.assertEqual(League.objects.filter(name__iexact="la liga").count(), 2)
+        # Countries are still matched case-insensitively
+        self.assertEqual(resolver.country("spain"), self.spain)
+
+
+class CopyImportTest(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.league = League.objects.create(name="Premier League", code="PL")
+
+    def test_rows_parse_like_the_orm_path(self):
+        values = parse_match_row(
+            {"Date": "01/08/2024", "HomeTeam": " Arsenal ", "AwayTeam": "Chelsea", "FTHG": "2", "FTAG": "", "FTR": "H"},
+            "2024",
+        )
+        # Names are kept as written, as the ORM path passes them to get_or_create
+        self.assertEqual(values[3:8], ("2024", " Arsenal ", None, "Chelsea", None))
+        self.assertEqual(values[9:], ("2024-08-01", 2, None, "win"))
+        with self.assertRaises(ValueError):
+            parse_match_row({"Date": "soon", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea"}, "2024")
+
+    def test_copy_mode_loads_matches(self):
+        Country.objects.create(name="Spain")
+        content = MATCH_CSV + "\r\n15/08/2024,Arsenal,Chelsea,3,3,D\r\n20/08/2024,Girona,Sevilla,1,0,H,La Liga,spain"
+        content = content.replace("Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR", "Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR,League,Country")
+        upload = self.upload(content, league=self.league, season="2024", ingest_mode='copy')
+
+        process_csv_upload(upload.id)
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.total_rows, upload.successful_rows, upload.failed_rows), (6, 5, 1))
+        self.assertEqual(Match.objects.filter(league=self.league).count(), 3)
+        # The later row for the same fixture wins
+        self.assertEqual(Match.objects.get(date__day=15).result, "draw")
+        girona = Team.objects.get(name="Girona")
+        self.assertEqual((girona.country, girona.country_link.name), ("spain", "Spain"))
+        self.assertEqual(Match.objects.get(home_team=girona).league.code, "LALIG")
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY needs Postgres")
+    def test_copy_and_orm_paths_write_the_same_matches(self):
+        content = MATCH_CSV + "\r\n22/08/2024,arsenal,Chelsea,1,0,H"
+
+        def load(mode):
+            process_csv_upload(self.upload(content, league=self.league, season="2024", ingest_mode=mode).id)
+            return sorted(Match.objects.values_list('fixture_id', 'home_score', 'away_score', 'result'))
+
+        orm = load('orm')
+        Match.objects.all().delete()
+        self.assertEqual(load('copy'), orm)
+        self.assertEqual(Team.objects.filter(name__in=["Arsenal", "arsenal", "Chelsea"]).count(), 3)
+
+
+class ParallelUploadTest(LocalStorageMixin, TestCase):
+    def test_chunks_are_cut_between_rows(self):
+        field_file = self.upload('﻿a,b\r\n1,"x\r\ny"\r\n2,z\r\n\r\n3,w').file
+        header, ranges, rows = plan_chunks(field_file, 2)
+        self.assertEqual((header, rows, len(ranges)), (["a", "b"], 3, 2))
+        chunks = [[row["b"] for row in CSVRows(field_file, fieldnames=header, byte_range=byte_range)] for byte_range in ranges]
+        self.assertEqual(chunks, [["x\r\ny", "z"], ["w"]])
+
+    def test_chunk_progress_adds_to_the_upload(self):
+        upload = self.upload(MATCH_CSV)
+        first, second = ChunkProgress(upload), ChunkProgress(upload)
+        first.processed_rows, first.successful_rows = 3, 2
+        first.save()
+        second.processed_rows, second.failed_rows = 4, 1
+        second.save()
+        first.processed_rows = 5
+        first.save()
+        upload.refresh_from_db()
+        self.assertEqual((upload.processed_rows, upload.successful_rows, upload.failed_rows), (9, 2, 1))
+
+    def test_split_upload_runs_as_a_chord(self):
+        league = League.objects.create(name="Premier League", code="PL")
+        upload = self.upload(MATCH_CSV, league=league, season="2024")
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        with mock.patch("matches.tasks.CSV_CHUNK_ROWS", 2):
+            dispatched = process_csv_upload.apply(args=[upload.id]).get()
+
+        self.assertEqual((dispatched["status"], dispatched["chunks"], dispatched["total_rows"]), ("dispatched", 2, 4))
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, "completed")
+        self.assertEqual((upload.processed_rows, upload.successful_rows, upload.failed_rows), (4, 3, 1))
+        self.assertEqual(Match.objects.filter(league=league).count(), 3)
+        # Ratings and head-to-head records are brought up to date once, at the end
+        self.assertEqual(TeamRating.objects.count(), 6)
+        pair = HeadToHead.objects.get()
+        self.assertEqual(pair.team_a_wins + pair.draws + pair.team_b_wins, 3)
@@ -0,0 +1,60 @@
+import tempfile
+from django.test import SimpleTestCase, TestCase, override_settings
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from matches.models import Team, League, ModelConfig
+from matches.logic.estimators import EARLY_STOPPING_MIN_ROWS, MODEL_TYPES, build_estimator
+from matches.logic.model_registry import load_model
+from matches.logic.train_and_predict import train_and_predict
+from matches.testing import create_history
+
+HYPERPARAMETERS = {'n_estimators': 50, 'max_depth': 6, 'min_samples_split': 8}
+
+
+class BuildEstimatorTest(SimpleTestCase):
+    def test_model_types_match_config_choices(self):
+        self.assertEqual(MODEL_TYPES, tuple(choice for choice, _ in ModelConfig.MODEL_TYPE_CHOICES))
+
+    def test_random_forest_is_default(self):
+        model = build_estimator(None, HYPERPARAMETERS)
+        self.assertIsInstance(model, RandomForestClassifier)
+        self.assertEqual((model.n_estimators, model.max_depth, model.min_samples_split), (50, 6, 8))
+
+    def test_hist_gradient_boosting(self):
+        model = build_estimator("HistGradientBoosting", HYPERPARAMETERS, n_samples=EARLY_STOPPING_MIN_ROWS)
+        self.assertIsInstance(model, HistGradientBoostingClassifier)
+        self.assertEqual((model.max_iter, model.max_depth, model.min_samples_leaf), (50, 6, 4))
+        self.assertEqual((model.class_weight, model.early_stopping), ('balanced', True))
+        small = build_estimator("HistGradientBoosting", HYPERPARAMETERS, n_samples=EARLY_STOPPING_MIN_ROWS - 1)
+        self.assertFalse(small.early_stopping)
+
+    def test_unknown_model_type(self):
+        with self.assertRaises(ValueError):
+            build_estimator("XGBoost", HYPERPARAMETERS)
+
+
+class ModelTypeTrainingTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        create_history(self.league, [Team.objects.create(name=f"Team {i}") for i in range(5)])
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_config_model_type_is_honoured(self):
+        ModelConfig.objects.create(league=self.league, model_type="HistGradientBoosting", n_estimators=20)
+        result = train_and_predict(league_id=self.league.id)
+        self.assertEqual(result["status"], "success")
+        self.assertIsInstance(load_model(result["model_key"])["model"], HistGradientBoostingClassifier)
+
+        # The override trains (and caches) a separate model
+        override = train_and_predict(league_id=self.league.id, model_type="RandomForest")
+        self.assertNotEqual(override["model_key"], result["model_key"])
+        self.assertIsInstance(load_model(override["model_key"])["model"], RandomForestClassifier)
+
+    def test_unknown_config_model_type_fails(self):
+        ModelConfig.objects.create(league=self.league, model_type="XGBoost")
+        result = train_and_predict(league_id=self.league.id)
+        self.assertEqual(result, {"status": "fail", "reason": "Unknown model type 'XGBoost'"})
@@ -0,0 +1,54 @@
+from django.test import TestCase
+from matches.models import Team, Match, League
+from matches.logic.feature_context import FeatureContext
+from matches.logic.feature_training import calculate_form
+from matches.logic.history import TeamHistoryIndex
+from matches.logic.predict import extract_features
+from matches.testing import create_history
+
+
+class FeatureContextTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+        self.match = Match.objects.order_by("-date").select_related("home_team", "away_team").first()
+
+    def test_duplicate_calls_within_one_extraction_hit_the_cache(self):
+        context = FeatureContext()
+        features = extract_features(self.match, context=context)
+
+        # win and draw rates share one home/away record lookup per side
+        self.assertEqual(context.hits, 2)
+        self.assertEqual(features, extract_features(self.match))
+
+    def test_batch_reuse_and_invalidation(self):
+        context = FeatureContext()
+        extract_features(self.match, context=context)
+        misses = context.misses
+
+        extract_features(self.match, context=context)
+        self.assertEqual(context.misses, misses)
+
+        # The extraction cached home form under the match's kick-off
+        home, away = self.match.home_team, self.match.away_team
+        context.get(calculate_form, home, date=self.match.date)
+        self.assertEqual(context.misses, misses)
+
+        context.invalidate(team_id=home.id)
+        context.get(calculate_form, home, date=self.match.date)
+        self.assertEqual(context.misses, misses + 1)
+        context.get(calculate_form, away, date=self.match.date)
+        self.assertEqual(context.misses, misses + 1)
+
+        context.invalidate()
+        self.assertEqual(context.stats["cached"], 0)
+
+    def test_index_is_attached_to_a_context_without_one(self):
+        index = TeamHistoryIndex.for_teams(team.id for team in self.teams)
+        context = FeatureContext()
+        extract_features(self.match, context=context, index=index)
+        self.assertIs(context.index, index)
+
+        with self.assertRaises(ValueError):
+            extract_features(self.match, context=context, index=TeamHistoryIndex.for_teams([self.teams[0].id]))
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.test import TestCase, TransactionTestCase
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from matches.models import Team, Match, League, Player, TeamInjurySummary, Fixture
+from matches.logic.feature_matrix import FEATURE_NAMES, RESULT_CODES, build_feature_matrix, compute_feature_matrix
+from matches.logic.predict import extract_features
+from matches.testing import create_history
+
+
+class FeatureMatrixTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        Player.objects.create(name="Keeper", team=self.teams[0], season="2024", injured=True)
+        Player.objects.create(name="Striker", team=self.teams[0], season="2024", injured=False)
+        Player.objects.create(name="Winger", team=self.teams[1], season="2023", injured=True)
+        TeamInjurySummary.refresh()
+        create_history(self.league, self.teams)
+
+        # Two teams with result-only history exercise the win-rate fallbacks
+        self.cup = League.objects.create(name="Cup", code="CUP")
+        extra = [Team.objects.create(name="Team X"), Team.objects.create(name="Team Y")]
+        for n, result in enumerate(["win", "draw", "loss", "win"]):
+            Match.objects.create(
+                fixture_id=f"cup-{n}",
+                home_team=extra[n % 2],
+                away_team=extra[(n + 1) % 2],
+                league=self.cup,
+                season="2023",
+                date=timezone.now() - timedelta(days=100 - n),
+                result=result,
+            )
+
+    def assertMatchesExtractFeatures(self, X, objects):
+        self.assertEqual(X.shape, (len(objects), len(FEATURE_NAMES)))
+        for row, obj in zip(X, objects):
+            expected = extract_features(obj, date=obj.date)
+            for name, value in zip(FEATURE_NAMES, row):
+                self.assertAlmostEqual(value, expected[name], places=9, msg=f"{name} differs for {obj}")
+
+    def test_training_matrix_matches_extract_features(self):
+        queryset = Match.objects.exclude(result__isnull=True)
+        X, y = build_feature_matrix(queryset)
+
+        matches = list(queryset.select_related("home_team", "away_team").order_by("date", "id"))
+        self.assertMatchesExtractFeatures(X, matches)
+        self.assertEqual(list(y), [RESULT_CODES[m.result] for m in matches])
+
+    def test_fixture_rows_use_history_before_kickoff(self):
+        fixtures = [
+            Fixture.objects.create(
+                id=1000 + i, date=timezone.now() + timedelta(days=i), status="Not Started",
+                league=self.league, season="2024", home_team=home, away_team=away,
+            )
+            for i, (home, away) in enumerate([(self.teams[0], self.teams[1]), (self.teams[2], self.teams[3])])
+        ]
+        X = compute_feature_matrix(
+            [f.home_team_id for f in fixtures], [f.away_team_id for f in fixtures], [f.date for f in fixtures]
+        )
+        self.assertMatchesExtractFeatures(X, fixtures)
+
+
+
+class InlineExecutor(ThreadPoolExecutor):
+    # The test database lives in this process; run shards inline
+    def __init__(self, max_workers=None, mp_context=None, initializer=None):
+        super().__init__(max_workers=1)
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+class ParallelFeatureMatrixTest(TransactionTestCase):
+    # Shards only run outside a transaction, so this can't be a TestCase
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+
+    def test_parallel_shards_are_merged_in_order(self):
+        queryset = Match.objects.exclude(result__isnull=True)
+        X, y = build_feature_matrix(queryset)
+        with mock.patch("matches.logic.feature_matrix.ProcessPoolExecutor", wraps=InlineExecutor) as pool:
+            X_parallel, y_parallel = build_feature_matrix(queryset, workers=3)
+        pool.assert_called_once()
+
+        self.assertTrue((y_parallel == y).all())
+        for row, expected in zip(X_parallel, X):
+            for value, other in zip(row, expected):
+                self.assertAlmostEqual(value, other, places=9)
+
+    def test_transaction_keeps_the_serial_path(self):
+        queryset = Match.objects.exclude(result__isnull=True)
+        with transaction.atomic(), mock.patch("matches.logic.feature_matrix.ProcessPoolExecutor") as pool:
+            build_feature_matrix(queryset, workers=3)
+        pool.assert_not_called()
@@ -0,0 +1,65 @@
+from unittest import mock
+from django.test import TestCase
+from matches.models import Team, Match, League, ModelConfig
+from matches.logic import feature_training
+from matches.logic.feature_context import FeatureContext
+from matches.logic.feature_matrix import FEATURE_NAMES
+from matches.logic.feature_registry import FEATURES, enabled_features, plan, register_feature, unregister_feature
+from matches.logic.predict import extract_features
+from matches.logic.train_and_predict import build_training_matrix
+from matches.testing import create_history
+
+
+class FeatureRegistryTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+
+    def tearDown(self):
+        FEATURES.pop("goal_avg_diff", None)
+
+    def test_builtins_follow_matrix_columns(self):
+        self.assertEqual(list(FEATURES)[:len(FEATURE_NAMES)], FEATURE_NAMES)
+
+    def test_plan_adds_dependencies_first(self):
+        self.assertEqual(plan(["form_diff"]), ["home_form", "away_form", "form_diff"])
+        self.assertEqual(plan(["home_advantage"]), ["home_win_rate", "away_win_rate", "home_advantage"])
+
+    def test_zero_weight_features_are_skipped(self):
+        config = ModelConfig.objects.create(
+            league=self.league, weight_home_strength=0, weight_away_strength=0, weight_strength_diff=0,
+        )
+        enabled = enabled_features(config)
+        self.assertNotIn("home_strength", enabled)
+        self.assertNotIn("strength_diff", enabled)
+        self.assertEqual(len(enabled), len(FEATURES) - 3)
+
+        match = Match.objects.select_related("home_team", "away_team").order_by("date").last()
+        # Built-ins capture their functions at registration, so spy on the
+        # context every team feature goes through
+        with mock.patch.object(FeatureContext, "get", autospec=True, side_effect=FeatureContext.get) as get:
+            features = extract_features(match, features=enabled)
+        self.assertEqual(list(features), enabled)
+        computed = {call.args[1] for call in get.call_args_list}
+        self.assertIn(feature_training.calculate_form, computed)
+        self.assertNotIn(feature_training.calculate_strength, computed)
+
+    def test_plugged_in_feature(self):
+        register_feature(
+            "goal_avg_diff",
+            lambda inputs, values: values["home_goal_avg"] - values["away_goal_avg"],
+            depends_on=("home_goal_avg", "away_goal_avg"),
+        )
+        with self.assertRaises(ValueError):
+            unregister_feature("home_goal_avg")
+
+        queryset = Match.objects.exclude(result__isnull=True)
+        names = ["home_form", "goal_avg_diff"]
+        X_numpy, _ = build_training_matrix(queryset, feature_backend="numpy", features=names)
+        X_orm, _ = build_training_matrix(queryset, feature_backend="orm", features=names)
+
+        goal_avg = [FEATURE_NAMES.index("home_goal_avg"), FEATURE_NAMES.index("away_goal_avg")]
+        X_full, _ = build_training_matrix(queryset, feature_backend="numpy", features=FEATURE_NAMES)
+        self.assertTrue(abs(X_numpy - X_orm).max() < 1e-9)
+        self.assertTrue(abs(X_numpy[:, 1] - (X_full[:, goal_avg[0]] - X_full[:, goal_avg[1]])).max() < 1e-9)
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from matches.models import Team, Match, League, Player, TeamInjurySummary
+from matches.logic.feature_matrix import FEATURE_NAMES, RESULT_CODES
+from matches.logic.feature_sql import build_feature_matrix_sql
+from matches.logic.predict import extract_features
+from matches.logic.train_and_predict import build_training_matrix
+from matches.testing import create_history
+
+
+class FeatureSqlTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(5)]
+        Player.objects.create(name="Keeper", team=self.teams[0], season="2024", injured=True)
+        Player.objects.create(name="Striker", team=self.teams[0], season="2024", injured=False)
+        Player.objects.create(name="Winger", team=self.teams[1], season="2024", injured=True)
+        TeamInjurySummary.refresh()
+        # Enough rounds that the 10/20-match windows actually slide
+        create_history(self.league, self.teams, rounds=6)
+
+        # An unplayed match still moves the season lookup but no window
+        Match.objects.create(
+            fixture_id="TL-pending", home_team=self.teams[0], away_team=self.teams[1], league=self.league,
+            season="2025", date=timezone.now() - timedelta(days=5), result=None,
+        )
+        Match.objects.create(
+            fixture_id="TL-after", home_team=self.teams[1], away_team=self.teams[0], league=self.league,
+            season="2025", date=timezone.now() - timedelta(days=1), home_score=1, away_score=1, result="draw",
+        )
+
+    def test_matches_extract_features(self):
+        queryset = Match.objects.exclude(result__isnull=True)
+        X, y = build_feature_matrix_sql(queryset)
+
+        matches = list(queryset.select_related("home_team", "away_team").order_by("date", "id"))
+        self.assertEqual(X.shape, (len(matches), len(FEATURE_NAMES)))
+        self.assertEqual(list(y), [RESULT_CODES[m.result] for m in matches])
+        for row, match in zip(X, matches):
+            expected = extract_features(match, date=match.date)
+            for name, value in zip(FEATURE_NAMES, row):
+                self.assertAlmostEqual(value, expected[name], places=9, msg=f"{name} differs for match {match.id}")
+
+    def test_scope_only_limits_rows_not_history(self):
+        last = Match.objects.exclude(result__isnull=True).order_by("-date").first()
+        X_scoped, _ = build_feature_matrix_sql(Match.objects.filter(id=last.id))
+        X_all, _ = build_feature_matrix_sql(Match.objects.all())
+
+        self.assertEqual(X_scoped.shape[0], 1)
+        self.assertEqual(list(X_scoped[0]), list(X_all[-1]))
+
+    def test_backends_agree(self):
+        queryset = Match.objects.exclude(result__isnull=True)
+        X_orm, y_orm = build_training_matrix(queryset, feature_backend="orm")
+        for backend in ("store", "numpy", "sql"):
+            X, y = build_training_matrix(queryset, feature_backend=backend)
+            self.assertEqual(list(y), list(y_orm))
+            self.assertTrue(abs(X - X_orm).max() < 1e-9, msg=f"{backend} differs from orm")
@@ -0,0 +1,99 @@
+from unittest import mock
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from matches.models import Team, Match, League, Player, TeamInjurySummary, MatchFeatures
+from matches.logic import feature_store
+from matches.logic.feature_matrix import build_feature_matrix
+from matches.logic.feature_store import load_training_matrix
+from matches.testing import create_history
+
+
+class FeatureStoreTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+        self.queryset = Match.objects.exclude(result__isnull=True)
+
+    def load(self):
+        with mock.patch.object(
+            feature_store, "compute_feature_matrix_parallel", wraps=feature_store.compute_feature_matrix_parallel
+        ) as compute:
+            X, y = load_training_matrix(self.queryset)
+        recomputed = sum(len(call.args[0]) for call in compute.call_args_list)
+        return X, y, recomputed
+
+    def test_cold_then_warm(self):
+        X_cold, y_cold, recomputed = self.load()
+        self.assertEqual(recomputed, self.queryset.count())
+        self.assertEqual(MatchFeatures.objects.count(), self.queryset.count())
+
+        X_warm, y_warm, recomputed = self.load()
+        self.assertEqual(recomputed, 0)
+        self.assertTrue((X_warm == X_cold).all())
+        self.assertTrue((y_warm == y_cold).all())
+
+        X_fresh, _ = build_feature_matrix(self.queryset)
+        self.assertTrue(abs(X_warm - X_fresh).max() < 1e-12)
+
+    def test_warm_load_reads_watermarks_not_history(self):
+        self.load()
+        # Rows, per-team monthly totals, injury summaries, stored features
+        with self.assertNumQueries(4):
+            self.load()
+
+    def test_new_result_only_invalidates_later_rows_of_its_teams(self):
+        self.load()
+        last = Match.objects.order_by("-date").first()
+        Match.objects.create(
+            fixture_id="late",
+            home_team=self.teams[0],
+            away_team=self.teams[1],
+            league=self.league,
+            season="2024",
+            date=last.date - timedelta(hours=1),
+            home_score=1,
+            away_score=0,
+            result="win",
+        )
+        _, _, recomputed = self.load()
+        # Rows of either team in the new match's season, the match included,
+        # except the opening match: nothing was played before it
+        affected = self.queryset.filter(Q(home_team__in=self.teams[:2]) | Q(away_team__in=self.teams[:2]))
+        self.assertEqual(recomputed, affected.count() - 1)
+        self.assertLess(recomputed, self.queryset.count())
+
+    def test_new_season_keeps_earlier_rows(self):
+        self.load()
+        last = Match.objects.order_by("-date").first()
+        Match.objects.create(
+            fixture_id="next-season",
+            home_team=self.teams[0],
+            away_team=self.teams[1],
+            league=self.league,
+            season="2025",
+            date=last.date + timedelta(days=90),
+            home_score=1,
+            away_score=0,
+            result="win",
+        )
+        _, _, recomputed = self.load()
+        self.assertEqual(recomputed, 1)
+
+    def test_corrected_result_invalidates_rows(self):
+        self.load()
+        first = Match.objects.order_by("date").first()
+        Match.objects.filter(id=first.id).update(home_score=5, away_score=5, result="draw")
+        _, _, recomputed = self.load()
+        self.assertGreater(recomputed, 0)
+
+    def test_player_data_invalidates_rows(self):
+        self.load()
+        Player.objects.create(name="Keeper", team=self.teams[2], season="2024", injured=True)
+        TeamInjurySummary.refresh()
+        _, _, recomputed = self.load()
+        team = self.teams[2]
+        involved = self.queryset.filter(home_team=team).count() + self.queryset.filter(away_team=team).count()
+        self.assertEqual(recomputed, involved)
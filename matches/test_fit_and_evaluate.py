@@ -0,0 +1,45 @@
+from unittest import mock
+from django.test import SimpleTestCase
+import numpy as np
+from matches.logic import train_and_predict as pipeline
+
+
+class FitAndEvaluateTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(60, 4))
+        self.y = np.arange(60) % 3
+        self.hyperparameters = {'n_estimators': 10, 'max_depth': 4, 'min_samples_split': 2}
+
+    def fit_sizes(self, evaluation):
+        fit = pipeline.RandomForestClassifier.fit
+        with mock.patch.object(pipeline.RandomForestClassifier, "fit", autospec=True, side_effect=fit) as patched:
+            result = pipeline.fit_and_evaluate(self.X, self.y, self.hyperparameters, evaluation=evaluation)
+        return result, [len(call.args[1]) for call in patched.call_args_list]
+
+    def test_cv_reuses_folds_for_holdout(self):
+        (model, accuracy, cv_score, timings), sizes = self.fit_sizes('cv')
+        # Five folds, then the production model on every row
+        self.assertEqual(sizes, [48] * 5 + [60])
+        self.assertEqual(model.n_jobs, -1)
+        self.assertEqual(set(timings), {'cv', 'holdout', 'fit'})
+        self.assertIsNotNone(accuracy)
+        self.assertIsNotNone(cv_score)
+
+    def test_holdout_and_none(self):
+        (_, accuracy, cv_score, timings), sizes = self.fit_sizes('holdout')
+        self.assertEqual(sizes, [48, 60])
+        self.assertEqual((set(timings), cv_score), ({'holdout', 'fit'}, None))
+        self.assertIsNotNone(accuracy)
+
+        (_, accuracy, cv_score, timings), sizes = self.fit_sizes('temporal')
+        self.assertEqual(sizes, [48, 60])
+        self.assertEqual((set(timings), cv_score), ({'holdout', 'fit'}, None))
+
+        (_, accuracy, cv_score, timings), sizes = self.fit_sizes('none')
+        self.assertEqual(sizes, [60])
+        self.assertEqual((accuracy, cv_score, set(timings)), (None, None, {'fit'}))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            pipeline.fit_and_evaluate(self.X, self.y, self.hyperparameters, evaluation='bootstrap')
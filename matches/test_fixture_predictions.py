@@ -0,0 +1,75 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from matches.models import Team, League, Fixture, Prediction
+from matches.logic.compact_forest import CompactForest
+from matches.logic.predict import extract_features
+from matches.logic.serving import predict_fixtures, label_map
+from matches.testing import create_history
+
+
+class PredictFixturesTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+        for n, (home, away) in enumerate([(0, 1), (2, 3), (1, 2), (3, 0)]):
+            Fixture.objects.create(
+                id=n + 1, date=timezone.now() + timedelta(days=n + 1), status="Not Started", league=self.league,
+                season="2025", home_team=self.teams[home], away_team=self.teams[away],
+            )
+
+        self.feature_names = ['form_diff', 'strength_diff', 'home_goal_avg']
+        self.feature_weights = {'form_diff': 1.0, 'strength_diff': 0.5, 'home_goal_avg': 2.0}
+        rng = np.random.default_rng(0)
+        self.model = RandomForestClassifier(n_estimators=10, random_state=0)
+        self.model.fit(rng.normal(size=(60, 3)), np.arange(60) % 3)
+
+    def reference(self, fixture):
+        """The per-fixture computation the batched path replaced."""
+        features = extract_features(fixture, date=fixture.date, features=[*self.feature_names, 'home_strength', 'away_strength'])
+        X_fixture = [[features[name] * self.feature_weights[name] for name in self.feature_names]]
+        pred = self.model.predict(X_fixture)[0]
+        probs = self.model.predict_proba(X_fixture)[0] + 0.01
+        probs = probs / probs.sum()
+        probs[1] = min(probs[1] + 0.03, 0.95)
+        probs = probs / probs.sum()
+        return {
+            'result_pred': label_map[pred],
+            'confidence': float(max(probs)),
+            'goal_diff': int(features['home_strength'] - features['away_strength']),
+            'fair_odds_home': round(1 / probs[0], 2),
+            'fair_odds_draw': round(1 / probs[1], 2),
+            'fair_odds_away': round(1 / probs[2], 2),
+        }
+
+    def predict(self, version="v1-L1", model=None):
+        fixtures = Fixture.objects.select_related('home_team', 'away_team').order_by('id')
+        return predict_fixtures(model or self.model, fixtures, self.feature_names, self.feature_weights, version)
+
+    def test_matches_per_fixture_predictions(self):
+        self.assertEqual(self.predict(), 4)
+        for fixture in Fixture.objects.select_related('home_team', 'away_team'):
+            prediction = Prediction.objects.get(fixture=fixture)
+            expected = self.reference(fixture)
+            for field, value in expected.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(getattr(prediction, field), value, places=6, msg=field)
+                else:
+                    self.assertEqual(getattr(prediction, field), value, msg=field)
+
+    def test_rerun_updates_in_place(self):
+        self.predict(version="v1")
+        ids = set(Prediction.objects.values_list('id', flat=True))
+        self.assertEqual(self.predict(version="v1-L1"), 4)
+        self.assertEqual(set(Prediction.objects.values_list('id', flat=True)), ids)
+        self.assertEqual(set(Prediction.objects.values_list('model_version', flat=True)), {"v1-L1"})
+
+    def test_compact_forest_serves_same_predictions(self):
+        fields = ['fixture_id', 'result_pred', 'confidence', 'fair_odds_home', 'fair_odds_draw', 'fair_odds_away']
+        self.predict()
+        expected = list(Prediction.objects.order_by('fixture_id').values_list(*fields))
+        self.assertEqual(self.predict(model=CompactForest.from_forest(self.model)), 4)
+        self.assertEqual(list(Prediction.objects.order_by('fixture_id').values_list(*fields)), expected)
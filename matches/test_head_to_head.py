@@ -0,0 +1,83 @@
+from importlib import import_module
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from matches.models import Team, Match, League, HeadToHead
+from matches.logic.head_to_head import head_to_head_balance, head_to_head_balances
+from matches.logic.history import TeamHistoryIndex
+from matches.logic.ingest import after_matches_written
+from matches.testing import create_history
+
+
+class HeadToHeadTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        # Enough rounds for more meetings per pair than RECENT_LIMIT
+        create_history(self.league, self.teams, rounds=12)
+        HeadToHead.refresh()
+
+    def meetings(self, team, other):
+        return Match.objects.filter(home_team__in=[team, other], away_team__in=[team, other]).order_by("-date", "-id")
+
+    def test_record_from_either_side(self):
+        team, other = self.teams[2], self.teams[0]
+        record = HeadToHead.lookup(team.id, other.id)
+        reverse = HeadToHead.lookup(other.id, team.id)
+
+        wins = sum(
+            1 for m in self.meetings(team, other)
+            if (m.home_team_id == team.id and m.result == "win") or (m.away_team_id == team.id and m.result == "loss")
+        )
+        self.assertEqual(record["wins"], wins)
+        self.assertEqual(record["wins"] + record["draws"] + record["losses"], self.meetings(team, other).count())
+        self.assertEqual((record["wins"], record["losses"]), (reverse["losses"], reverse["wins"]))
+        self.assertEqual(len(record["recent"]), HeadToHead.RECENT_LIMIT)
+        self.assertEqual(record["recent"], reverse["recent"].translate(str.maketrans("WL", "LW")))
+
+    def test_migration_backfills_existing_history(self):
+        fields = ("team_a_id", "team_b_id", "team_a_wins", "draws", "team_b_wins", "recent", "last_played")
+        expected = list(HeadToHead.objects.order_by("team_a_id", "team_b_id").values_list(*fields))
+        HeadToHead.objects.all().delete()
+
+        migration = import_module("matches.migrations.0011_headtohead_modelconfig_weight_h2h_balance")
+        migration.build_head_to_head(apps, None)
+        self.assertEqual(list(HeadToHead.objects.order_by("team_a_id", "team_b_id").values_list(*fields)), expected)
+
+    def test_ingest_refreshes_touched_pair(self):
+        team, other = self.teams[0], self.teams[1]
+        before = HeadToHead.lookup(team.id, other.id)
+        match = Match.objects.create(
+            fixture_id="TL-new", home_team=team, away_team=other, league=self.league,
+            season="2025", date=timezone.now(), home_score=3, away_score=0, result="win",
+        )
+        after_matches_written([match.id])
+
+        after = HeadToHead.lookup(team.id, other.id)
+        self.assertEqual(after["wins"], before["wins"] + 1)
+        self.assertEqual(after["recent"], ("W" + before["recent"])[:HeadToHead.RECENT_LIMIT])
+        self.assertEqual(after["last_played"], match.date)
+
+    def test_feature_uses_history_before_date(self):
+        index = TeamHistoryIndex.for_teams(t.id for t in self.teams)
+        matches = list(Match.objects.select_related("home_team", "away_team").order_by("date", "id"))
+        batch = head_to_head_balances(
+            [m.home_team_id for m in matches], [m.away_team_id for m in matches], [m.date for m in matches]
+        )
+        for value, match in zip(batch, matches):
+            expected = head_to_head_balance(match.home_team, date=match.date, opponent_id=match.away_team_id)
+            self.assertAlmostEqual(value, expected, places=9)
+            self.assertAlmostEqual(
+                head_to_head_balance(match.home_team, date=match.date, index=index, opponent_id=match.away_team_id),
+                expected,
+                places=9,
+            )
+
+        # After the last meeting the stored record answers directly
+        team, other = self.teams[0], self.teams[3]
+        future = timezone.now() + timedelta(days=30)
+        recent = HeadToHead.lookup(team.id, other.id)["recent"]
+        expected = (recent.count("W") - recent.count("L")) / len(recent)
+        self.assertAlmostEqual(head_to_head_balance(team, date=future, opponent_id=other.id), expected)
+        self.assertAlmostEqual(head_to_head_balances([team.id], [other.id], [future])[0], expected)
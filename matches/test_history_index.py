@@ -0,0 +1,39 @@
+from django.test import TestCase
+from django.db.models import Q
+from matches.models import Team, Match, League, Player, TeamInjurySummary
+from matches.logic.history import TeamHistoryIndex
+from matches.logic.predict import extract_features
+from matches.testing import create_history
+
+
+class TeamHistoryIndexTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        Player.objects.create(name="Keeper", team=self.teams[0], season="2024", injured=True)
+        Player.objects.create(name="Striker", team=self.teams[0], season="2024", injured=False)
+        TeamInjurySummary.refresh()
+        create_history(self.league, self.teams)
+
+    def test_recent_is_most_recent_first_and_strictly_before_date(self):
+        index = TeamHistoryIndex.for_teams(t.id for t in self.teams)
+        team = self.teams[0]
+        cutoff = Match.objects.order_by("date")[10].date
+
+        rows = index.recent(team.id, date=cutoff, limit=3)
+        expected = (
+            Match.objects.filter(Q(home_team=team) | Q(away_team=team), date__lt=cutoff)
+            .order_by("-date")[:3]
+        )
+
+        self.assertEqual([r.id for r in rows], [m.id for m in expected])
+        self.assertTrue(all(r.date < cutoff for r in rows))
+
+    def test_features_match_orm_path(self):
+        index = TeamHistoryIndex.for_teams(t.id for t in self.teams)
+
+        for match in Match.objects.select_related("home_team", "away_team"):
+            expected = extract_features(match, date=match.date)
+            actual = extract_features(match, date=match.date, index=index)
+            for name, value in expected.items():
+                self.assertAlmostEqual(actual[name], value, places=9, msg=f"{name} differs for match {match.id}")
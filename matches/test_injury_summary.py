@@ -0,0 +1,29 @@
+from django.test import TestCase
+from matches.models import Team, Player, TeamInjurySummary
+from matches.logic.feature_training import count_injuries, injury_rate
+
+
+class TeamInjurySummaryTest(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Team A")
+
+    def test_refresh_counts_and_drops_stale_rows(self):
+        Player.objects.create(name="Keeper", team=self.team, season="2024", injured=True)
+        Player.objects.create(name="Striker", team=self.team, season="2024", injured=False)
+        Player.objects.create(name="Winger", team=self.team, season="2023", injured=False)
+        self.assertEqual(TeamInjurySummary.refresh(team_ids=[self.team.id]), 2)
+
+        summary = TeamInjurySummary.objects.get(team=self.team, season="2024")
+        self.assertEqual((summary.total_players, summary.injured_players, summary.unknown_players), (2, 1, 0))
+
+        Player.objects.filter(season="2023").delete()
+        TeamInjurySummary.refresh(team_ids=[self.team.id])
+        self.assertFalse(TeamInjurySummary.objects.filter(team=self.team, season="2023").exists())
+
+    def test_count_injuries_reads_summary(self):
+        Player.objects.create(name="Keeper", team=self.team, season="2024", injured=True)
+        Player.objects.create(name="Striker", team=self.team, season="2024", injured=False)
+        self.assertEqual(count_injuries(self.team, season="2024"), 0.1)
+
+        TeamInjurySummary.refresh()
+        self.assertEqual(count_injuries(self.team, season="2024"), injury_rate(2, 1, 0))
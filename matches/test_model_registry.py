@@ -0,0 +1,146 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from matches.models import Team, Match, League, ModelConfig
+from matches.logic import train_and_predict as pipeline
+from matches.logic.model_registry import load_model, model_dir, save_model
+from matches.testing import create_history
+
+
+class ModelRegistryTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(5)]
+        create_history(self.league, self.teams)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def run_pipeline(self, **kwargs):
+        with mock.patch.object(pipeline.RandomForestClassifier, "fit", autospec=True,
+                               side_effect=pipeline.RandomForestClassifier.fit) as fit:
+            result = pipeline.train_and_predict(league_id=self.league.id, **kwargs)
+        self.assertEqual(result["status"], "success")
+        return result, fit.called
+
+    def test_loads_until_config_or_data_changes(self):
+        first, fitted = self.run_pipeline()
+        self.assertTrue(fitted)
+        self.assertFalse(first["model_cached"])
+        self.assertTrue(os.path.exists(os.path.join(model_dir(), f"{first['model_key']}.joblib")))
+
+        second, fitted = self.run_pipeline()
+        self.assertFalse(fitted)
+        self.assertTrue(second["model_cached"])
+        self.assertEqual((second["model_key"], second["accuracy"]), (first["model_key"], first["accuracy"]))
+
+        _, fitted = self.run_pipeline(retrain=True)
+        self.assertTrue(fitted)
+
+        Match.objects.create(
+            fixture_id="TL-new", home_team=self.teams[0], away_team=self.teams[1], league=self.league,
+            season="2025", date=timezone.now(), home_score=1, away_score=0, result="win",
+        )
+        after_result, fitted = self.run_pipeline()
+        self.assertTrue(fitted)
+        self.assertNotEqual(after_result["model_key"], first["model_key"])
+
+        ModelConfig.objects.create(league=self.league, n_estimators=20)
+        after_config, fitted = self.run_pipeline()
+        self.assertTrue(fitted)
+        self.assertNotEqual(after_config["model_key"], after_result["model_key"])
+
+    def test_pruning_keeps_other_configurations(self):
+        def save(key, age):
+            path = save_model(key, {})
+            os.utime(path, (age, age))
+
+        save("L1-other-d0", age=1000)
+        for n in range(5):
+            save(f"L1-config-d{n}", age=2000 + n)
+        save("L12-config-d0", age=500)
+
+        saved = sorted(name[:-len(".joblib")] for name in os.listdir(model_dir()))
+        self.assertEqual(saved, ["L1-config-d2", "L1-config-d3", "L1-config-d4", "L1-other-d0", "L12-config-d0"])
+
+
+class IncrementalUpdateTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(6)]
+        create_history(self.league, self.teams)
+        ModelConfig.objects.create(league=self.league, n_estimators=10)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.first = pipeline.train_and_predict(league_id=self.league.id, incremental=True)
+        self.last_date = Match.objects.latest('date').date
+
+    def add_results(self, days, n=3):
+        for i, result in enumerate(["win", "draw", "loss"][:n]):
+            Match.objects.create(
+                fixture_id=f"TL-new-{days}-{i}", home_team=self.teams[i], away_team=self.teams[i + 3],
+                league=self.league, season="2025", date=self.last_date + timedelta(days=days, hours=i), result=result,
+            )
+
+    def thresholds(self, key):
+        return [tree.tree_.threshold for tree in load_model(key)['model'].estimators_]
+
+    def test_replaces_oldest_trees(self):
+        self.assertFalse(self.first["incremental"])
+        self.add_results(days=7)
+        second = pipeline.train_and_predict(league_id=self.league.id, incremental=True)
+        self.assertTrue(second["incremental"])
+        self.assertNotEqual(second["model_key"], self.first["model_key"])
+
+        before, after = self.thresholds(self.first["model_key"]), self.thresholds(second["model_key"])
+        self.assertEqual(len(after), 10)
+        # Two trees retired from the front, two new ones appended
+        for old, kept in zip(before[2:], after[:8]):
+            np.testing.assert_array_equal(old, kept)
+        self.assertEqual(load_model(second["model_key"])["updates"], 1)
+
+        self.add_results(days=14)
+        third = pipeline.train_and_predict(league_id=self.league.id, incremental=True)
+        self.assertTrue(third["incremental"])
+        self.assertEqual(load_model(third["model_key"])["updates"], 2)
+
+    def test_refits_before_full_history_trees_are_gone(self):
+        original = self.thresholds(self.first["model_key"])
+        for update in range(pipeline.INCREMENTAL_MAX_UPDATES):
+            self.add_results(days=7 * (update + 1))
+            result = pipeline.train_and_predict(league_id=self.league.id, incremental=True)
+            self.assertTrue(result["incremental"])
+        # The last two trees of the full fit are still in the forest
+        for old, kept in zip(original[8:], self.thresholds(result["model_key"])[:2]):
+            np.testing.assert_array_equal(old, kept)
+
+        self.add_results(days=7 * (pipeline.INCREMENTAL_MAX_UPDATES + 1))
+        self.assertFalse(pipeline.train_and_predict(league_id=self.league.id, incremental=True)["incremental"])
+
+    def test_falls_back_to_full_fit(self):
+        # A corrected result the previous fit saw
+        match = Match.objects.order_by('date').first()
+        match.result = "loss" if match.result != "loss" else "win"
+        match.save()
+        self.add_results(days=7)
+        self.assertFalse(pipeline.train_and_predict(league_id=self.league.id, incremental=True)["incremental"])
+
+        # Too long since the last fit
+        self.add_results(days=60)
+        self.assertFalse(pipeline.train_and_predict(league_id=self.league.id, incremental=True)["incremental"])
+
+        # Not requested
+        self.add_results(days=65)
+        self.assertFalse(pipeline.train_and_predict(league_id=self.league.id)["incremental"])
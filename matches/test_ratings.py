@@ -0,0 +1,113 @@
+from importlib import import_module
+from unittest import mock
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from matches.models import Team, Match, League, TeamRating
+from matches.logic.feature_matrix import FEATURE_NAMES
+from matches.logic.predict import extract_features
+from matches.logic import ratings
+from matches.logic.ratings import BASE_RATING, get_team_rating, ratings_as_of, rebuild_ratings, record_results
+from matches.logic.train_and_predict import build_training_matrix
+from matches.testing import create_history
+
+
+class RatingsTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(4)]
+        create_history(self.league, self.teams)
+
+    def snapshot_ratings(self):
+        return list(TeamRating.objects.order_by("date", "match_id", "team_id").values_list("team_id", "match_id", "rating"))
+
+    def test_incremental_equals_full_replay(self):
+        for match in Match.objects.order_by("date", "id"):
+            record_results([match.id])
+        incremental = self.snapshot_ratings()
+
+        rebuild_ratings()
+        self.assertEqual(len(incremental), 2 * Match.objects.count())
+        for (team, match, rating), (team_r, match_r, rating_r) in zip(incremental, self.snapshot_ratings()):
+            self.assertEqual((team, match), (team_r, match_r))
+            self.assertAlmostEqual(rating, rating_r, places=9)
+
+    def test_back_filled_result_replays_later_ratings(self):
+        record_results(Match.objects.all())
+        first = Match.objects.order_by("date").first()
+        early = Match.objects.create(
+            fixture_id="TL-early", home_team=self.teams[3], away_team=self.teams[0], league=self.league,
+            season="2024", date=first.date - timedelta(days=1), home_score=5, away_score=0, result="win",
+        )
+        record_results([early.id])
+        replayed = self.snapshot_ratings()
+
+        rebuild_ratings()
+        self.assertEqual(len(replayed), 2 * Match.objects.count())
+        for (_, _, rating), (_, _, rating_r) in zip(replayed, self.snapshot_ratings()):
+            self.assertAlmostEqual(rating, rating_r, places=9)
+
+    def assert_matches_full_replay(self):
+        recorded = self.snapshot_ratings()
+        rebuild_ratings()
+        self.assertEqual(len(recorded), 2 * Match.objects.filter(result__isnull=False).count())
+        for (team, match, rating), (team_r, match_r, rating_r) in zip(recorded, self.snapshot_ratings()):
+            self.assertEqual((team, match), (team_r, match_r))
+            self.assertAlmostEqual(rating, rating_r, places=9)
+
+    def test_unchanged_reimport_is_skipped(self):
+        record_results(Match.objects.all())
+        before = self.snapshot_ratings()
+        with mock.patch.object(ratings, "rebuild_ratings", wraps=rebuild_ratings) as rebuild:
+            self.assertEqual(record_results(Match.objects.all()), 0)
+        rebuild.assert_not_called()
+        self.assertEqual(self.snapshot_ratings(), before)
+
+    def test_other_teams_do_not_force_a_replay(self):
+        record_results(Match.objects.all())
+        others = [Team.objects.create(name=f"Other {i}") for i in range(2)]
+        overlapping = Match.objects.create(
+            fixture_id="OL-1", home_team=others[0], away_team=others[1], league=self.league,
+            season="2024", date=Match.objects.order_by("date").first().date, home_score=1, away_score=0, result="win",
+        )
+        with mock.patch.object(ratings, "rebuild_ratings", wraps=rebuild_ratings) as rebuild:
+            self.assertEqual(record_results([overlapping.id]), 1)
+        rebuild.assert_not_called()
+        self.assert_matches_full_replay()
+
+    def test_corrected_result_replays_later_ratings(self):
+        record_results(Match.objects.all())
+        middle = Match.objects.exclude(home_score__isnull=True).order_by("date")[5]
+        Match.objects.filter(id=middle.id).update(home_score=0, away_score=4, result="loss")
+        with mock.patch.object(ratings, "rebuild_ratings", wraps=rebuild_ratings) as rebuild:
+            record_results([middle.id])
+        rebuild.assert_called_once()
+        self.assert_matches_full_replay()
+
+    def test_migration_backfills_existing_history(self):
+        migration = import_module("matches.migrations.0010_teamrating_modelconfig_weight_elo_diff")
+        migration.backfill_ratings(apps, None)
+        self.assert_matches_full_replay()
+
+    def test_rating_as_of_date(self):
+        record_results(Match.objects.all())
+        team = self.teams[0]
+        first = Match.objects.filter(home_team=team).order_by("date").first()
+
+        self.assertEqual(get_team_rating(team, date=first.date), BASE_RATING)
+        self.assertNotEqual(get_team_rating(team, date=timezone.now()), BASE_RATING)
+
+        matches = list(Match.objects.order_by("date", "id"))
+        batch = ratings_as_of([m.home_team_id for m in matches], [m.date for m in matches])
+        for value, match in zip(batch, matches):
+            self.assertEqual(value, get_team_rating(match.home_team, date=match.date))
+
+    def test_elo_feature_in_training_matrix(self):
+        record_results(Match.objects.all())
+        queryset = Match.objects.exclude(result__isnull=True)
+        names = FEATURE_NAMES + ["elo_diff"]
+        X, _ = build_training_matrix(queryset, feature_backend="numpy", features=names)
+
+        for row, match in zip(X, queryset.select_related("home_team", "away_team").order_by("date", "id")):
+            self.assertAlmostEqual(row[-1], extract_features(match, features=["elo_diff"])["elo_diff"], places=9)
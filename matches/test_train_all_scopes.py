@@ -0,0 +1,84 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from match.celery import app
+from matches.models import Team, League, Fixture, Prediction, ModelConfig, MatchFeatures
+from matches.logic import feature_store
+from matches.tasks import plan_training_lanes, summarize_training, train_all_scopes, train_scopes
+from matches.testing import create_history
+
+
+class TrainAllScopesTest(TestCase):
+    def setUp(self):
+        self.leagues = []
+        for code, size in (("AA", 6), ("BB", 5), ("CC", 4)):
+            league = League.objects.create(name=f"League {code}", code=code)
+            teams = [Team.objects.create(name=f"{code} Team {i}") for i in range(size)]
+            create_history(league, teams)
+            Fixture.objects.create(
+                id=len(self.leagues) + 1, date=timezone.now() + timedelta(days=1), status="Not Started",
+                league=league, season="2025", home_team=teams[0], away_team=teams[1],
+            )
+            self.leagues.append(league)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_lanes_dedupe_scopes_and_balance_sizes(self):
+        configs = [ModelConfig.objects.create(league=league) for league in self.leagues]
+        configs.append(ModelConfig.objects.create(league=self.leagues[0], n_estimators=10))
+        lanes = plan_training_lanes(configs, concurrency=2)
+        # 45, 30 and 18 matches: the largest scope gets a lane to itself
+        self.assertEqual(lanes, [[configs[0].id], [configs[1].id, configs[2].id]])
+        self.assertEqual(plan_training_lanes(configs, concurrency=8), [[configs[0].id], [configs[1].id], [configs[2].id]])
+
+    def test_report_aggregates_lanes(self):
+        configs = [ModelConfig.objects.create(league=league) for league in self.leagues]
+        configs[2].active = False
+        configs[2].save()
+        lane_results = [train_scopes([configs[0].id]), train_scopes([configs[1].id, configs[2].id])]
+        self.assertEqual([len(lane) for lane in lane_results], [1, 1])
+
+        report = summarize_training(lane_results)
+        self.assertEqual((report["scopes"], report["succeeded"], report["failed"]), (2, 2, []))
+        self.assertEqual([r["scope"] for r in report["results"]], [f"L{self.leagues[0].id}", f"L{self.leagues[1].id}"])
+        accuracies = [r["accuracy"] for r in report["results"]]
+        self.assertAlmostEqual(report["mean_accuracy"], round(sum(accuracies) / 2, 4))
+        self.assertEqual(report["matches_predicted"], 2)
+
+    def test_failures_are_reported(self):
+        small = League.objects.create(name="Small", code="SM")
+        config = ModelConfig.objects.create(league=small)
+        report = summarize_training([train_scopes([config.id])])
+        self.assertEqual(report["succeeded"], 0)
+        self.assertEqual(report["failed"], [{"scope": f"L{small.id}", "reason": "Insufficient training data"}])
+        self.assertIsNone(report["mean_accuracy"])
+
+    def test_chord_trains_every_scope(self):
+        for league in self.leagues:
+            ModelConfig.objects.create(league=league)
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        dispatched = train_all_scopes.apply(kwargs={"concurrency": 2}).get()
+        self.assertEqual((dispatched["lanes"], dispatched["scopes"]), (2, 3))
+        # League CC has 18 matches, below the training minimum
+        self.assertEqual(set(Prediction.objects.values_list('fixture__league', flat=True)), {league.id for league in self.leagues[:2]})
+
+    def test_chord_computes_shared_features_once(self):
+        for league in self.leagues:
+            ModelConfig.objects.create(league=league)
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        compute = feature_store.compute_feature_matrix_parallel
+        with mock.patch.object(feature_store, "compute_feature_matrix_parallel", wraps=compute) as spy:
+            train_all_scopes.apply(kwargs={"concurrency": 2}).get()
+        # The warm-up fills the store for every scope; the lanes only read it
+        spy.assert_called_once()
+        self.assertEqual(MatchFeatures.objects.count(), 45 + 30 + 18)
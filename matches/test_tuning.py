@@ -0,0 +1,47 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from sklearn.base import clone
+from matches.models import Team, League, ModelConfig
+from matches.logic.estimators import ConfiguredClassifier
+from matches.logic.tuning import tune_scope
+from matches.testing import create_history
+
+SEARCH_SPACE = {'n_estimators': [5, 10], 'max_depth': [2, None], 'min_samples_split': [2, 10]}
+
+
+class TuneScopeTest(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test League", code="TL")
+        create_history(self.league, [Team.objects.create(name=f"Team {i}") for i in range(6)], rounds=4)
+
+    def tune(self, **kwargs):
+        return tune_scope(league_id=self.league.id, n_candidates=4, factor=2, n_jobs=1, search_space=SEARCH_SPACE, **kwargs)
+
+    def test_writes_best_params_to_scope_config(self):
+        config = ModelConfig.objects.create(league=self.league, model_type="HistGradientBoosting")
+        result = self.tune()
+        self.assertEqual(result["model_type"], "HistGradientBoosting")
+        self.assertEqual(result["samples"], 60)
+        self.assertEqual(result["config_id"], config.id)
+        config.refresh_from_db()
+        self.assertEqual(
+            {name: getattr(config, name) for name in SEARCH_SPACE},
+            result["best_params"],
+        )
+
+    def test_creates_config_and_dry_run(self):
+        self.tune(save=False)
+        self.assertFalse(ModelConfig.objects.exists())
+        result = self.tune()
+        self.assertEqual(ModelConfig.objects.get().id, result["config_id"])
+        self.assertEqual(ModelConfig.objects.get().league_id, self.league.id)
+
+    def test_command_needs_scope(self):
+        with self.assertRaises(CommandError):
+            call_command("tune_model", stdout=StringIO())
+
+    def test_configured_classifier_clones(self):
+        model = ConfiguredClassifier(model_type="RandomForest", n_estimators=7, max_depth=None)
+        self.assertEqual(clone(model).get_params()["n_estimators"], 7)
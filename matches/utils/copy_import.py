@@ -0,0 +1,352 @@
+# matches/utils/copy_import.py
+"""
+Postgres COPY fast path for large match uploads.
+
+Rows are parsed in Python like process_match_csv parses them (same date
+formats, result codes and defaults) and streamed, one chunk at a time, into
+a staging table with COPY FROM STDIN. Everything after that is set-wise SQL
+over the staging table:
+
+1. unknown competitions, leagues and teams are inserted, matched by exact
+   name as the models' get_or_create helpers match them (teams by api_id
+   first, then name and country);
+2. their ids, and the team country, are filled in with one UPDATE per rule,
+   in the order process_match_csv applies them;
+3. one INSERT ... SELECT ... ON CONFLICT (fixture_id) DO UPDATE merges the
+   rows into the match table. The file's last row for a fixture wins.
+
+The staging table is a temporary table: like an UNLOGGED one it is never
+written to the WAL, and it also disappears with the session if the worker
+dies. Ratings and head-to-head records are updated once, for every merged
+match, before it is dropped.
+"""
+import csv
+import io
+import logging
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from matches.models import RESULT_MAP, Competition, Country, League, Match, Team
+from matches.utils.csv_stream import chunked
+from matches.utils.entity_resolver import lock_entities
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_ROWS = 10000
+STAGING_TABLE = "match_csv_staging"
+STAGING_COLUMNS = (
+    "line", "competition", "league", "country", "season",
+    "home_team", "home_api_id", "away_team", "away_api_id",
+    "date", "match_day", "home_score", "away_score", "result",
+)
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y")
+DEFAULT_COUNTRY = "England"
+
+CREATE_STAGING_SQL = """
+CREATE TEMPORARY TABLE {staging} (
+    line integer NOT NULL,
+    competition text,
+    league text,
+    country text,
+    season text NOT NULL,
+    home_team text NOT NULL,
+    home_api_id text,
+    away_team text NOT NULL,
+    away_api_id text,
+    date timestamptz NOT NULL,
+    match_day date NOT NULL,
+    home_score integer,
+    away_score integer,
+    result text,
+    competition_id bigint,
+    league_id bigint,
+    country_id bigint,
+    home_team_id bigint,
+    away_team_id bigint,
+    fixture_id text
+)
+"""
+
+# Competitions, then leagues with the code League.get_or_create_league gives them
+CREATE_ENTITIES_SQL = [
+    """
+    INSERT INTO {competition} (name, type)
+    SELECT DISTINCT ON (s.competition) s.competition, %s
+    FROM {staging} s
+    WHERE s.competition IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM {competition} c WHERE c.name = s.competition)
+    ORDER BY s.competition, s.line
+    """,
+    """
+    INSERT INTO {league} (name, code, country)
+    SELECT DISTINCT ON (s.league) s.league, replace(upper(left(s.league, 6)), ' ', ''), ''
+    FROM {staging} s
+    WHERE s.league IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM {league} l WHERE l.name = s.league)
+    ORDER BY s.league, s.line
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+RESOLVE_SCOPE_SQL = [
+    """
+    UPDATE {staging} s SET competition_id = c.id
+    FROM (SELECT DISTINCT ON (name) id, name FROM {competition} ORDER BY name, id) c
+    WHERE c.name = s.competition
+    """,
+    """
+    UPDATE {staging} s SET league_id = l.id
+    FROM (SELECT DISTINCT ON (name) id, name FROM {league} ORDER BY name, id) l
+    WHERE l.name = s.league
+    """,
+    # Country: named in the row, else the league's country, else the
+    # competition's, else the default
+    """
+    UPDATE {staging} s SET country_id = c.id
+    FROM (SELECT DISTINCT ON (lower(name)) id, lower(name) AS name_key FROM {country} ORDER BY lower(name), id) c
+    WHERE s.country IS NOT NULL AND c.name_key = lower(s.country)
+    """,
+    """
+    UPDATE {staging} s SET country = c.name, country_id = c.id
+    FROM {league} l JOIN {country} c ON c.id = l.country_link_id
+    WHERE s.country IS NULL AND l.id = s.league_id
+    """,
+    """
+    UPDATE {staging} s SET country = l.country
+    FROM {league} l
+    WHERE s.country IS NULL AND l.id = s.league_id AND l.country <> ''
+    """,
+    """
+    UPDATE {staging} s SET country = c.name, country_id = c.id
+    FROM {competition} cp JOIN {country} c ON c.id = cp.country_id
+    WHERE s.country IS NULL AND cp.id = s.competition_id
+    """,
+]
+
+CREATE_TEAMS_SQL = """
+WITH wanted AS (
+    SELECT DISTINCT ON (team_key) api_id, name, country, country_id
+    FROM (
+        SELECT line, home_api_id AS api_id, home_team AS name, country, country_id,
+               coalesce('id:' || home_api_id, 'name:' || home_team || '|' || country) AS team_key
+        FROM {staging}
+        UNION ALL
+        SELECT line, away_api_id, away_team, country, country_id,
+               coalesce('id:' || away_api_id, 'name:' || away_team || '|' || country)
+        FROM {staging}
+    ) sides
+    ORDER BY team_key, line
+)
+INSERT INTO {team} (api_id, name, country, country_link_id)
+SELECT w.api_id, w.name, w.country, w.country_id
+FROM wanted w
+WHERE NOT EXISTS (
+    SELECT 1 FROM {team} t
+    WHERE CASE WHEN w.api_id IS NOT NULL THEN t.api_id = w.api_id
+               ELSE t.name = w.name AND t.country = w.country END
+)
+ON CONFLICT DO NOTHING
+"""
+
+RESOLVE_TEAM_SQL = [
+    """
+    UPDATE {staging} s SET {side}_team_id = t.id
+    FROM (SELECT DISTINCT ON (api_id) id, api_id FROM {team} WHERE api_id IS NOT NULL ORDER BY api_id, id) t
+    WHERE t.api_id = s.{side}_api_id
+    """,
+    """
+    UPDATE {staging} s SET {side}_team_id = t.id
+    FROM (
+        SELECT DISTINCT ON (name, country) id, name, country
+        FROM {team} ORDER BY name, country, id
+    ) t
+    WHERE s.{side}_api_id IS NULL AND t.name = s.{side}_team AND t.country = s.country
+    """,
+    # Teams found by name get the row's country link when they have none
+    """
+    UPDATE {team} t SET country_link_id = s.country_id
+    FROM {staging} s
+    WHERE t.id = s.{side}_team_id AND s.{side}_api_id IS NULL
+      AND s.country_id IS NOT NULL AND t.country_link_id IS NULL
+    """,
+]
+
+# Match.canonical_fixture_id; a league without code gives "None" as in Python
+FIXTURE_ID_SQL = """
+UPDATE {staging} s
+SET fixture_id = coalesce(l.code, 'None') || '-' || s.season || '-' || s.home_team_id || '-'
+                 || s.away_team_id || '-' || to_char(s.match_day, 'YYYY-MM-DD')
+FROM {league} l
+WHERE l.id = s.league_id AND s.home_team_id IS NOT NULL AND s.away_team_id IS NOT NULL
+"""
+
+MERGE_SQL = """
+INSERT INTO {match} (fixture_id, home_team_id, away_team_id, league_id, competition_id,
+                     season, date, home_score, away_score, result)
+SELECT DISTINCT ON (fixture_id) fixture_id, home_team_id, away_team_id, league_id, competition_id,
+       season, date, home_score, away_score, result
+FROM {staging}
+WHERE fixture_id IS NOT NULL
+ORDER BY fixture_id, line DESC
+ON CONFLICT (fixture_id) DO UPDATE SET
+    home_team_id = EXCLUDED.home_team_id,
+    away_team_id = EXCLUDED.away_team_id,
+    league_id = EXCLUDED.league_id,
+    competition_id = EXCLUDED.competition_id,
+    season = EXCLUDED.season,
+    date = EXCLUDED.date,
+    home_score = EXCLUDED.home_score,
+    away_score = EXCLUDED.away_score,
+    result = EXCLUDED.result
+"""
+
+
+def _tables():
+    return {
+        'staging': STAGING_TABLE,
+        'competition': Competition._meta.db_table,
+        'country': Country._meta.db_table,
+        'league': League._meta.db_table,
+        'match': Match._meta.db_table,
+        'team': Team._meta.db_table,
+    }
+
+
+def _text(value):
+    """Cell as written, or None when empty."""
+    return value or None
+
+
+def parse_match_row(row, season):
+    """
+    Staging values of a match CSV row (all but `line`), parsed as
+    process_match_csv does. Raises ValueError for rows it would fail.
+    """
+    home_team = _text(row.get("HomeTeam") or row.get("Home Team"))
+    away_team = _text(row.get("AwayTeam") or row.get("Away Team"))
+    if not home_team or not away_team:
+        raise ValueError("Missing team name")
+
+    date_str = row.get("Date") or row.get("date") or ""
+    date = parse_datetime(date_str)
+    if not date:
+        for fmt in DATE_FORMATS:
+            try:
+                date = datetime.strptime(date_str, fmt)
+                break
+            except ValueError:
+                continue
+    if not date:
+        raise ValueError(f"Unparseable date {date_str!r}")
+    # The fixture id uses the date as written; naive times are stored in
+    # the current time zone, as Django does when saving them
+    match_day = date.date()
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+
+    home_score = row.get("FTHG") or row.get("home_score") or row.get("HomeScore")
+    away_score = row.get("FTAG") or row.get("away_score") or row.get("AwayScore")
+    result = row.get("FTR") or row.get("result") or row.get("Result")
+    return (
+        _text(row.get("Competition") or row.get("competition")),
+        _text(row.get("League") or row.get("league")),
+        _text(row.get("Country") or row.get("country")),
+        row.get("Season") or row.get("season") or season,
+        home_team,
+        _text(row.get("home_team_api_id")),
+        away_team,
+        _text(row.get("away_team_api_id")),
+        date.isoformat(),
+        match_day.isoformat(),
+        int(home_score) if home_score else None,
+        int(away_score) if away_score else None,
+        RESULT_MAP.get(result) if result else None,
+    )
+
+
+def _copy(cursor, sql, buffer):
+    buffer.seek(0)
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def copy_match_csv(upload, rows):
+    """Load a match upload through a COPY-filled staging table (Postgres only)."""
+    league = upload.league or League.get_or_create_league("Premier League")
+    season = upload.season or "unknown"
+    tables = _tables()
+    copy_sql = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+    staged = 0
+    failed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(CREATE_STAGING_SQL.format(**tables))
+        try:
+            line = 0
+            for chunk in chunked(rows, COPY_CHUNK_ROWS):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in chunk:
+                    line += 1
+                    try:
+                        writer.writerow((line, *parse_match_row(row, season)))
+                        staged += 1
+                    except (TypeError, ValueError) as e:
+                        failed += 1
+                        logger.debug(f"Skipping CSV line {line}: {e}")
+                _copy(cursor, copy_sql, buffer)
+
+                upload.processed_rows = staged + failed
+                upload.failed_rows = failed
+                upload.save()
+
+            with transaction.atomic():
+                lock_entities()
+                cursor.execute(CREATE_ENTITIES_SQL[0].format(**tables), [Competition._meta.get_field('type').default])
+                cursor.execute(CREATE_ENTITIES_SQL[1].format(**tables))
+                for sql in RESOLVE_SCOPE_SQL[:2]:
+                    cursor.execute(sql.format(**tables))
+                # Rows naming no league or competition get the upload's
+                cursor.execute(f"UPDATE {STAGING_TABLE} SET league_id = %s WHERE league IS NULL", [league.id])
+                if upload.competition_id:
+                    cursor.execute(
+                        f"UPDATE {STAGING_TABLE} SET competition_id = %s WHERE competition IS NULL",
+                        [upload.competition_id],
+                    )
+                for sql in RESOLVE_SCOPE_SQL[2:]:
+                    cursor.execute(sql.format(**tables))
+                cursor.execute(f"UPDATE {STAGING_TABLE} SET country = %s WHERE country IS NULL", [DEFAULT_COUNTRY])
+
+                cursor.execute(CREATE_TEAMS_SQL.format(**tables))
+                for side in ('home', 'away'):
+                    for sql in RESOLVE_TEAM_SQL:
+                        cursor.execute(sql.format(side=side, **tables))
+                cursor.execute(FIXTURE_ID_SQL.format(**tables))
+                cursor.execute(MERGE_SQL.format(**tables))
+                merged = cursor.rowcount
+
+            cursor.execute(f"SELECT count(*) FROM {STAGING_TABLE} WHERE fixture_id IS NOT NULL")
+            successful = cursor.fetchone()[0]
+            logger.info(f"COPY import: {staged} rows staged, {successful} resolved, {merged} matches merged")
+
+            # Update team ratings and head-to-head records for the new results
+            upload.matches_written(
+                Match.objects.filter(fixture_id__in=RawSQL(f"SELECT fixture_id FROM {STAGING_TABLE}", []))
+            )
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+    upload.processed_rows = staged + failed
+    upload.successful_rows = successful
+    upload.failed_rows = failed + staged - successful
+    upload.save()
@@ -0,0 +1,151 @@
+# matches/utils/csv_stream.py
+"""
+Streaming access to uploaded CSV files.
+
+Uploads can be several gigabytes, so nothing here holds a whole file: the
+row count comes from a newline scan over fixed-size binary blocks, and rows
+are decoded and parsed lazily from the stored object (local or S3/B2), to
+be processed in chunks of a fixed number of rows. plan_chunks cuts a file
+into byte ranges that separate workers can read on their own.
+"""
+import csv
+from contextlib import closing
+from itertools import islice
+
+READ_BLOCK_BYTES = 1024 * 1024
+
+
+def open_binary(field_file, start=0, end=None):
+    """
+    A binary stream over a stored file, from byte `start` to `end`.
+
+    S3/B2 objects are read from the body of a GET (a Range GET for part of
+    the file) as it arrives. Reading them through the storage's own file
+    would first download the whole object into a SpooledTemporaryFile, in
+    memory unless AWS_S3_MAX_MEMORY_SIZE is set.
+    """
+    s3_object = getattr(field_file.file, 'obj', None)
+    if s3_object is not None:
+        if start or end is not None:
+            return s3_object.get(Range=f"bytes={start}-{'' if end is None else end - 1}")['Body']
+        return s3_object.get()['Body']
+    field_file.open('rb')
+    field_file.seek(start)
+    return field_file
+
+
+class _Lines:
+    """
+    Decoded lines (with their endings) of a binary stream, read in blocks
+    of READ_BLOCK_BYTES and stopping after `length` bytes when given.
+    `offset` is the number of bytes handed out so far, so after csv has
+    parsed a row it is where the next row starts.
+    """
+
+    def __init__(self, stream, encoding, length=None):
+        self.stream = stream
+        self.encoding = encoding
+        self.length = length
+        self.offset = 0
+
+    def _blocks(self):
+        remaining = self.length
+        while remaining is None or remaining > 0:
+            block = self.stream.read(READ_BLOCK_BYTES if remaining is None else min(READ_BLOCK_BYTES, remaining))
+            if not block:
+                return
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+    def __iter__(self):
+        pending = b''
+        for block in self._blocks():
+            lines = (pending + block).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                self.offset += len(line) + 1
+                # UTF-8 never has a newline byte inside a character, so
+                # lines decode on their own; utf-8-sig drops the file's BOM
+                yield (line + b'\n').decode(self.encoding)
+        if pending:
+            self.offset += len(pending)
+            yield pending.decode(self.encoding)
+
+
+def count_rows(field_file):
+    """
+    Data rows of a CSV file (header excluded) from a newline pre-scan.
+
+    Quoted fields spanning lines and blank lines make this an estimate;
+    callers that need the exact figure count the rows they read.
+    """
+    newlines = 0
+    last = b'\n'
+    with closing(open_binary(field_file)) as stream:
+        for block in iter(lambda: stream.read(READ_BLOCK_BYTES), b''):
+            newlines += block.count(b'\n')
+            last = block[-1:]
+    # An unterminated last line is still a row
+    lines = newlines + (last != b'\n')
+    return max(lines - 1, 0)
+
+
+class CSVRows:
+    """
+    The rows of a CSV file as dicts, decoded incrementally on iteration.
+
+    With `byte_range` only the rows in that part of the file are read; it
+    holds no header, so `fieldnames` must be given. `count` is the number
+    of rows read so far. `utf-8-sig` also accepts plain UTF-8 and drops the
+    byte-order mark that spreadsheet exports prepend, which would otherwise
+    end up in the first header.
+    """
+
+    def __init__(self, field_file, encoding='utf-8-sig', fieldnames=None, byte_range=None):
+        self.field_file = field_file
+        self.encoding = encoding
+        self.fieldnames = fieldnames
+        self.byte_range = byte_range
+        self.count = 0
+
+    def __iter__(self):
+        start, end = self.byte_range or (0, None)
+        with closing(open_binary(self.field_file, start, end)) as stream:
+            lines = _Lines(stream, self.encoding, None if end is None else end - start)
+            for row in csv.DictReader(lines, fieldnames=self.fieldnames):
+                self.count += 1
+                yield row
+
+
+def plan_chunks(field_file, rows_per_chunk, encoding='utf-8-sig'):
+    """
+    Split a CSV file for parallel processing. Returns its header, the byte
+    ranges of consecutive runs of `rows_per_chunk` data rows and the number
+    of rows. Ranges are cut where csv finished a row, so quoted fields that
+    span lines are never split; blank lines are not counted.
+    """
+    ranges = []
+    rows = 0
+    with closing(open_binary(field_file)) as stream:
+        lines = _Lines(stream, encoding)
+        reader = csv.reader(lines)
+        header = next(reader, [])
+        start = lines.offset
+        for row in reader:
+            if not row:
+                continue
+            rows += 1
+            if rows % rows_per_chunk == 0:
+                ranges.append((start, lines.offset))
+                start = lines.offset
+        if rows % rows_per_chunk:
+            ranges.append((start, lines.offset))
+    return header, ranges, rows
+
+
+def chunked(iterable, size):
+    """Lists of up to `size` consecutive items of `iterable`."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,162 @@
+# matches/utils/entity_resolver.py
+"""
+Per-import cache of the Country, League, Competition and Team rows that CSV
+rows refer to.
+
+Existing rows are loaded once into dicts keyed by name (and by api_id and
+country for teams), so resolving a row costs dict lookups rather than
+get_or_create queries. Names match exactly, as in the models' helpers, so
+"arsenal" and "Arsenal" stay two teams; countries match case-insensitively,
+as the importers' name__iexact lookup did. Importers call create_missing once per chunk
+with the names they are about to resolve: the unknown ones are bulk-created
+and read back in a few queries per model, under a lock that keeps parallel
+imports from creating the same entity twice. A lookup that still misses
+falls back to the models' own get_or_create helpers, with their behaviour.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+
+from matches.models import Competition, Country, League, Team
+
+# Country of teams created without one (Team.get_or_create_canonical)
+DEFAULT_TEAM_COUNTRY = "England"
+# Advisory lock serializing entity creation across concurrent imports
+ENTITY_LOCK_KEY = 0x6D617463
+
+
+def lock_entities():
+    """
+    Take the entity-creation lock until the enclosing transaction ends.
+    Only Postgres needs it: SQLite already runs one writer at a time.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [ENTITY_LOCK_KEY])
+
+
+def _unknown_names(names, known):
+    """Every distinct name not in `known`, in first-seen order."""
+    return list(dict.fromkeys(name for name in names if name and name not in known))
+
+
+class EntityResolver:
+    def __init__(self):
+        self.countries = {}
+        for country in Country.objects.order_by('id'):
+            self.countries.setdefault(country.name.lower(), country)
+        self.competitions = {}
+        for competition in Competition.objects.select_related('country').order_by('id'):
+            self.competitions.setdefault(competition.name, competition)
+        self.leagues = {}
+        for league in League.objects.select_related('country_link').order_by('id'):
+            self.leagues.setdefault(league.name, league)
+        self.teams = {}
+        self.teams_by_api_id = {}
+        for team in Team.objects.order_by('id'):
+            self._remember_team(team)
+
+    def _remember_team(self, team):
+        if team.api_id:
+            self.teams_by_api_id.setdefault(team.api_id, team)
+        self.teams.setdefault((team.name, team.country), team)
+
+    def _cached_team(self, name, country=None, api_id=None):
+        if api_id:
+            return self.teams_by_api_id.get(api_id)
+        if not name:
+            return None
+        return self.teams.get((name, country or DEFAULT_TEAM_COUNTRY))
+
+    def country(self, name):
+        """Existing Country of that name, or None (countries are never created)."""
+        return self.countries.get(name.lower()) if name else None
+
+    def competition(self, name):
+        if name not in self.competitions:
+            self.competitions[name], _ = Competition.objects.get_or_create(name=name)
+        return self.competitions[name]
+
+    def league(self, name):
+        if name not in self.leagues:
+            self.leagues[name] = League.get_or_create_league(name)
+        return self.leagues[name]
+
+    def team(self, name, country=None, country_link=None, api_id=None):
+        """Team.get_or_create_canonical, answered from the cache when possible."""
+        team = self._cached_team(name, country, api_id)
+        if team is None:
+            team = Team.get_or_create_canonical(name, country=country, country_link=country_link, api_id=api_id)
+            self._remember_team(team)
+        elif country_link and not api_id and not team.country_link_id:
+            team.country_link = country_link
+            team.save(update_fields=['country_link'])
+        return team
+
+    def _unknown_teams(self, teams):
+        unknown = {}
+        for spec in teams:
+            name, country, api_id = spec.get('name'), spec.get('country'), spec.get('api_id')
+            if not name or self._cached_team(name, country, api_id) is not None:
+                continue
+            country = country or DEFAULT_TEAM_COUNTRY
+            key = api_id or (name, country)
+            unknown.setdefault(key, Team(
+                api_id=api_id or None, name=name, country=country, country_link=spec.get('country_link'),
+            ))
+        return unknown
+
+    def create_missing(self, competitions=(), leagues=(), teams=()):
+        """
+        Bulk-create and cache the competitions and leagues (names) and teams
+        (dicts of team() arguments) that are not known yet. Rows that clash
+        with a unique constraint are skipped; resolving them later raises
+        the error get_or_create would have.
+
+        Creation holds lock_entities(), and first picks up the rows other
+        imports created since this resolver was loaded, so imports running
+        in parallel create every entity once.
+        """
+        competitions = _unknown_names(competitions, self.competitions)
+        leagues = _unknown_names(leagues, self.leagues)
+        teams = self._unknown_teams(teams)
+        if not (competitions or leagues or teams):
+            return
+
+        with transaction.atomic():
+            lock_entities()
+
+            if competitions:
+                created = Competition.objects.filter(name__in=competitions)
+                for competition in created.select_related('country').order_by('id'):
+                    self.competitions.setdefault(competition.name, competition)
+                names = [name for name in competitions if name not in self.competitions]
+                if names:
+                    Competition.objects.bulk_create([Competition(name=name) for name in names])
+                    for competition in Competition.objects.filter(name__in=names).order_by('id'):
+                        self.competitions.setdefault(competition.name, competition)
+
+            if leagues:
+                created = League.objects.filter(name__in=leagues)
+                for league in created.select_related('country_link').order_by('id'):
+                    self.leagues.setdefault(league.name, league)
+                names = [name for name in leagues if name not in self.leagues]
+                if names:
+                    League.objects.bulk_create(
+                        [League(name=name, code=name[:6].upper().replace(" ", ""), country="") for name in names],
+                        ignore_conflicts=True,
+                    )
+                    for league in League.objects.filter(name__in=names).order_by('id'):
+                        self.leagues.setdefault(league.name, league)
+
+            if teams:
+                api_ids = [team.api_id for team in teams.values() if team.api_id]
+                names = [team.name for team in teams.values()]
+                created = Team.objects.filter(Q(api_id__in=api_ids) | Q(name__in=names))
+                for team in created.order_by('id'):
+                    self._remember_team(team)
+                new_teams = [team for team in teams.values() if self._cached_team(team.name, team.country, team.api_id) is None]
+                if new_teams:
+                    Team.objects.bulk_create(new_teams, ignore_conflicts=True)
+                    names = [team.name for team in new_teams]
+                    for team in Team.objects.filter(Q(api_id__in=api_ids) | Q(name__in=names)).order_by('id'):
+                        self._remember_team(team)
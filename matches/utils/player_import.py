@@ -1,7 +1,7 @@
 # utils/player_import.py
 import csv
 from datetime import datetime
-from matches.models import Player, Team
+from matches.models import Player, Team, TeamInjurySummary
 
 def import_players_from_csv(csv_file_path, season=None):
     """
@@ -15,6 +15,7 @@ def import_players_from_csv(csv_file_path, season=None):
     
     imported_count = 0
     updated_count = 0
+    touched_team_ids = set()
     
     with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -44,6 +45,7 @@ def import_players_from_csv(csv_file_path, season=None):
                     }
                 )
                 
+                touched_team_ids.add(team.id)
                 if created:
                     imported_count += 1
                 else:
@@ -54,4 +56,8 @@ def import_players_from_csv(csv_file_path, season=None):
             except Exception as e:
                 print(f"Error importing player {row.get('name', 'unknown')}: {e}")
     
+    # Keep the injury feature's (team, season) counts in step with the import
+    if touched_team_ids:
+        TeamInjurySummary.refresh(team_ids=touched_team_ids)
+    
     return imported_count, updated_count
\ No newline at end of file
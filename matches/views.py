@@ -12,7 +12,6 @@ from matches.serializers import (
     GameweekSerializer,
     LeagueSerializer
 )
-from matches.logic.train_and_predict import train_and_predict
 
 from rest_framework.permissions import BasePermission
 
@@ -66,6 +65,9 @@ class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def retrain_predictions(request):
+    # Imported here so web processes only load scikit-learn when retraining
+    from matches.logic.train_and_predict import train_and_predict
+
     result = train_and_predict()
 
     if result['status'] == "fail":
@@ -1,8 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from asgiref.sync import sync_to_async
-from django.db.models import Q
-from matches.models import Match, Fixture
+from matches.models import Fixture, HeadToHead
 from matches.logic.feature_training import calculate_form
 import logging
 
@@ -23,57 +22,25 @@ def _get_fixture_and_form(fixture_id: str):
 
 
 @sync_to_async
-def _get_h2h_stats(fixture_id: str, limit: int = 10):
-    """Compute simple head-to-head stats between the two teams using Match history."""
+def _get_h2h_stats(fixture_id: str, limit: int = HeadToHead.RECENT_LIMIT):
+    """Head-to-head stats over the last meetings, from the precomputed HeadToHead record."""
     fixture = (
         Fixture.objects
         .select_related("home_team", "away_team")
         .get(id=fixture_id)
     )
-    home = fixture.home_team
-    away = fixture.away_team
-
-    qs = (
-        Match.objects
-        .filter(
-            Q(home_team=home, away_team=away) | Q(home_team=away, away_team=home),
-            result__isnull=False,
-        )
-        .order_by("-date")[:limit]
-    )
-
-    total = qs.count()
-    if total == 0:
+    record = HeadToHead.lookup(fixture.home_team_id, fixture.away_team_id)
+    if record is None:
         return fixture, {"total": 0}
 
-    home_wins = draws = away_wins = 0
-    recent_results = []
-
-    for m in qs:
-        if m.home_team == home:
-            result = m.result
-        else:
-            # invert perspective when stored with teams swapped
-            result = {"win": "loss", "loss": "win", "draw": "draw"}.get(m.result, m.result)
-
-        if result == "win":
-            home_wins += 1
-            symbol = "W"
-        elif result == "draw":
-            draws += 1
-            symbol = "D"
-        else:
-            away_wins += 1
-            symbol = "L"
-
-        recent_results.append(symbol)
-
+    # W/D/L from the home team's point of view, most recent first
+    recent = record["recent"][:limit]
     stats = {
-        "total": total,
-        "home_wins": home_wins,
-        "draws": draws,
-        "away_wins": away_wins,
-        "recent": "".join(recent_results),
+        "total": len(recent),
+        "home_wins": recent.count("W"),
+        "draws": recent.count("D"),
+        "away_wins": recent.count("L"),
+        "recent": recent,
     }
     return fixture, stats
 